@@ -1,149 +1,131 @@
-from flask import Flask, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
+from flask import Blueprint, Flask, current_app, request, jsonify, Response, stream_with_context
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, selectinload
 from flask_cors import CORS
+from collections import namedtuple
 from datetime import datetime
+import hashlib
 import json
 import os
 import csv
 import io
-import requests
-
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///courses.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = 'your-secret-key-here'
-
-CORS(app)
-db = SQLAlchemy(app)
-
-# Database Models
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    major = db.Column(db.String(100))
-    graduation_year = db.Column(db.Integer)
-    preferences = db.Column(db.Text)  # JSON string
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class Course(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    code = db.Column(db.String(20), unique=True, nullable=False)
-    name = db.Column(db.String(200), nullable=False)
-    credits = db.Column(db.Integer, nullable=False)
-    department = db.Column(db.String(100))
-    description = db.Column(db.Text)
-    prerequisites = db.Column(db.Text)  # JSON string
-    semester = db.Column(db.String(20))  # Fall, Spring, Both
-    year = db.Column(db.Integer)
-    time_slots = db.Column(db.Text)  # JSON string
-    max_capacity = db.Column(db.Integer)
-    current_enrollment = db.Column(db.Integer, default=0)
-
-class Schedule(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    semester = db.Column(db.String(20), nullable=False)
-    year = db.Column(db.Integer, nullable=False)
-    total_credits = db.Column(db.Integer, default=0)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # Relationship
-    courses = db.relationship('Course', secondary='schedule_courses')
-
-class ScheduleCourses(db.Model):
-    __tablename__ = 'schedule_courses'
-    id = db.Column(db.Integer, primary_key=True)
-    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'), nullable=False)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+import asyncio
+import httpx
 
-# Helper functions
-def check_schedule_conflicts(courses):
-    """Check for time conflicts between courses"""
-    conflicts = []
-    
-    for i, course1 in enumerate(courses):
-        if not course1.time_slots:
-            continue
-            
-        time_slots1 = json.loads(course1.time_slots)
-        
-        for j, course2 in enumerate(courses[i+1:], i+1):
-            if not course2.time_slots:
-                continue
-                
-            time_slots2 = json.loads(course2.time_slots)
-            
-            # Check for conflicts between time slots
-            for slot1 in time_slots1:
-                for slot2 in time_slots2:
-                    if has_time_conflict(slot1, slot2):
-                        conflicts.append({
-                            'course1': course1.code,
-                            'course2': course2.code,
-                            'conflict': f"Time conflict on {slot1.get('day', 'Unknown day')}: {slot1.get('start_time', '')}-{slot1.get('end_time', '')} vs {slot2.get('start_time', '')}-{slot2.get('end_time', '')}"
-                        })
-    
-    return conflicts
+from audit import audit_job_status, start_audit_job
+from caching import LRUCache
+from catalog import bump_catalog_version, course_records_for_ids, get_catalog_snapshot, get_courses_payload
+from conflict_matrix import get_conflict_matrices
+from course_records import CourseRecord, check_schedule_conflicts, find_conflicts, safe_json_loads
+from dashboard import get_dashboard_payload, invalidate_dashboard
+from database import configure_database
+from enrollment import enrollment_summary, reconcile_enrollment, record_enrollment_change
+from metrics import NULL_TIMER, init_metrics, phase_timer, render_metrics
+from models import db, User, Course, Schedule, ScheduleConflictReport, ScheduleCourses
+from profiles import get_user_profile, invalidate_user_profile
+from query_log import init_query_log, query_log, query_log_enabled
+from schedule_export import gzip_stream, iter_csv, iter_ndjson, iter_zip, schedule_query
+from schedule_render import render_ical, render_weekly_json
+from scrape_pool import ScrapeQueueFull
+from scraper import (
+    construct_schedule_url, crawl_pages, fetch_sitemap_urls, http_client, is_schedule_page_url,
+    iterate_async, scrape_catalog_page, scrape_schedule_page
+)
 
-def has_time_conflict(slot1, slot2):
-    """Check if two time slots conflict"""
-    # Check if same day
-    if slot1.get('day') != slot2.get('day'):
-        return False
-    
-    # Get start and end times
-    start1 = slot1.get('start_time', '')
-    end1 = slot1.get('end_time', '')
-    start2 = slot2.get('start_time', '')
-    end2 = slot2.get('end_time', '')
-    
-    # If we don't have proper time data, assume conflict for safety
-    if not start1 or not end1 or not start2 or not end2:
-        return True
-    
-    # Convert times to minutes for comparison
-    def time_to_minutes(time_str):
-        try:
-            # Handle formats like "9:00 AM", "09:00", "9:00"
-            is_pm = 'PM' in time_str.upper()
-            is_am = 'AM' in time_str.upper()
-            
-            # Remove AM/PM and clean up
-            time_str = time_str.upper().replace(' AM', '').replace(' PM', '').strip()
-            if ':' not in time_str:
-                return 0
-            
-            hour, minute = map(int, time_str.split(':'))
-            
-            # Convert to 24-hour format
-            if is_pm and hour != 12:
-                hour += 12
-            elif is_am and hour == 12:
-                hour = 0
-            
-            return hour * 60 + minute
-        except:
-            return 0
-    
-    start1_min = time_to_minutes(start1)
-    end1_min = time_to_minutes(end1)
-    start2_min = time_to_minutes(start2)
-    end2_min = time_to_minutes(end2)
-    
-    # Check for overlap: if one course starts before another ends and ends after the other starts
-    return (start1_min < end2_min and end1_min > start2_min)
+api = Blueprint('api', __name__)
 
-def safe_json_loads(json_str):
-    """Safely parse JSON string, return empty list if invalid"""
-    if not json_str or not isinstance(json_str, str) or not json_str.strip():
-        return []
+def create_app(config=None):
+    """Create and configure the Flask application"""
+    app = Flask(__name__)
+    configure_database(app)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+    if config:
+        app.config.update(config)
+    
+    CORS(app)
+    db.init_app(app)
+    init_metrics(app)
+    init_query_log(app)
+    app.register_blueprint(api)
+    
+    return app
+
+# Query helpers
+# Schedule endpoints load their courses with one extra SELECT ... IN query
+# instead of a lazy load per schedule, and only fetch the course columns
+# each endpoint actually renders.
+SCHEDULE_SUMMARY_COURSE_COLUMNS = (Course.id, Course.code, Course.name, Course.credits, Course.department)
+SCHEDULE_DETAIL_COURSE_COLUMNS = SCHEDULE_SUMMARY_COURSE_COLUMNS + (
+    Course.description, Course.time_slots, Course.max_capacity, Course.current_enrollment
+)
+
+def courses_loader(course_columns):
+    """Loader option that batch-loads Schedule.courses restricted to the given columns"""
+    return selectinload(Schedule.courses).options(load_only(*course_columns))
+
+def get_schedule_with_courses(schedule_id, course_columns=SCHEDULE_DETAIL_COURSE_COLUMNS):
+    """Fetch a schedule and its courses in two queries"""
+    return db.session.get(Schedule, schedule_id, options=[courses_loader(course_columns)])
+
+def get_schedules_for_user(user_id, course_columns=SCHEDULE_SUMMARY_COURSE_COLUMNS):
+    """Fetch all schedules of a user, newest first, with their courses in two queries"""
+    return (Schedule.query
+            .filter_by(user_id=user_id)
+            .options(courses_loader(course_columns))
+            .order_by(Schedule.created_at.desc())
+            .all())
+
+def schedule_course_ids(schedule_id):
+    """Course ids of a schedule in the order they were added"""
+    return db.session.execute(
+        select(ScheduleCourses.course_id).where(ScheduleCourses.schedule_id == schedule_id).order_by(ScheduleCourses.id)
+    ).scalars().all()
+
+def render_schedule(schedule, course_ids, catalog, descriptions=None):
+    """Store the weekly grid and iCal export for a schedule's courses"""
+    records = course_records_for_ids(course_ids)
+    if descriptions is None:
+        descriptions = dict(db.session.execute(
+            select(Course.id, Course.description).where(Course.id.in_(course_ids))
+        ).all()) if course_ids else {}
+    
+    schedule.rendered_weekly = render_weekly_json(records)
+    schedule.rendered_ical = render_ical(schedule.id, schedule.semester, schedule.year, records, descriptions)
+    schedule.rendered_catalog_version = catalog.version
+
+def ensure_schedule_rendered(schedule):
+    """Re-render a schedule never rendered or rendered from an older catalog version"""
+    catalog = get_catalog_snapshot()
+    if schedule.rendered_catalog_version == catalog.version and schedule.rendered_weekly is not None:
+        return
     
-    try:
-        return json.loads(json_str.strip())
-    except (json.JSONDecodeError, TypeError):
-        return []
+    render_schedule(schedule, schedule_course_ids(schedule.id), catalog)
+    db.session.commit()
 
+def schedule_detail(schedule, courses):
+    """A schedule with full course details, as returned by GET /api/schedule/<id>"""
+    return {
+        'id': schedule.id,
+        'semester': schedule.semester,
+        'year': schedule.year,
+        'total_credits': schedule.total_credits,
+        'created_at': schedule.created_at.isoformat() if schedule.created_at else None,
+        'courses': [{
+            'id': course.id,
+            'code': course.code,
+            'name': course.name,
+            'credits': course.credits,
+            'department': course.department,
+            'description': course.description,
+            'time_slots': json.loads(course.time_slots) if course.time_slots else [],
+            'max_capacity': course.max_capacity,
+            'current_enrollment': course.current_enrollment
+        } for course in courses]
+    }
+
+# Helper functions
 def parse_time_slots(time_str):
     """Parse time string into structured format"""
     if not time_str:
@@ -165,7 +147,31 @@ def parse_time_slots(time_str):
     return slots
 
 # Routes
-@app.route('/api/health', methods=['GET'])
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """Request, database and scrape metrics in Prometheus text format"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+QUERY_REPORT_DEFAULT_LIMIT = 20
+
+@api.route('/api/debug/queries', methods=['GET', 'DELETE'])
+def debug_queries():
+    """Slow queries, likely N+1 patterns and the most expensive statements (DELETE clears them)"""
+    # Off unless explicitly enabled: the report exposes SQL text and code locations
+    if not query_log_enabled():
+        return jsonify({'error': 'Not found'}), 404
+    
+    if request.method == 'DELETE':
+        query_log.reset()
+        return jsonify({'message': 'Query log cleared'})
+    
+    try:
+        limit = min(max(int(request.args.get('limit', QUERY_REPORT_DEFAULT_LIMIT)), 1), 200)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify(query_log.report(limit))
+
+@api.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
         'message': 'Smart Course Scheduler API is running',
@@ -173,26 +179,42 @@ def health_check():
         'timestamp': datetime.utcnow().isoformat()
     })
 
-@app.route('/api/courses', methods=['GET'])
+@api.route('/api/courses', methods=['GET'])
 def get_courses():
     """Get all available courses"""
-    courses = Course.query.all()
-    return jsonify([{
-        'id': course.id,
-        'code': course.code,
-        'name': course.name,
-        'credits': course.credits,
-        'department': course.department,
-        'description': course.description,
-        'prerequisites': safe_json_loads(course.prerequisites),
-        'semester': course.semester,
-        'year': course.year,
-        'time_slots': safe_json_loads(course.time_slots),
-        'max_capacity': course.max_capacity,
-        'current_enrollment': course.current_enrollment
-    } for course in courses])
+    # Served from the per-process catalog snapshot, rebuilt only when the catalog changes
+    return Response(get_courses_payload(), mimetype='application/json')
+
+ENROLLMENT_SUMMARY_DEFAULT_LIMIT = 20
+
+@api.route('/api/courses/enrollment', methods=['GET'])
+def get_enrollment_summary():
+    """Enrollment totals, per department and the fullest courses, read from the counters"""
+    try:
+        limit = min(max(int(request.args.get('limit', ENROLLMENT_SUMMARY_DEFAULT_LIMIT)), 0), 200)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    return jsonify(enrollment_summary(
+        department=request.args.get('department'),
+        semester=request.args.get('semester'),
+        limit=limit
+    ))
 
-@app.route('/api/courses/<int:course_id>', methods=['GET'])
+@api.route('/api/courses/enrollment/reconcile', methods=['POST'])
+def reconcile_enrollment_counters():
+    """Recompute enrollment counters from schedule_courses and fix any that drifted"""
+    try:
+        result = reconcile_enrollment()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Reconciliation failed: {str(e)}'}), 500
+    
+    if result['corrected']:
+        print(f"Enrollment reconcile corrected {result['corrected']} of {result['courses']} counters")
+    return jsonify(result)
+
+@api.route('/api/courses/<int:course_id>', methods=['GET'])
 def get_course_detail(course_id):
     """Get detailed information about a specific course"""
     course = Course.query.get(course_id)
@@ -215,69 +237,44 @@ def get_course_detail(course_id):
         'enrollment_percentage': (course.current_enrollment / course.max_capacity * 100) if course.max_capacity > 0 else 0
     })
 
-@app.route('/api/schedule/generate', methods=['POST'])
-def generate_schedule():
-    """Generate a new schedule for a user"""
-    data = request.get_json()
-    user_id = data.get('user_id', 1)  # Default to user 1 if not specified
-    semester = data.get('semester', 'Fall')
-    year = data.get('year', 2025)
-    max_credits = data.get('max_credits', 18)
-    
-    # Get or create user
-    user = db.session.get(User, user_id)
-    if not user:
-        # Create a default user if none exists
-        user = User(
-            username='default_user',
-            email='default@example.com',
-            major='Computer Science',
-            graduation_year=2026,
-            preferences=json.dumps({
-                'completed_courses': ['CS101', 'MATH101', 'ENG101'],
-                'preferred_departments': ['CS', 'MATH'],
-                'preferred_times': ['morning', 'afternoon']
-            })
-        )
-        db.session.add(user)
-        db.session.commit()
-        user_id = user.id
-    
-    # Check if a schedule already exists for this user, semester, and year
-    existing_schedule = Schedule.query.filter_by(
-        user_id=user_id,
-        semester=semester,
-        year=year
-    ).first()
-    
-    if existing_schedule:
-        # Update existing schedule instead of creating a new one
-        # Clear existing courses by removing from the association table
-        existing_schedule.courses = []
-        existing_schedule.total_credits = 0
-        db.session.commit()
-        schedule = existing_schedule
-        action = "updated"
-    else:
-        # Create new schedule for different term
-        schedule = Schedule(
-            user_id=user_id,
-            semester=semester,
-            year=year,
-            total_credits=0
-        )
-        db.session.add(schedule)
-        db.session.commit()
-        action = "created"
-    
-    # Get available courses for the semester
-    available_courses = Course.query.filter(
-        (Course.semester == semester) | (Course.semester == 'Both')
-    ).all()
+# Generation results are memoized per process: identical inputs against the
+# same catalog version produce the same selection
+GENERATION_CACHE_SIZE = int(os.environ.get('GENERATION_CACHE_SIZE', 1024))
+GENERATION_CACHE_TTL = float(os.environ.get('GENERATION_CACHE_TTL', 600))
+
+GenerationResult = namedtuple('GenerationResult', [
+    'course_ids', 'total_credits', 'skipped', 'explanation', 'curriculum_alignment'
+])
+
+_generation_results = LRUCache(maxsize=GENERATION_CACHE_SIZE, ttl=GENERATION_CACHE_TTL)
+
+def generation_cache_key(catalog, profile, semester, year, max_credits):
+    """Hash of everything a generated selection depends on"""
+    preferences_hash = hashlib.sha1((profile.raw_preferences or '').encode('utf-8')).hexdigest()
+    key_data = [catalog.version, preferences_hash, profile.major, semester, year, max_credits]
+    return hashlib.sha1(json.dumps(key_data, default=str).encode('utf-8')).hexdigest()
+
+def cached_schedule_selection(catalog, profile, semester, year, max_credits, timer=NULL_TIMER):
+    """Select courses for a schedule, reusing the result of an identical earlier request"""
+    key = generation_cache_key(catalog, profile, semester, year, max_credits)
+    result = _generation_results.get(key)
+    timer.lap('selection_cache')
+    if result is None:
+        result = select_schedule_courses(catalog, profile, semester, max_credits, timer)
+        _generation_results.set(key, result)
+    return result
+
+def select_schedule_courses(catalog, profile, semester, max_credits, timer=NULL_TIMER):
+    """Score and pick conflict-free courses from the catalog snapshot for one user
+
+    timer (see metrics.phase_timer) gets a lap at the end of each stage.
+    """
+    # Scheduling works on the snapshot's CourseRecords rather than ORM instances
+    available_courses = catalog.records_for_semester(semester)
     
     # If no courses found for requested semester, try to find any available courses
     if not available_courses:
-        available_courses = Course.query.all()
+        available_courses = list(catalog.records)
         if available_courses:
             # Update the semester to match what's actually available
             semester = available_courses[0].semester
@@ -285,33 +282,20 @@ def generate_schedule():
     # Sort courses by credits (lower credits first to maximize course count) and then by code
     available_courses.sort(key=lambda x: (x.credits, x.code))
     
-    # Get user preferences and completed courses
-    user_preferences = {}
-    completed_courses = ['CS101', 'MATH101', 'ENG101']  # Default completed courses
-    
-    if user.preferences:
-        try:
-            user_preferences = json.loads(user.preferences)
-            # Get completed courses from preferences if available
-            if 'completed_courses' in user_preferences:
-                completed_courses = user_preferences['completed_courses']
-        except (json.JSONDecodeError, TypeError):
-            pass  # Use default if preferences are invalid
+    # Preferences and completed courses come parsed from the user's profile,
+    # projected onto the catalog as sets of course ids (see profiles.py)
+    masks = profile.masks(catalog)
+    user_preferences = profile.preferences
     
     # Filter out completed courses
-    eligible_courses = [course for course in available_courses 
-                       if course.code not in completed_courses]
+    completed_ids = masks.completed
+    eligible_courses = [course for course in available_courses if course.id not in completed_ids]
     
     # Get curriculum requirements if major is specified
     curriculum_requirements = None
-    if user.major:
-        try:
-            import requests
-            response = requests.get(f'http://localhost:5003/api/requirements/{user.major}')
-            if response.status_code == 200:
-                curriculum_requirements = response.json()
-        except:
-            pass
+    if profile.major:
+        curriculum_requirements = DEGREE_REQUIREMENTS.get(profile.major, {})
+    timer.lap('eligible')
     
     # Apply smart course selection based on preferences and curriculum
     if user_preferences or curriculum_requirements:
@@ -332,36 +316,25 @@ def generate_schedule():
                     score += 30  # Gen ed requirements
             
             # 2. Preferred Departments
-            if 'preferred_departments' in user_preferences:
-                preferred_depts = user_preferences['preferred_departments']
-                if course.department in preferred_depts:
-                    score += 20
+            if course.id in masks.preferred_departments:
+                score += 20
             
             # 3. Course Level (lower level courses first)
-            try:
-                course_number = int(''.join(filter(str.isdigit, course.code)))
-                if course_number < 300:  # Lower level courses
+            if course.level is not None:
+                if course.level < 300:  # Lower level courses
                     score += 15
-                elif course_number < 400:  # Upper level courses
+                elif course.level < 400:  # Upper level courses
                     score += 10
                 else:  # Graduate level
                     score += 5
-            except:
-                pass
             
             # 4. Time Slots Availability (high priority for courses with actual schedules)
-            if course.time_slots:
-                time_slots = safe_json_loads(course.time_slots)
-                if time_slots and len(time_slots) > 0:
+            if course.has_time_slots:
+                if course.meetings:
                     score += 25  # High priority for courses with actual time slots
                     
-                    # Additional points for preferred times
-                    if 'preferred_times' in user_preferences:
-                        preferred_times = user_preferences['preferred_times']
-                        for slot in time_slots:
-                            start_time = slot.get('start_time', '')
-                            if any(pref_time in start_time for pref_time in preferred_times):
-                                score += 10
+                    # Additional points for each meeting at a preferred time
+                    score += 10 * masks.time_matches.get(course.id, 0)
             else:
                 # Penalize courses without time slots
                 score -= 15
@@ -374,6 +347,7 @@ def generate_schedule():
     else:
         # Fallback to basic sorting
         eligible_courses.sort(key=lambda x: (x.credits, x.code))
+    timer.lap('scoring')
     
     # Filter out non-academic courses and courses with 0 credits
     academic_courses = []
@@ -398,6 +372,7 @@ def generate_schedule():
             continue
         
         academic_courses.append(course)
+    timer.lap('keyword_filter')
     
     # Select courses up to max credits, avoiding conflicts
     selected_courses = []
@@ -406,9 +381,9 @@ def generate_schedule():
     
     for course in academic_courses:
         if total_credits + course.credits <= max_credits:
-            # Check if adding this course would create conflicts
-            temp_courses = selected_courses + [course]
-            conflicts = check_schedule_conflicts(temp_courses)
+            # Check if adding this course would create conflicts; the courses
+            # already selected are conflict-free, so only pairs with it can clash
+            conflicts = find_conflicts(course, selected_courses)
             
             if not conflicts:
                 # No conflicts, safe to add
@@ -421,15 +396,7 @@ def generate_schedule():
                     'conflicts': [f"{c['course1']} vs {c['course2']}" for c in conflicts]
                 })
                 continue
-    
-    # Add courses to schedule
-    for course in selected_courses:
-        schedule.courses.append(course)
-    
-    # Update total credits
-    schedule.total_credits = total_credits
-    
-    db.session.commit()
+    timer.lap('conflicts')
     
     # Generate explanation of why courses were selected
     selection_explanation = []
@@ -445,17 +412,11 @@ def generate_schedule():
             elif course.code in curriculum_requirements.get('general_education', []):
                 reasons.append("General education requirement")
         
-        if 'preferred_departments' in user_preferences and course.department in user_preferences['preferred_departments']:
+        if course.id in masks.preferred_departments:
             reasons.append("Matches your preferred department")
         
-        if 'preferred_times' in user_preferences and course.time_slots:
-            preferred_times = user_preferences['preferred_times']
-            time_slots = safe_json_loads(course.time_slots)
-            for slot in time_slots:
-                start_time = slot.get('start_time', '')
-                if any(pref_time in start_time for pref_time in preferred_times):
-                    reasons.append("Matches your preferred time")
-                    break
+        if course.id in masks.time_matches:
+            reasons.append("Matches your preferred time")
         
         if not reasons:
             reasons.append("Fits your schedule and credit requirements")
@@ -465,59 +426,183 @@ def generate_schedule():
             'course_name': course.name,
             'reasons': reasons
         })
+    timer.lap('explanation')
+    
+    return GenerationResult(
+        course_ids=tuple(course.id for course in selected_courses),
+        total_credits=total_credits,
+        skipped=skipped_due_to_conflicts,
+        explanation=selection_explanation,
+        curriculum_alignment=curriculum_requirements is not None
+    )
+
+def sync_schedule_courses(schedule, course_ids):
+    """Make a schedule's course links match course_ids, writing only the differences"""
+    current_ids = set(db.session.execute(
+        select(ScheduleCourses.course_id).where(ScheduleCourses.schedule_id == schedule.id)
+    ).scalars())
+    wanted_ids = set(course_ids)
+
+    removed_ids = current_ids - wanted_ids
+    if removed_ids:
+        db.session.execute(delete(ScheduleCourses).where(
+            ScheduleCourses.schedule_id == schedule.id,
+            ScheduleCourses.course_id.in_(removed_ids)
+        ))
+
+    added_ids = [course_id for course_id in course_ids if course_id not in current_ids]
+    inserted_ids = []
+    if added_ids:
+        # Skip courses deleted since the catalog snapshot was taken
+        existing_ids = set(db.session.execute(select(Course.id).where(Course.id.in_(added_ids))).scalars())
+        inserted_ids = [course_id for course_id in added_ids if course_id in existing_ids]
+        if inserted_ids:
+            db.session.execute(insert(ScheduleCourses),
+                               [{'schedule_id': schedule.id, 'course_id': course_id} for course_id in inserted_ids])
+
+    record_enrollment_change(inserted_ids, removed_ids)
+    return bool(removed_ids or added_ids)
+
+@api.route('/api/schedule/generate', methods=['POST'])
+def generate_schedule():
+    """Generate a new schedule for a user"""
+    data = request.get_json()
+    user_id = data.get('user_id', 1)  # Default to user 1 if not specified
+    semester = data.get('semester', 'Fall')
+    year = data.get('year', 2025)
+    max_credits = data.get('max_credits', 18)
+    # Phase timings for sampled requests, and always when the client asks for them
+    include_timings = bool(data.get('timings')) or request.args.get('timings') in ('1', 'true')
+    timer = phase_timer('generate_schedule', force=include_timings)
     
-    return jsonify({
+    # Get or create user
+    user = db.session.get(User, user_id)
+    if not user:
+        # Create a default user if none exists
+        user = User(
+            username='default_user',
+            email='default@example.com',
+            major='Computer Science',
+            graduation_year=2026,
+            preferences=json.dumps({
+                'completed_courses': ['CS101', 'MATH101', 'ENG101'],
+                'preferred_departments': ['CS', 'MATH'],
+                'preferred_times': ['morning', 'afternoon']
+            })
+        )
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    timer.lap('user')
+    
+    # Select courses; unchanged inputs reuse the previous result
+    catalog = get_catalog_snapshot()
+    timer.lap('catalog')
+    profile = get_user_profile(user)
+    timer.lap('profile')
+    result = cached_schedule_selection(catalog, profile, semester, year, max_credits, timer)
+    
+    # Check if a schedule already exists for this user, semester, and year
+    existing_schedule = Schedule.query.filter_by(
+        user_id=user_id,
+        semester=semester,
+        year=year
+    ).first()
+    
+    if existing_schedule:
+        # Update existing schedule instead of creating a new one
+        schedule = existing_schedule
+        action = "updated"
+    else:
+        # Create new schedule for different term
+        schedule = Schedule(
+            user_id=user_id,
+            semester=semester,
+            year=year,
+            total_credits=0
+        )
+        db.session.add(schedule)
+        try:
+            db.session.flush()
+            action = "created"
+        except IntegrityError:
+            # A concurrent generate for the same term created it first;
+            # update that one instead
+            db.session.rollback()
+            schedule = Schedule.query.filter_by(user_id=user_id, semester=semester, year=year).first()
+            if schedule is None:
+                return jsonify({'error': 'Schedule was modified concurrently, please retry'}), 409
+            action = "updated"
+    timer.lap('schedule_lookup')
+    
+    try:
+        # Only rewrite the course links that changed since the last generation
+        changed = sync_schedule_courses(schedule, result.course_ids)
+        if schedule.total_credits != result.total_credits:
+            schedule.total_credits = result.total_credits
+            changed = True
+        timer.lap('links')
+        if changed or schedule.rendered_catalog_version != catalog.version:
+            render_schedule(schedule, schedule_course_ids(schedule.id), catalog)
+            timer.lap('render')
+        
+        db.session.commit()
+    except IntegrityError:
+        # Another request changed the same schedule's links concurrently
+        db.session.rollback()
+        return jsonify({'error': 'Schedule was modified concurrently, please retry'}), 409
+    if changed or action == "created":
+        invalidate_dashboard(user_id)
+    timer.lap('commit')
+    
+    body = {
         'message': f'Smart schedule {action} successfully',
         'schedule_id': schedule.id,
-        'total_credits': total_credits,
-        'courses_count': len(selected_courses),
+        'total_credits': result.total_credits,
+        'courses_count': len(result.course_ids),
         'action': action,
-        'skipped_courses': skipped_due_to_conflicts,
-        'skipped_count': len(skipped_due_to_conflicts),
-        'selection_explanation': selection_explanation,
-        'curriculum_alignment': curriculum_requirements is not None,
+        'skipped_courses': result.skipped,
+        'skipped_count': len(result.skipped),
+        'selection_explanation': result.explanation,
+        'curriculum_alignment': result.curriculum_alignment,
         'major': user.major if user.major else None
-    })
+    }
+    if not timer.enabled:
+        return jsonify(body)
+    
+    timer.record()
+    if include_timings:
+        body['timings'] = timer.as_dict()
+    response = jsonify(body)
+    response.headers['Server-Timing'] = timer.server_timing()
+    return response
 
-@app.route('/api/schedule/<int:schedule_id>', methods=['GET'])
+@api.route('/api/schedule/<int:schedule_id>', methods=['GET'])
 def get_schedule(schedule_id):
     """Get a specific schedule with courses"""
-    schedule = db.session.get(Schedule, schedule_id)
+    schedule = get_schedule_with_courses(schedule_id)
     if not schedule:
         return jsonify({'error': 'Schedule not found'}), 404
     
-    return jsonify({
-        'id': schedule.id,
-        'semester': schedule.semester,
-        'year': schedule.year,
-        'total_credits': schedule.total_credits,
-        'created_at': schedule.created_at.isoformat() if schedule.created_at else None,
-        'courses': [{
-            'id': course.id,
-            'code': course.code,
-            'name': course.name,
-            'credits': course.credits,
-            'department': course.department,
-            'description': course.description,
-            'time_slots': json.loads(course.time_slots) if course.time_slots else [],
-            'max_capacity': course.max_capacity,
-            'current_enrollment': course.current_enrollment
-        } for course in schedule.courses]
-    })
+    return jsonify(schedule_detail(schedule, schedule.courses))
 
-@app.route('/api/schedule/<int:schedule_id>', methods=['PUT', 'DELETE'])
+@api.route('/api/schedule/<int:schedule_id>', methods=['PUT', 'DELETE'])
 def update_schedule(schedule_id):
     """Update or delete an existing schedule"""
     schedule = db.session.get(Schedule, schedule_id)
     if not schedule:
         return jsonify({'error': 'Schedule not found'}), 404
+    user_id = schedule.user_id
     
     if request.method == 'DELETE':
         try:
             # Clear courses first
+            record_enrollment_change(removed_ids=schedule_course_ids(schedule_id))
             schedule.courses = []
+            db.session.execute(delete(ScheduleConflictReport).where(ScheduleConflictReport.schedule_id == schedule_id))
             db.session.delete(schedule)
             db.session.commit()
+            invalidate_dashboard(user_id)
             return jsonify({'message': 'Schedule deleted successfully'})
         except Exception as e:
             db.session.rollback()
@@ -525,7 +610,8 @@ def update_schedule(schedule_id):
     
     # PUT method - update schedule
     data = request.get_json()
-    course_ids = data.get('course_ids', [])
+    # A course can only appear once per schedule
+    course_ids = list(dict.fromkeys(data.get('course_ids', [])))
     force_update = data.get('force_update', False)
     
     # Validate course IDs
@@ -537,7 +623,7 @@ def update_schedule(schedule_id):
         courses.append(course)
     
     # Check for scheduling conflicts
-    conflicts = check_schedule_conflicts(courses)
+    conflicts = check_schedule_conflicts([CourseRecord.from_course(course) for course in courses])
     if conflicts and not force_update:
         return jsonify({
             'error': 'Schedule conflicts detected',
@@ -546,10 +632,17 @@ def update_schedule(schedule_id):
         }), 400
     
     # Update schedule
+    previous_ids = set(schedule_course_ids(schedule_id))
+    record_enrollment_change(
+        [course_id for course_id in course_ids if course_id not in previous_ids],
+        previous_ids.difference(course_ids)
+    )
     schedule.courses = courses
     schedule.total_credits = sum(course.credits for course in courses)
+    render_schedule(schedule, course_ids, get_catalog_snapshot())
     
     db.session.commit()
+    invalidate_dashboard(user_id)
     
     response_data = {
         'message': 'Schedule updated successfully',
@@ -564,86 +657,281 @@ def update_schedule(schedule_id):
     
     return jsonify(response_data)
 
-@app.route('/api/schedule/<int:schedule_id>/weekly', methods=['GET'])
-def get_weekly_schedule(schedule_id):
-    """Get weekly view of a schedule"""
+def parse_course_id_list(values):
+    """A JSON list of course ids as unique ints in order, or None if it isn't one"""
+    if values is None:
+        return []
+    if not isinstance(values, list):
+        return None
+    try:
+        return list(dict.fromkeys(int(value) for value in values))
+    except (TypeError, ValueError):
+        return None
+
+@api.route('/api/schedule/<int:schedule_id>', methods=['PATCH'])
+def edit_schedule(schedule_id):
+    """Add and/or remove courses without resending the whole schedule
+
+    Body: {"add": [course ids], "remove": [course ids], "force_update": false}.
+    Only the added courses are checked for conflicts, against the courses the
+    schedule keeps, and only the changed schedule_courses rows are written.
+    Returns the updated schedule and its weekly grid.
+    """
+    data = request.get_json(silent=True) or {}
+    add_ids = parse_course_id_list(data.get('add'))
+    remove_ids = parse_course_id_list(data.get('remove'))
+    if add_ids is None or remove_ids is None:
+        return jsonify({'error': 'add and remove must be lists of course ids'}), 400
+    if set(add_ids) & set(remove_ids):
+        return jsonify({'error': 'A course cannot be both added and removed'}), 400
+    force_update = data.get('force_update', False)
+    
     schedule = db.session.get(Schedule, schedule_id)
     if not schedule:
         return jsonify({'error': 'Schedule not found'}), 404
+    user_id = schedule.user_id
+    
+    current_ids = schedule_course_ids(schedule_id)
+    current_set = set(current_ids)
+    removed_ids = [course_id for course_id in remove_ids if course_id in current_set]
+    added_ids = [course_id for course_id in add_ids if course_id not in current_set]
+    
+    added_records = course_records_for_ids(added_ids)
+    if len(added_records) != len(added_ids):
+        found = {record.id for record in added_records}
+        missing = next(course_id for course_id in added_ids if course_id not in found)
+        return jsonify({'error': f'Course {missing} not found'}), 404
+    
+    # Validate only the change: each new course against what the schedule keeps
+    removed_set = set(removed_ids)
+    kept_ids = [course_id for course_id in current_ids if course_id not in removed_set]
+    occupied = course_records_for_ids(kept_ids)
+    conflicts = []
+    for record in added_records:
+        conflicts.extend(find_conflicts(record, occupied))
+        occupied.append(record)
+    if conflicts and not force_update:
+        return jsonify({
+            'error': 'Schedule conflicts detected',
+            'conflicts': conflicts,
+            'message': 'Use force_update=true to save despite conflicts'
+        }), 400
     
-    weekly_schedule = {
-        'Monday': [],
-        'Tuesday': [],
-        'Wednesday': [],
-        'Thursday': [],
-        'Friday': []
+    course_ids = kept_ids + added_ids
+    courses = db.session.execute(
+        select(*SCHEDULE_DETAIL_COURSE_COLUMNS).where(Course.id.in_(course_ids))
+    ).all() if course_ids else []
+    courses_by_id = {course.id: course for course in courses}
+    courses = [courses_by_id[course_id] for course_id in course_ids if course_id in courses_by_id]
+    
+    if removed_ids or added_ids:
+        try:
+            if removed_ids:
+                db.session.execute(delete(ScheduleCourses).where(
+                    ScheduleCourses.schedule_id == schedule_id,
+                    ScheduleCourses.course_id.in_(removed_ids)
+                ))
+            if added_ids:
+                db.session.execute(insert(ScheduleCourses),
+                                   [{'schedule_id': schedule_id, 'course_id': course_id} for course_id in added_ids])
+            record_enrollment_change(added_ids, removed_ids)
+            schedule.total_credits = sum(course.credits or 0 for course in courses)
+            render_schedule(schedule, course_ids, get_catalog_snapshot(),
+                            descriptions={course.id: course.description for course in courses})
+            # Build the response before commit expires the schedule's attributes
+            detail = schedule_detail(schedule, courses)
+            weekly = schedule.rendered_weekly
+            db.session.commit()
+        except IntegrityError:
+            # Another request changed the same schedule concurrently
+            db.session.rollback()
+            return jsonify({'error': 'Schedule was modified concurrently, please retry'}), 409
+        invalidate_dashboard(user_id)
+    else:
+        ensure_schedule_rendered(schedule)
+        detail = schedule_detail(schedule, courses)
+        weekly = schedule.rendered_weekly
+    
+    response_data = {
+        'message': 'Schedule updated successfully',
+        'added': added_ids,
+        'removed': removed_ids,
+        'schedule': detail,
+        'weekly': json.loads(weekly)
     }
+    if conflicts:
+        response_data['conflicts'] = conflicts
+        response_data['warning'] = 'Schedule saved with conflicts'
     
-    for course in schedule.courses:
-        if course.time_slots:
-            time_slots = json.loads(course.time_slots)
-            for slot in time_slots:
-                days_str = slot.get('day', 'Monday')
-                
-                # Handle comma-separated days (e.g., "Monday,Wednesday,Friday")
-                if ',' in days_str:
-                    days = [day.strip() for day in days_str.split(',')]
-                else:
-                    days = [days_str.strip()]
-                
-                # Add course to each day it meets
-                for day in days:
-                    if day in weekly_schedule:
-                        weekly_schedule[day].append({
-                            'course_code': course.code,
-                            'course_name': course.name,
-                            'time': f"{slot.get('start_time', '09:00')} - {slot.get('end_time', '10:30')}",
-                            'room': slot.get('room', 'TBD'),
-                            'credits': course.credits
-                        })
+    return jsonify(response_data)
+
+COMPATIBLE_DEFAULT_PER_PAGE = 25
+COMPATIBLE_MAX_PER_PAGE = 100
+DEFAULT_MAX_CREDITS = 18
+
+@api.route('/api/schedule/<int:schedule_id>/compatible-courses', methods=['GET'])
+def get_compatible_courses(schedule_id):
+    """Courses that fit a schedule without conflicts and within its remaining credits
+
+    Query parameters: page, per_page, q (matches code or name), department,
+    max_credits (default 18) and pending (comma-separated ids of courses
+    picked but not saved yet, treated as part of the schedule).
+    """
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', COMPATIBLE_DEFAULT_PER_PAGE)), 1), COMPATIBLE_MAX_PER_PAGE)
+        max_credits = int(request.args.get('max_credits', DEFAULT_MAX_CREDITS))
+        pending_ids = [int(course_id) for course_id in request.args.get('pending', '').split(',') if course_id.strip()]
+    except ValueError:
+        return jsonify({'error': 'page, per_page, max_credits and pending must be integers'}), 400
+    search = request.args.get('q', '').strip().lower()
+    department = request.args.get('department', '').strip()
     
-    # Sort courses by start time within each day
-    for day in weekly_schedule:
-        weekly_schedule[day].sort(key=lambda x: x['time'])
+    schedule = db.session.get(Schedule, schedule_id)
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+    
+    catalog = get_catalog_snapshot()
+    term = get_conflict_matrices(catalog).term(schedule.semester)
+    records = course_records_for_ids(list(dict.fromkeys(schedule_course_ids(schedule_id) + pending_ids)))
+    remaining_credits = max_credits - sum(record.credits for record in records)
     
-    return jsonify(weekly_schedule)
+    # Bitset lookup: courses clashing with none of the schedule's courses, then the credit limit
+    positions = term.compatible_positions(records)
+    positions = positions[term.credits[positions] <= remaining_credits]
+    
+    matches = [catalog.records_by_id[course_id] for course_id in term.course_ids[positions].tolist()]
+    if department:
+        matches = [record for record in matches if record.department == department]
+    if search:
+        matches = [record for record in matches if search in record.code.lower() or search in record.name.lower()]
+    
+    start = (page - 1) * per_page
+    return jsonify({
+        'schedule_id': schedule_id,
+        'semester': schedule.semester,
+        'remaining_credits': remaining_credits,
+        'total': len(matches),
+        'page': page,
+        'per_page': per_page,
+        'pages': (len(matches) + per_page - 1) // per_page,
+        'courses': [catalog.courses[catalog.index_by_id[record.id]] for record in matches[start:start + per_page]]
+    })
+
+@api.route('/api/schedule/<int:schedule_id>/weekly', methods=['GET'])
+def get_weekly_schedule(schedule_id):
+    """Get weekly view of a schedule"""
+    schedule = db.session.get(Schedule, schedule_id)
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+    
+    ensure_schedule_rendered(schedule)
+    return Response(schedule.rendered_weekly, mimetype='application/json')
 
-@app.route('/api/schedule/<int:schedule_id>/export', methods=['GET'])
+@api.route('/api/schedule/<int:schedule_id>/export', methods=['GET'])
 def export_schedule(schedule_id):
     """Export schedule as iCalendar file"""
     schedule = db.session.get(Schedule, schedule_id)
     if not schedule:
         return jsonify({'error': 'Schedule not found'}), 404
     
-    # Simple iCalendar format
-    ical_content = f"""BEGIN:VCALENDAR
-VERSION:2.0
-PRODID:-//Smart Course Scheduler//EN
-CALSCALE:GREGORIAN
-METHOD:PUBLISH
-"""
-    
-    for course in schedule.courses:
-        if course.time_slots:
-            time_slots = json.loads(course.time_slots)
-            for slot in time_slots:
-                ical_content += f"""BEGIN:VEVENT
-SUMMARY:{course.code} - {course.name}
-DESCRIPTION:{course.description or 'No description available'}
-LOCATION:{slot.get('room', 'TBD')}
-DTSTART:20250901T090000Z
-DTEND:20250901T103000Z
-END:VEVENT
-"""
-    
-    ical_content += "END:VCALENDAR"
-    
-    return ical_content, 200, {
+    ensure_schedule_rendered(schedule)
+    return schedule.rendered_ical, 200, {
         'Content-Type': 'text/calendar',
         'Content-Disposition': f'attachment; filename=schedule_{schedule_id}.ics'
     }
 
-@app.route('/api/users', methods=['POST'])
+# Bulk export formats: (mimetype, file extension)
+SCHEDULE_EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+    'zip': ('application/zip', 'zip'),
+}
+
+@api.route('/api/schedules/export', methods=['GET'])
+def export_schedules():
+    """Stream many schedules as NDJSON, CSV or a zip of iCal files
+
+    Query parameters: semester, year, user_ids (comma-separated), format
+    (ndjson, csv or zip) and compress=gzip for the NDJSON and CSV formats.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    compress = request.args.get('compress')
+    if export_format not in SCHEDULE_EXPORT_FORMATS:
+        return jsonify({'error': "format must be 'ndjson', 'csv' or 'zip'"}), 400
+    if compress not in (None, '', 'gzip') or (compress and export_format == 'zip'):
+        return jsonify({'error': "compress must be 'gzip' and only applies to ndjson and csv"}), 400
+    
+    try:
+        year = int(request.args['year']) if request.args.get('year') else None
+        user_ids = [int(user_id) for user_id in request.args.get('user_ids', '').split(',') if user_id.strip()]
+    except ValueError:
+        return jsonify({'error': 'year and user_ids must be integers'}), 400
+    
+    filters = {'semester': request.args.get('semester') or None, 'year': year, 'user_ids': user_ids or None}
+    
+    if export_format == 'zip':
+        chunks = iter_zip(filters)
+    elif export_format == 'csv':
+        chunks = iter_csv(schedule_query(**filters))
+    else:
+        chunks = iter_ndjson(schedule_query(**filters))
+    
+    mimetype, extension = SCHEDULE_EXPORT_FORMATS[export_format]
+    filename = f'schedules_export.{extension}'
+    if compress:
+        chunks = gzip_stream(chunks)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Accel-Buffering': 'no'
+    })
+
+AUDIT_REPORT_DEFAULT_LIMIT = 50
+
+@api.route('/api/schedules/audit', methods=['GET', 'POST'])
+def schedule_audit():
+    """Start a conflict audit of all stored schedules (POST) or get the latest results (GET)"""
+    if request.method == 'POST':
+        if not start_audit_job(current_app._get_current_object()):
+            return jsonify({'error': 'An audit is already running', 'job': audit_job_status()}), 409
+        return jsonify({'message': 'Schedule conflict audit started', 'job': audit_job_status()}), 202
+    
+    try:
+        limit = min(max(int(request.args.get('limit', AUDIT_REPORT_DEFAULT_LIMIT)), 0), 1000)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    totals = db.session.execute(select(
+        func.count(ScheduleConflictReport.id),
+        func.count(ScheduleConflictReport.id).filter(ScheduleConflictReport.conflict_count > 0),
+        func.max(ScheduleConflictReport.audited_at),
+        func.max(ScheduleConflictReport.catalog_version)
+    )).one()
+    conflicting = db.session.execute(
+        select(ScheduleConflictReport)
+        .where(ScheduleConflictReport.conflict_count > 0)
+        .order_by(ScheduleConflictReport.schedule_id)
+        .limit(limit)
+    ).scalars().all()
+    
+    return jsonify({
+        'job': audit_job_status(),
+        'schedules_audited': totals[0],
+        'schedules_with_conflicts': totals[1],
+        'last_audited_at': totals[2].isoformat() if totals[2] else None,
+        'catalog_version': totals[3],
+        'conflicting_schedules': [{
+            'schedule_id': report.schedule_id,
+            'user_id': report.user_id,
+            'conflict_count': report.conflict_count,
+            'conflicts': json.loads(report.conflicts) if report.conflicts else []
+        } for report in conflicting]
+    })
+
+@api.route('/api/users', methods=['POST'])
 def create_user():
     """Create a new user"""
     data = request.get_json()
@@ -665,14 +953,14 @@ def create_user():
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
-@app.route('/api/users/<int:user_id>/schedules', methods=['GET'])
+@api.route('/api/users/<int:user_id>/schedules', methods=['GET'])
 def get_user_schedules(user_id):
     """Get all schedules for a specific user"""
     user = db.session.get(User, user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    schedules = Schedule.query.filter_by(user_id=user_id).order_by(Schedule.created_at.desc()).all()
+    schedules = get_schedules_for_user(user_id)
     
     return jsonify([{
         'id': schedule.id,
@@ -689,7 +977,17 @@ def get_user_schedules(user_id):
         } for course in schedule.courses]
     } for schedule in schedules])
 
-@app.route('/api/users/<int:user_id>', methods=['GET'])
+@api.route('/api/users/<int:user_id>/dashboard', methods=['GET'])
+def get_user_dashboard(user_id):
+    """User profile, schedules with full course details and credit summaries in one response"""
+    user = db.session.get(User, user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    payload = get_dashboard_payload(user, get_user_profile(user).preferences, get_catalog_snapshot().version)
+    return Response(payload, mimetype='application/json')
+
+@api.route('/api/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     """Get user profile"""
     user = db.session.get(User, user_id)
@@ -702,10 +1000,10 @@ def get_user(user_id):
         'email': user.email,
         'major': user.major,
         'graduation_year': user.graduation_year,
-        'preferences': json.loads(user.preferences) if user.preferences else {}
+        'preferences': get_user_profile(user).preferences
     })
 
-@app.route('/api/users/<int:user_id>', methods=['PUT'])
+@api.route('/api/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
     """Update user profile"""
     user = db.session.get(User, user_id)
@@ -728,6 +1026,8 @@ def update_user(user_id):
             user.preferences = json.dumps(data['preferences'])
         
         db.session.commit()
+        invalidate_user_profile(user.id)
+        invalidate_dashboard(user.id)
         
         return jsonify({
             'id': user.id,
@@ -735,13 +1035,13 @@ def update_user(user_id):
             'email': user.email,
             'major': user.major,
             'graduation_year': user.graduation_year,
-            'preferences': json.loads(user.preferences) if user.preferences else {}
+            'preferences': get_user_profile(user).preferences
         })
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
-@app.route('/api/users/<int:user_id>/preferences', methods=['GET', 'PUT'])
+@api.route('/api/users/<int:user_id>/preferences', methods=['GET', 'PUT'])
 def user_preferences(user_id):
     """Get or update user preferences"""
     user = db.session.get(User, user_id)
@@ -749,18 +1049,12 @@ def user_preferences(user_id):
         return jsonify({'error': 'User not found'}), 404
     
     if request.method == 'GET':
-        preferences = json.loads(user.preferences) if user.preferences else {}
+        preferences = get_user_profile(user).preferences
         
         # Get curriculum requirements if major is specified
         curriculum_requirements = None
         if user.major:
-            try:
-                import requests
-                response = requests.get(f'http://localhost:5003/api/requirements/{user.major}')
-                if response.status_code == 200:
-                    curriculum_requirements = response.json()
-            except:
-                pass
+            curriculum_requirements = DEGREE_REQUIREMENTS.get(user.major, {})
         
         return jsonify({
             'user_id': user_id,
@@ -780,81 +1074,87 @@ def user_preferences(user_id):
         # Update preferences
         user.preferences = json.dumps(data['preferences'])
         db.session.commit()
+        invalidate_user_profile(user_id)
+        invalidate_dashboard(user_id)
         
         return jsonify({
             'message': 'Preferences updated successfully',
-            'preferences': json.loads(user.preferences) if user.preferences else {}
+            'preferences': get_user_profile(user).preferences
         })
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
-@app.route('/api/requirements/<major>', methods=['GET'])
-def get_degree_requirements(major):
-    """Get degree requirements for a major"""
-    # Illinois curriculum requirements
-    requirements = {
-        'Computer Science': {
-            'total_credits': 128,
-            'core_courses': ['CS100', 'CS101', 'CS125', 'CS173', 'CS225', 'CS233', 'CS241', 'CS357', 'CS361', 'CS421', 'CS427'],
-            'math_requirements': ['MATH220', 'MATH231', 'MATH241', 'MATH285', 'MATH347', 'MATH415'],
-            'science_requirements': ['PHYS211', 'PHYS212', 'CHEM102', 'CHEM103'],
-            'general_education': ['RHET105', 'COMPOSITION', 'HUMANITIES', 'SOCIAL_SCIENCE', 'CULTURAL_STUDIES'],
-            'electives': 15,
-            'semester_breakdown': {
-                'freshman_fall': ['CS100', 'MATH220', 'RHET105'],
-                'freshman_spring': ['CS125', 'MATH231', 'PHYS211'],
-                'sophomore_fall': ['CS173', 'CS225', 'MATH241', 'PHYS212'],
-                'sophomore_spring': ['CS233', 'MATH285', 'CHEM102'],
-                'junior_fall': ['CS241', 'CS357', 'MATH347'],
-                'junior_spring': ['CS361', 'MATH415', 'CHEM103'],
-                'senior_fall': ['CS421', 'CS427'],
-                'senior_spring': ['ELECTIVES']
-            }
-        },
-        'Mathematics': {
-            'total_credits': 120,
-            'core_courses': ['MATH220', 'MATH231', 'MATH241', 'MATH347', 'MATH416', 'MATH417', 'MATH418', 'MATH419'],
-            'computer_science': ['CS101', 'CS125'],
-            'general_education': ['RHET105', 'COMPOSITION', 'HUMANITIES', 'SOCIAL_SCIENCE'],
-            'electives': 20,
-            'semester_breakdown': {
-                'freshman_fall': ['MATH220', 'RHET105'],
-                'freshman_spring': ['MATH231', 'CS101'],
-                'sophomore_fall': ['MATH241', 'MATH347'],
-                'sophomore_spring': ['MATH416', 'CS125'],
-                'junior_fall': ['MATH417', 'MATH418'],
-                'junior_spring': ['MATH419'],
-                'senior_fall': ['ELECTIVES'],
-                'senior_spring': ['ELECTIVES']
-            }
-        },
-        'Engineering': {
-            'total_credits': 130,
-            'core_courses': ['ENG100', 'ENG101', 'ENG110', 'ENG177', 'ENG198', 'ENG199'],
-            'math_requirements': ['MATH220', 'MATH231', 'MATH241', 'MATH285', 'MATH415'],
-            'science_requirements': ['PHYS211', 'PHYS212', 'CHEM102', 'CHEM103'],
-            'general_education': ['RHET105', 'COMPOSITION', 'HUMANITIES', 'SOCIAL_SCIENCE'],
-            'electives': 12,
-            'semester_breakdown': {
-                'freshman_fall': ['ENG100', 'MATH220', 'RHET105'],
-                'freshman_spring': ['ENG101', 'MATH231', 'PHYS211'],
-                'sophomore_fall': ['ENG110', 'MATH241', 'PHYS212'],
-                'sophomore_spring': ['ENG177', 'MATH285', 'CHEM102'],
-                'junior_fall': ['ENG198', 'MATH415', 'CHEM103'],
-                'junior_spring': ['ENG199'],
-                'senior_fall': ['ELECTIVES'],
-                'senior_spring': ['ELECTIVES']
-            }
+# Illinois curriculum requirements, looked up in-process by the scheduling
+# endpoints and served as-is by /api/requirements/<major>
+DEGREE_REQUIREMENTS = {
+    'Computer Science': {
+        'total_credits': 128,
+        'core_courses': ['CS100', 'CS101', 'CS125', 'CS173', 'CS225', 'CS233', 'CS241', 'CS357', 'CS361', 'CS421', 'CS427'],
+        'math_requirements': ['MATH220', 'MATH231', 'MATH241', 'MATH285', 'MATH347', 'MATH415'],
+        'science_requirements': ['PHYS211', 'PHYS212', 'CHEM102', 'CHEM103'],
+        'general_education': ['RHET105', 'COMPOSITION', 'HUMANITIES', 'SOCIAL_SCIENCE', 'CULTURAL_STUDIES'],
+        'electives': 15,
+        'semester_breakdown': {
+            'freshman_fall': ['CS100', 'MATH220', 'RHET105'],
+            'freshman_spring': ['CS125', 'MATH231', 'PHYS211'],
+            'sophomore_fall': ['CS173', 'CS225', 'MATH241', 'PHYS212'],
+            'sophomore_spring': ['CS233', 'MATH285', 'CHEM102'],
+            'junior_fall': ['CS241', 'CS357', 'MATH347'],
+            'junior_spring': ['CS361', 'MATH415', 'CHEM103'],
+            'senior_fall': ['CS421', 'CS427'],
+            'senior_spring': ['ELECTIVES']
+        }
+    },
+    'Mathematics': {
+        'total_credits': 120,
+        'core_courses': ['MATH220', 'MATH231', 'MATH241', 'MATH347', 'MATH416', 'MATH417', 'MATH418', 'MATH419'],
+        'computer_science': ['CS101', 'CS125'],
+        'general_education': ['RHET105', 'COMPOSITION', 'HUMANITIES', 'SOCIAL_SCIENCE'],
+        'electives': 20,
+        'semester_breakdown': {
+            'freshman_fall': ['MATH220', 'RHET105'],
+            'freshman_spring': ['MATH231', 'CS101'],
+            'sophomore_fall': ['MATH241', 'MATH347'],
+            'sophomore_spring': ['MATH416', 'CS125'],
+            'junior_fall': ['MATH417', 'MATH418'],
+            'junior_spring': ['MATH419'],
+            'senior_fall': ['ELECTIVES'],
+            'senior_spring': ['ELECTIVES']
+        }
+    },
+    'Engineering': {
+        'total_credits': 130,
+        'core_courses': ['ENG100', 'ENG101', 'ENG110', 'ENG177', 'ENG198', 'ENG199'],
+        'math_requirements': ['MATH220', 'MATH231', 'MATH241', 'MATH285', 'MATH415'],
+        'science_requirements': ['PHYS211', 'PHYS212', 'CHEM102', 'CHEM103'],
+        'general_education': ['RHET105', 'COMPOSITION', 'HUMANITIES', 'SOCIAL_SCIENCE'],
+        'electives': 12,
+        'semester_breakdown': {
+            'freshman_fall': ['ENG100', 'MATH220', 'RHET105'],
+            'freshman_spring': ['ENG101', 'MATH231', 'PHYS211'],
+            'sophomore_fall': ['ENG110', 'MATH241', 'PHYS212'],
+            'sophomore_spring': ['ENG177', 'MATH285', 'CHEM102'],
+            'junior_fall': ['ENG198', 'MATH415', 'CHEM103'],
+            'junior_spring': ['ENG199'],
+            'senior_fall': ['ELECTIVES'],
+            'senior_spring': ['ELECTIVES']
         }
     }
-    
-    return jsonify(requirements.get(major, {}))
+}
+
+@api.route('/api/requirements/<major>', methods=['GET'])
+def get_degree_requirements(major):
+    """Get degree requirements for a major"""
+    return jsonify(DEGREE_REQUIREMENTS.get(major, {}))
 
 # Initialize database and load sample data
-def init_db():
+def init_db(app):
+    from migrations import apply_migrations
+    
     with app.app_context():
         db.create_all()
+        apply_migrations(db.engine)
         
         # Load sample courses if database is empty
         if Course.query.count() == 0:
@@ -862,52 +1162,53 @@ def init_db():
                 Course(code='CS101', name='Introduction to Computer Science', credits=3, 
                        department='Computer Science', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Monday', 'start_time': '09:00', 'end_time': '10:30', 'room': 'CS101'}]),
-                       max_capacity=30, current_enrollment=25),
+                       max_capacity=30),
                 Course(code='CS201', name='Data Structures and Algorithms', credits=4, 
                        department='Computer Science', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Tuesday', 'start_time': '11:00', 'end_time': '12:30', 'room': 'CS201'}]),
-                       max_capacity=25, current_enrollment=20),
+                       max_capacity=25),
                 Course(code='MATH101', name='Calculus I', credits=4, 
                        department='Mathematics', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Wednesday', 'start_time': '14:00', 'end_time': '15:30', 'room': 'MATH101'}]),
-                       max_capacity=35, current_enrollment=30),
+                       max_capacity=35),
                 Course(code='MATH201', name='Calculus II', credits=4, 
                        department='Mathematics', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Thursday', 'start_time': '09:00', 'end_time': '10:30', 'room': 'MATH201'}]),
-                       max_capacity=30, current_enrollment=25),
+                       max_capacity=30),
                 Course(code='ENG101', name='English Composition', credits=3, 
                        department='English', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Friday', 'start_time': '11:00', 'end_time': '12:30', 'room': 'ENG101'}]),
-                       max_capacity=25, current_enrollment=20),
+                       max_capacity=25),
                 Course(code='PHYS101', name='Physics I', credits=4, 
                        department='Physics', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Monday', 'start_time': '14:00', 'end_time': '15:30', 'room': 'PHYS101'}]),
-                       max_capacity=30, current_enrollment=25),
+                       max_capacity=30),
                 Course(code='HIST101', name='World History', credits=3, 
                        department='History', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Tuesday', 'start_time': '16:00', 'end_time': '17:30', 'room': 'HIST101'}]),
-                       max_capacity=40, current_enrollment=35),
+                       max_capacity=40),
                 Course(code='CHEM101', name='General Chemistry', credits=4, 
                        department='Chemistry', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Wednesday', 'start_time': '09:00', 'end_time': '10:30', 'room': 'CHEM101'}]),
-                       max_capacity=35, current_enrollment=30),
+                       max_capacity=35),
                 Course(code='BIO101', name='Introduction to Biology', credits=4, 
                        department='Biology', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Thursday', 'start_time': '14:00', 'end_time': '15:30', 'room': 'BIO101'}]),
-                       max_capacity=40, current_enrollment=35),
+                       max_capacity=40),
                 Course(code='PSYCH101', name='Introduction to Psychology', credits=3, 
                        department='Psychology', semester='Fall', year=2025,
                        time_slots=json.dumps([{'day': 'Friday', 'start_time': '14:00', 'end_time': '15:30', 'room': 'PSYCH101'}]),
-                       max_capacity=50, current_enrollment=45)
+                       max_capacity=50)
             ]
             
             for course in sample_courses:
                 db.session.add(course)
             
+            bump_catalog_version()
             db.session.commit()
 
 # Course Dataset Import Endpoints
-@app.route('/api/courses/import', methods=['POST'])
+@api.route('/api/courses/import', methods=['POST'])
 def import_courses():
     """Import courses from CSV or JSON dataset"""
     try:
@@ -952,30 +1253,36 @@ def import_courses():
                     existing_course.year = course_data.get('year', existing_course.year)
                     existing_course.time_slots = course_data.get('time_slots', existing_course.time_slots)
                     existing_course.max_capacity = course_data.get('max_capacity', existing_course.max_capacity)
-                    existing_course.current_enrollment = course_data.get('current_enrollment', existing_course.current_enrollment)
+                    # current_enrollment is a live counter maintained by schedule writes (see enrollment.py)
                     updated_count += 1
                 else:
-                    # Create new course
-                    new_course = Course(**course_data)
+                    # Create new course; enrollment starts at zero, whatever
+                    # the file says, since no schedule includes it yet
+                    new_course = Course(**course_data, current_enrollment=0)
                     db.session.add(new_course)
                     imported_count += 1
                 
             except Exception as e:
                 errors.append(f"Error processing course {course_data.get('code', 'Unknown')}: {str(e)}")
         
+        bump_catalog_version()
         db.session.commit()
         
+        # Updated courses may have new time slots under existing schedules
+        audit_started = updated_count > 0 and start_audit_job(current_app._get_current_object())
+        
         return jsonify({
             'message': 'Course import completed',
             'imported': imported_count,
             'updated': updated_count,
-            'errors': errors
+            'errors': errors,
+            'audit_started': audit_started
         })
         
     except Exception as e:
         return jsonify({'error': f'Import failed: {str(e)}'}), 500
 
-@app.route('/api/courses/export', methods=['GET'])
+@api.route('/api/courses/export', methods=['GET'])
 def export_courses():
     """Export all courses to CSV"""
     try:
@@ -1018,12 +1325,13 @@ def export_courses():
     except Exception as e:
         return jsonify({'error': f'Export failed: {str(e)}'}), 500
 
-@app.route('/api/courses/clear', methods=['DELETE'])
+@api.route('/api/courses/clear', methods=['DELETE'])
 def clear_courses():
     """Clear all courses from database"""
     try:
         # Delete all courses
         Course.query.delete()
+        bump_catalog_version()
         db.session.commit()
         
         return jsonify({'message': 'All courses cleared successfully'})
@@ -1107,8 +1415,7 @@ def parse_csv_courses(file):
                     'semester': 'Both',
                     'year': 2025,
                     'time_slots': time_slots_json,
-                    'max_capacity': 0,
-                    'current_enrollment': 0
+                    'max_capacity': 0
                 }
                 
                 # Validate required fields - be more lenient
@@ -1129,8 +1436,7 @@ def parse_csv_courses(file):
                     'semester': row.get('semester', 'Both').strip(),
                     'year': int(row.get('year', 2025)) if row.get('year') else 2025,
                     'time_slots': row.get('time_slots', ''),
-                    'max_capacity': int(row.get('max_capacity', 0)) if row.get('max_capacity') else 0,
-                    'current_enrollment': int(row.get('current_enrollment', 0)) if row.get('current_enrollment') else 0
+                    'max_capacity': int(row.get('max_capacity', 0)) if row.get('max_capacity') else 0
                 }
                 
                 # Validate required fields
@@ -1165,8 +1471,7 @@ def parse_json_courses(file):
                     'semester': item.get('semester', 'Both').strip(),
                     'year': int(item.get('year', 2025)) if item.get('year') else 2025,
                     'time_slots': item.get('time_slots', ''),
-                    'max_capacity': int(item.get('max_capacity', 0)) if item.get('max_capacity') else 0,
-                    'current_enrollment': int(item.get('current_enrollment', 0)) if item.get('current_enrollment') else 0
+                    'max_capacity': int(item.get('max_capacity', 0)) if item.get('max_capacity') else 0
                 }
                 
                 # Validate required fields
@@ -1181,11 +1486,26 @@ def parse_json_courses(file):
         print(f"Error parsing JSON: {e}")
         return []
 
-@app.route('/api/courses/scrape', methods=['POST'])
-def scrape_courses_from_url():
+async def enhance_with_schedule(client, catalog_url, course):
+    """Merge time slots and description from the course's schedule page, if one can be found"""
+    try:
+        # Try to construct schedule URL for this course
+        schedule_url = await construct_schedule_url(client, catalog_url, course['code'])
+        if schedule_url:
+            print(f"Trying to get schedule for {course['code']} from {schedule_url}")
+            schedule_course = await scrape_schedule_page(client, schedule_url)
+            if schedule_course and schedule_course[0].get('time_slots'):
+                # Merge schedule info with catalog info
+                course['time_slots'] = schedule_course[0]['time_slots']
+                course['description'] = schedule_course[0].get('description', course['description'])
+                print(f"Successfully enhanced {course['code']} with schedule info")
+    except Exception as e:
+        print(f"Error enhancing course {course['code']}: {e}")
+    return course
+
+@api.route('/api/courses/scrape', methods=['POST'])
+async def scrape_courses_from_url():
     """Scrape course information from a university website URL"""
-    import re
-    
     try:
         data = request.get_json()
         url = data.get('url')
@@ -1206,41 +1526,22 @@ def scrape_courses_from_url():
         if not url.startswith(('http://', 'https://')):
             return jsonify({'error': 'Please enter a valid URL starting with http:// or https://'}), 400
         
-        # Check if this is a schedule page (contains specific course)
-        # Look for URL patterns that indicate a specific course schedule
-        if ('schedule' in url.lower() and 
-            any(term in url.lower() for term in ['/cs/', '/cse/', '/math/', '/engr/', '/ansc/', '/phys/', '/chem/', '/biol/']) and
-            re.search(r'/\d{3,4}$', url)):  # Ends with course number
-            # This is a schedule page, try to extract detailed course info
-            courses = scrape_schedule_page(url)
-        else:
-            # This is a catalog page, extract course listings
-            courses = scrape_catalog_page(url)
-            
-            # If enhanced scraping is requested, try to get schedule info for each course
-            if enhanced and courses:
-                print(f"Enhanced scraping: Attempting to get schedule info for {len(courses)} courses")
-                enhanced_courses = []
-                for course in courses[:10]:  # Limit to 10 courses to avoid too many requests
-                    try:
-                        # Try to construct schedule URL for this course
-                        schedule_url = construct_schedule_url(url, course['code'])
-                        if schedule_url:
-                            print(f"Trying to get schedule for {course['code']} from {schedule_url}")
-                            schedule_course = scrape_schedule_page(schedule_url)
-                            if schedule_course and schedule_course[0].get('time_slots'):
-                                # Merge schedule info with catalog info
-                                course['time_slots'] = schedule_course[0]['time_slots']
-                                course['description'] = schedule_course[0].get('description', course['description'])
-                                print(f"Successfully enhanced {course['code']} with schedule info")
-                            enhanced_courses.append(course)
-                        else:
-                            enhanced_courses.append(course)
-                    except Exception as e:
-                        print(f"Error enhancing course {course['code']}: {e}")
-                        enhanced_courses.append(course)
+        async with http_client() as client:
+            if is_schedule_page_url(url):
+                # This is a schedule page, try to extract detailed course info
+                courses = await scrape_schedule_page(client, url)
+            else:
+                # This is a catalog page, extract course listings
+                courses = await scrape_catalog_page(client, url)
                 
-                courses = enhanced_courses
+                # If enhanced scraping is requested, try to get schedule info for each course
+                if enhanced and courses:
+                    print(f"Enhanced scraping: Attempting to get schedule info for {len(courses)} courses")
+                    # Limit to 10 courses to avoid too many requests; look them up concurrently
+                    enhanced_courses = await asyncio.gather(
+                        *(enhance_with_schedule(client, url, course) for course in courses[:10])
+                    )
+                    courses = list(enhanced_courses)
         
         if not courses:
             return jsonify({
@@ -1263,592 +1564,194 @@ def scrape_courses_from_url():
             'total_found': len(courses)
         })
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return jsonify({'error': f'Failed to fetch URL: {str(e)}'}), 400
+    except ScrapeQueueFull as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
     except Exception as e:
         return jsonify({'error': f'Scraping failed: {str(e)}'}), 500
 
-def construct_schedule_url(catalog_url, course_code):
-    """Try to construct a schedule URL for a course based on the catalog URL"""
+# Crawl limits - keep a single request from tying up the server indefinitely.
+# Fetches are async, so "workers" is the number of pages in flight, not threads.
+CRAWL_DEFAULT_WORKERS = 8
+CRAWL_MAX_WORKERS = 64
+CRAWL_MAX_URLS = 200
+CRAWL_DEFAULT_BATCH_SIZE = 50
+SCRAPED_UPDATE_FIELDS = ('name', 'description', 'credits', 'department', 'prerequisites', 'time_slots')
+
+async def read_sitemap(sitemap_url):
+    """Fetch the page URLs listed in a sitemap"""
+    async with http_client() as client:
+        return await fetch_sitemap_urls(client, sitemap_url)
+
+@api.route('/api/courses/crawl', methods=['POST'])
+def crawl_courses():
+    """Crawl several catalog pages concurrently and stream courses as they are found"""
+    data = request.get_json() or {}
+    urls = data.get('urls') or []
+    if isinstance(urls, str):
+        urls = [urls]
+    sitemap = data.get('sitemap')
+    stream_format = data.get('format', 'ndjson')
+    upsert = data.get('upsert', False)
+
     try:
-        # Extract department from course code
-        dept = course_code[:3].upper()
-        
-        # Try different URL patterns for Illinois courses
-        base_urls = [
-            f"https://courses.illinois.edu/schedule/2025/fall/{dept}/{course_code[3:]}",
-            f"https://courses.illinois.edu/schedule/2025/spring/{dept}/{course_code[3:]}",
-            f"https://courses.illinois.edu/schedule/2024/fall/{dept}/{course_code[3:]}",
-            f"https://courses.illinois.edu/schedule/2024/spring/{dept}/{course_code[3:]}"
-        ]
-        
-        # Test which URL works
-        for url in base_urls:
-            try:
-                response = requests.head(url, timeout=5)
-                if response.status_code == 200:
-                    return url
-            except:
-                continue
-        
-        return None
-    except:
-        return None
+        workers = min(max(int(data.get('workers', CRAWL_DEFAULT_WORKERS)), 1), CRAWL_MAX_WORKERS)
+        batch_size = max(int(data.get('batch_size', CRAWL_DEFAULT_BATCH_SIZE)), 1)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'workers and batch_size must be integers'}), 400
 
-def scrape_catalog_page(url):
-    """Scrape course catalog pages"""
-    from bs4 import BeautifulSoup
-    import re
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    response = requests.get(url, headers=headers, timeout=10)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    courses = []
-    seen_codes = set()
-    
-    # Look for course listings in various formats
-    course_selectors = [
-        'table tr',  # Table rows
-        '.course', '.course-item', '.course-listing',  # Common CSS classes
-        '[class*="course"]',  # Classes containing "course"
-        'li',  # List items
-        '.program-course', '.degree-course',  # Program-specific classes
-        'table tbody tr',  # More specific table rows
-        '[class*="schedule"]',  # Schedule-related classes
-        '[class*="section"]'  # Section-related classes
-    ]
-    
-    for selector in course_selectors:
-        elements = soup.select(selector)
-        if elements:
-            for element in elements[:100]:
-                course_info = extract_course_info(element)
-                if course_info and course_info.get('code') and course_info['code'] not in seen_codes:
-                    courses.append(course_info)
-                    seen_codes.add(course_info['code'])
-    
-    # If no courses found with specific selectors, try general text parsing
-    if not courses:
-        courses = extract_courses_from_text(soup.get_text())
-        unique_courses = []
+    if stream_format not in ('ndjson', 'sse'):
+        return jsonify({'error': "format must be 'ndjson' or 'sse'"}), 400
+
+    if sitemap:
+        if not sitemap.startswith(('http://', 'https://')):
+            return jsonify({'error': 'Please enter a valid sitemap URL starting with http:// or https://'}), 400
+        try:
+            urls = list(urls) + asyncio.run(read_sitemap(sitemap))
+        except httpx.HTTPError as e:
+            return jsonify({'error': f'Failed to fetch sitemap: {str(e)}'}), 400
+        except Exception as e:
+            return jsonify({'error': f'Failed to parse sitemap: {str(e)}'}), 400
+
+    # Drop duplicate and invalid seed URLs, preserving order
+    seed_urls = []
+    for url in urls:
+        if isinstance(url, str) and url.startswith(('http://', 'https://')) and url not in seed_urls:
+            seed_urls.append(url)
+
+    if not seed_urls:
+        return jsonify({'error': 'At least one valid URL or a sitemap is required'}), 400
+
+    if len(seed_urls) > CRAWL_MAX_URLS:
+        return jsonify({'error': f'Too many URLs to crawl (maximum is {CRAWL_MAX_URLS})'}), 400
+
+    def format_event(event_type, payload):
+        if stream_format == 'sse':
+            return f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({'type': event_type, **payload}) + '\n'
+
+    def generate():
         seen_codes = set()
-        for course in courses:
-            if course['code'] not in seen_codes:
-                unique_courses.append(course)
-                seen_codes.add(course['code'])
-        courses = unique_courses
-    
-    return courses
+        pending = []
+        pages_done = 0
+        pages_failed = 0
+        imported_count = 0
+        updated_count = 0
+        failed_batches = 0
+        failed_courses = 0
 
-def scrape_schedule_page(url):
-    """Scrape individual course schedule pages"""
-    from bs4 import BeautifulSoup
-    import re
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    response = requests.get(url, headers=headers, timeout=10)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    # Extract course code from URL
-    url_parts = url.split('/')
-    course_code = None
-    for part in url_parts:
-        if any(dept in part.upper() for dept in ['CS', 'CSE', 'MATH', 'ENG', 'PHYS', 'ANSC', 'CHEM', 'BIOL']):
-            # Find the next part which should be the course number
+        def save_batch(batch):
+            """Upsert one batch, reporting a failed write as an error event instead of dropping it silently"""
+            nonlocal imported_count, updated_count, failed_batches, failed_courses
             try:
-                idx = url_parts.index(part)
-                if idx + 1 < len(url_parts):
-                    course_code = f"{part.upper()}{url_parts[idx + 1]}"
-                    print(f"Debug: Found course code: {course_code}")
-                    break
-            except:
-                pass
-    
-    if not course_code:
-        return []
-    
-    # Extract course information from the page
-    text = soup.get_text()
-    
-    # Look for course name - try multiple approaches
-    name = None
-    
-    # First, try to find the main course title
-    title_elem = soup.find('h1')
-    if title_elem:
-        title_text = title_elem.get_text().strip()
-        if course_code in title_text:
-            # Extract the part after the course code
-            name_match = re.search(rf'{course_code}\s*([A-Z][a-z\s&]+)', title_text)
-            if name_match:
-                name = name_match.group(1).strip()
-    
-    # If no name found, try other patterns
-    if not name:
-        name_patterns = [
-            rf'{course_code}\s*([A-Z][a-z\s&]+)',
-            r'#\s*([A-Z][a-z\s&]+)',
-            r'([A-Z][a-z\s&]+)\s*Course',
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, text)
-            if match:
-                name = match.group(1).strip()
-                break
-    
-    # If still no name, try to find it in the page content
-    if not name:
-        # Look for text that might be a course name
-        lines = text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if (len(line) > 10 and len(line) < 100 and
-                course_code in line and
-                any(word in line.lower() for word in ['intro', 'survey', 'course', 'programming', 'analysis', 'sciences'])):
-                # Extract the part after the course code
-                name_match = re.search(rf'{course_code}\s*([A-Z][a-z\s&]+)', line)
-                if name_match:
-                    name = name_match.group(1).strip()
-                    break
-    
-    if not name:
-        name = f"{course_code} Course"
-    
-    # Extract credits
-    credits = 3
-    credit_patterns = [
-        r'(\d+)\s*OR\s*(\d+)\s*hours?',
-        r'(\d+)\s*to\s*(\d+)\s*hours?',
-        r'(\d+)\s*hours?',
-    ]
-    
-    for pattern in credit_patterns:
-        match = re.search(pattern, text.lower())
-        if match:
-            if 'OR' in pattern or 'to' in pattern:
-                credits = max(int(match.group(1)), int(match.group(2)))
-            else:
-                credits = int(match.group(1))
-            break
-    
-    # Extract time slots from the page
-    time_slots = []
-    
-    # First try to extract from JavaScript data (more reliable)
-    script_tags = soup.find_all('script')
-    for script in script_tags:
-        if script.string and 'sectionDataObj' in script.string:
-            # Extract the JavaScript object
-            script_text = script.string
-            match = re.search(r'var sectionDataObj = (\[.*?\]);', script_text, re.DOTALL)
-            if match:
-                try:
-                    import json
-                    # Clean up the JavaScript to make it valid JSON
-                    json_str = match.group(1)
-                    # Remove HTML tags and clean up
-                    json_str = re.sub(r'<[^>]+>', '', json_str)
-                    json_str = json_str.replace('\\/', '/')
-                    
-                    sections = json.loads(json_str)
-                    
-                    for section in sections:
-                        if section.get('time') and section.get('day') and section.get('location'):
-                            time_text = section['time']
-                            day_text = section['day']
-                            location_text = section['location']
-                            
-                            # Extract time
-                            time_match = re.search(r'(\d{1,2}:\d{2}\s*(?:AM|PM))\s*-\s*(\d{1,2}:\d{2}\s*(?:AM|PM))', time_text)
-                            if time_match:
-                                start_time = time_match.group(1)
-                                end_time = time_match.group(2)
-                                
-                                # Convert day abbreviations
-                                day_mapping = {
-                                    'M': 'Monday', 'T': 'Tuesday', 'W': 'Wednesday', 
-                                    'Th': 'Thursday', 'F': 'Friday', 'S': 'Saturday', 'Su': 'Sunday',
-                                    'TR': 'Tuesday,Thursday', 'MW': 'Monday,Wednesday'
-                                }
-                                
-                                day = day_mapping.get(day_text.strip(), day_text.strip())
-                                
-                                # Clean location
-                                room = re.sub(r'<[^>]+>', '', location_text).strip()
-                                
-                                time_slots.append({
-                                    'day': day,
-                                    'start_time': start_time,
-                                    'end_time': end_time,
-                                    'room': room
-                                })
-                except Exception as e:
-                    print(f"Error parsing JavaScript data: {e}")
-                    pass
-    
-    # Fallback: Look for time patterns in tables
-    if not time_slots:
-        tables = soup.find_all('table')
-        for table in tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 4:  # Need at least Time, Day, Location columns
-                    row_text = ' '.join([cell.get_text().strip() for cell in cells])
-                    
-                    # Look for time patterns
-                    time_match = re.search(r'(\d{1,2}:\d{2}\s*(?:AM|PM))\s*-\s*(\d{1,2}:\d{2}\s*(?:AM|PM))', row_text)
-                    if time_match:
-                        start_time = time_match.group(1)
-                        end_time = time_match.group(2)
-                        
-                        # Look for day and room in the same row
-                        day = 'Monday'
-                        room = 'TBD'
-                        
-                        for cell in cells:
-                            cell_text = cell.get_text().strip()
-                            # Check for days
-                            if any(day_name in cell_text for day_name in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']):
-                                day = cell_text
-                            # Check for room patterns
-                            elif re.search(r'[A-Z]{2,4}\s*\d{3,4}|[A-Z][a-z]+\s+(?:Hall|Building|Laboratory|Center)', cell_text):
-                                room = cell_text
-                        
-                        time_slots.append({
-                            'day': day,
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'room': room
-                        })
-    
-    # Try to extract course description
-    description = ''
-    
-    # Look for description in various places
-    desc_selectors = ['p', '.description', '.course-desc', '.summary']
-    for selector in desc_selectors:
-        desc_elem = soup.select_one(selector)
-        if desc_elem:
-            desc_text = desc_elem.get_text().strip()
-            if (len(desc_text) > 20 and 
-                course_code not in desc_text and
-                'university' not in desc_text.lower() and
-                'illinois' not in desc_text.lower() and
-                'login' not in desc_text.lower()):  # Avoid page headers
-                description = desc_text
-                break
-    
-    # If no description found, try to extract from text around course info
-    if not description:
-        # Look for text that might be a course description
-        lines = text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if (len(line) > 30 and 
-                course_code not in line and 
-                'credit' not in line.lower() and
-                'hour' not in line.lower()):
-                description = line
-                break
-    
-    # Convert time slots to JSON string
-    time_slots_json = json.dumps(time_slots) if time_slots else ''
-    
-    return [{
-        'code': course_code,
-        'name': name,
-        'description': description,
-        'credits': credits,
-        'department': course_code[:3],
-        'prerequisites': '',
-        'semester': 'Both',
-        'year': 2025,
-        'time_slots': time_slots_json,
-        'max_capacity': 0,
-        'current_enrollment': 0
-    }]
-
-def extract_course_info(element):
-    """Extract course information from a DOM element"""
-    try:
-        # Try to find course code (usually starts with letters like CS, MATH, etc.)
-        code = None
-        text = element.get_text()
-        
-        # Look for course code patterns
-        import re
-        code_patterns = [
-            r'\b([A-Z]{2,4}\s*\d{3,4}[A-Z]?)\b',  # CS 101, MATH 201A
-            r'\b([A-Z]{2,4}-\d{3,4})\b',  # CS-101, MATH-201
-            r'\b([A-Z]{2,4}\d{3,4})\b',   # CS101, MATH201
-        ]
-        
-        for pattern in code_patterns:
-            match = re.search(pattern, text)
-            if match:
-                # Clean up the code: remove spaces, dashes, and non-breaking spaces
-                code = match.group(1).replace(' ', '').replace('-', '').replace('\u00a0', '').strip()
-                break
-        
-        if not code:
-            return None
-        
-        # Try to find course name
-        name = None
-        name_selectors = ['h3', 'h4', '.course-name', '.course-title', 'strong', 'b', '.title', 'h5']
-        for selector in name_selectors:
-            name_elem = element.select_one(selector)
-            if name_elem:
-                name = name_elem.get_text().strip()
-                if name and len(name) > 3:  # Ensure name is meaningful
-                    break
-        
-        if not name:
-            # Try to extract name from text around the code
-            code_index = text.find(code)
-            if code_index != -1:
-                # Look for text after the code
-                after_code = text[code_index + len(code):].strip()
-                if after_code:
-                    # Take first line or first 100 characters, but skip if it's just punctuation
-                    potential_name = after_code.split('\n')[0][:100].strip()
-                    if potential_name and not potential_name.startswith((':', '-', '(', '[')):
-                        # Clean up the name: remove extra whitespace and common artifacts
-                        name = potential_name.replace('\u00a0', ' ').replace('\u2002', ' ').strip()
-                        # If name is too short or just punctuation, try to find better text
-                        if len(name) < 5 or name.startswith(('credit', 'Hour', 'Hours')):
-                            # Look for text before the code
-                            before_code = text[max(0, code_index - 200):code_index].strip()
-                            if before_code:
-                                lines = before_code.split('\n')
-                                for line in reversed(lines):
-                                    line = line.strip()
-                                    if line and len(line) > 5 and not line.startswith(('credit', 'Hour', 'Hours')):
-                                        name = line.replace('\u00a0', ' ').replace('\u2002', ' ').strip()
-                                        break
-                
-                        # If still no good name, try to extract from the full text more intelligently
-        if not name or len(name) < 5:
-            # Look for text that contains the course code and looks like a course name
-            lines = text.split('\n')
-            for line in lines:
-                line = line.strip()
-                if code in line and len(line) > len(code) + 10:
-                    # This line contains the code and has substantial additional text
-                    # Extract the part after the code
-                    code_pos = line.find(code)
-                    after_code_text = line[code_pos + len(code):].strip()
-                    if after_code_text and len(after_code_text) > 5:
-                        # Clean up the potential name
-                        name = after_code_text.replace('\u00a0', ' ').replace('\u2002', ' ').strip()
-                        # Remove common artifacts
-                        if name.startswith((':', '-', '(', '[')):
-                            name = name[1:].strip()
-                        if name.endswith((':', '-', ')', ']')):
-                            name = name[:-1].strip()
-                        if len(name) > 5:
-                            break
-            
-            # If still no name, try to find any meaningful text in the element
-            if not name or len(name) < 5:
-                # Look for any text that might be a course name
-                all_text = element.get_text()
-                lines = all_text.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    # Skip if line is too short, contains the code, or is just punctuation
-                    if (len(line) > 10 and 
-                        code not in line and 
-                        not line.startswith(('credit', 'Hour', 'Hours', '(', '[', '{')) and
-                        not line.endswith((')', ']', '}', ':', '-'))):
-                        # This might be a course name
-                        name = line.replace('\u00a0', ' ').replace('\u2002', ' ').strip()
-                        if len(name) > 5:
-                            break
-        
-        # Try to find credits
-        credits = 3  # Default
-        credit_patterns = [
-            r'(\d+)\s*credit',
-            r'(\d+)\s*cr',
-            r'(\d+)\s*unit',
-            r'credit:\s*(\d+)\s*Hour',  # Illinois format: "credit: 1 Hour"
-            r'credit:\s*(\d+)\s*Hours',  # Illinois format: "credit: 3 Hours"
-            r'(\d+)\s*OR\s*(\d+)\s*hours?',  # Illinois format: "3 OR 4 hours"
-            r'(\d+)\s*to\s*(\d+)\s*hours?'   # Range format: "3 to 4 hours"
-        ]
-        
-        for pattern in credit_patterns:
-            match = re.search(pattern, text.lower())
-            if match:
-                if 'OR' in pattern or 'to' in pattern:
-                    # For ranges, take the higher number
-                    credits = max(int(match.group(1)), int(match.group(2)))
-                else:
-                    credits = int(match.group(1))
-                break
-        
-        # Try to find department
-        department = code[:2] if len(code) >= 2 else 'Unknown'
-        
-        # Try to find description
-        description = ''
-        desc_selectors = ['.description', '.course-desc', 'p', '.summary']
-        for selector in desc_selectors:
-            desc_elem = element.select_one(selector)
-            if desc_elem:
-                description = desc_elem.get_text().strip()
-                break
-        
-        # Try to extract time slots, days, and room information
-        time_slots = []
-        
-        # Look for time patterns in the text
-        time_patterns = [
-            r'(\d{1,2}:\d{2}\s*(?:AM|PM))\s*-\s*(\d{1,2}:\d{2}\s*(?:AM|PM))',  # 9:00 AM - 10:30 AM
-            r'(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})',  # 9:00 - 10:30
-        ]
-        
-        # Look for day patterns
-        day_patterns = [
-            r'\b(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Mon|Tue|Wed|Thu|Fri|Sat|Sun)\b',
-            r'\b(M|T|W|Th|F|S|Su)\b'
-        ]
-        
-        # Look for room/location patterns
-        room_patterns = [
-            r'([A-Z]{2,4}\s*\d{3,4})',  # Building codes like "DCL 1302"
-            r'([A-Z][a-z]+\s+(?:Hall|Building|Laboratory|Center|Room))',  # "Digital Computer Laboratory"
-            r'([A-Z][a-z]+\s+[A-Z][a-z]+)',  # "Siebel Center"
-        ]
-        
-        # Extract time information
-        for pattern in time_patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                start_time = match.group(1)
-                end_time = match.group(2)
-                
-                # Find associated day and room
-                day = 'Monday'  # Default
-                room = 'TBD'
-                
-                # Look for day in nearby text
-                for day_pattern in day_patterns:
-                    day_match = re.search(day_pattern, text[max(0, match.start()-100):match.end()+100])
-                    if day_match:
-                        day = day_match.group(1)
-                        break
-                
-                # Look for room in nearby text
-                for room_pattern in room_patterns:
-                    room_match = re.search(room_pattern, text[max(0, match.start()-100):match.end()+100])
-                    if room_match:
-                        room = room_match.group(1)
-                        break
-                
-                time_slots.append({
-                    'day': day,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'room': room
+                imported, updated = upsert_course_batch(batch)
+            except Exception as e:
+                failed_batches += 1
+                failed_courses += len(batch)
+                print(f"Error saving {len(batch)} crawled courses: {e}")
+                yield format_event('error', {
+                    'error': f'Failed to save {len(batch)} courses: {str(e)}',
+                    'courses': [course['code'] for course in batch]
                 })
-        
-        # Convert time slots to JSON string for storage
-        time_slots_json = json.dumps(time_slots) if time_slots else ''
-        
-        # Ensure we have a meaningful name
-        if not name or len(name) < 5 or name.lower() in ['courses', 'course']:
-            # Try to create a better fallback name
-            if description and len(description) > 10:
-                # Use first part of description as name
-                desc_lines = description.split('\n')
-                for line in desc_lines:
-                    line = line.strip()
-                    if line and len(line) > 10 and not line.startswith(('credit', 'Hour', 'Hours')):
-                        name = line[:100].replace('\u00a0', ' ').replace('\u2002', ' ').strip()
-                        break
-            
-            # If still no good name, use a generic but informative one
-            if not name or len(name) < 5:
-                name = f'{code} Course'
-        
-        return {
-            'code': code,
-            'name': name,
-            'description': description,
-            'credits': credits,
-            'department': department,
-            'prerequisites': '',
-            'semester': 'Both',
-            'year': 2025,
-            'time_slots': time_slots_json,
-            'max_capacity': 0,
-            'current_enrollment': 0
-        }
-        
-    except Exception as e:
-        print(f"Error extracting course info: {e}")
-        return None
+                return
+            imported_count += imported
+            updated_count += updated
 
-def extract_courses_from_text(text):
-    """Extract course information from plain text"""
-    courses = []
-    
-    # Look for course patterns in text
-    import re
-    code_patterns = [
-        r'\b([A-Z]{2,4}\s*\d{3,4}[A-Z]?)\b',  # CS 101, MATH 201A
-        r'\b([A-Z]{2,4}-\d{3,4})\b',  # CS-101, MATH-201
-        r'\b([A-Z]{2,4}\d{3,4})\b',   # CS101, MATH201
-    ]
-    
-    for pattern in code_patterns:
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            # Clean up the code: remove spaces, dashes, and non-breaking spaces
-            code = match.group(1).replace(' ', '').replace('-', '').replace('\u00a0', '').strip()
-            
-            # Look for text around the code
-            start = max(0, match.start() - 200)
-            end = min(len(text), match.end() + 200)
-            context = text[start:end]
-            
-            # Try to extract name from context
-            name = f'{code} Course'
-            lines = context.split('\n')
-            for line in lines:
-                if code in line and len(line.strip()) > len(code) + 5:
-                    name = line.strip()
-                    break
-            
-            courses.append({
-                'code': code,
-                'name': name,
-                'description': '',
-                'credits': 3,
-                'department': code[:2] if len(code) >= 2 else 'Unknown',
-                'prerequisites': '',
-                'semester': 'Both',
-                'year': 2025,
-                'time_slots': '',
-                'max_capacity': 0,
-                'current_enrollment': 0
+        print(f"Starting crawl of {len(seed_urls)} URLs with {workers} workers (upsert: {upsert})")
+
+        # The crawl runs on its own event loop; the loop only advances while
+        # this generator waits for the next finished page
+        for url, courses, error in iterate_async(crawl_pages(seed_urls, workers)):
+            if error is not None:
+                pages_failed += 1
+                yield format_event('error', {'url': url, 'error': str(error)})
+                continue
+
+            pages_done += 1
+            new_count = 0
+            for course in courses:
+                # The same course is often listed on several department pages
+                if course['code'] in seen_codes:
+                    continue
+                seen_codes.add(course['code'])
+                new_count += 1
+                yield format_event('course', {'course': course, 'url': url})
+
+                if upsert:
+                    pending.append(course)
+                    if len(pending) >= batch_size:
+                        yield from save_batch(pending)
+                        pending = []
+
+            yield format_event('page', {
+                'url': url,
+                'found': len(courses),
+                'new': new_count,
+                'pages_done': pages_done + pages_failed,
+                'pages_total': len(seed_urls)
             })
+
+        if upsert and pending:
+            yield from save_batch(pending)
+
+        # Updated courses may have new time slots under existing schedules
+        audit_started = updated_count > 0 and start_audit_job(current_app._get_current_object())
+
+        print(f"Crawl finished: {len(seen_codes)} unique courses from {pages_done} pages")
+
+        yield format_event('done', {
+            'total_found': len(seen_codes),
+            'pages_crawled': pages_done,
+            'pages_failed': pages_failed,
+            'imported': imported_count,
+            'updated': updated_count,
+            'failed_batches': failed_batches,
+            'failed_courses': failed_courses,
+            'audit_started': audit_started
+        })
+
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def upsert_course_batch(course_batch):
+    """Insert or update a batch of scraped courses, returning (imported, updated) counts
     
-    return courses
+    A failed write is rolled back and re-raised for the caller to report.
+    """
+    codes = [course['code'] for course in course_batch]
+    existing = {course.code: course for course in Course.query.filter(Course.code.in_(codes)).all()}
+
+    imported_count = 0
+    updated_count = 0
+    try:
+        for course_data in course_batch:
+            existing_course = existing.get(course_data['code'])
+            if existing_course:
+                # Scraped pages carry placeholder capacity/term values, so
+                # only refresh the fields the scraper actually extracts
+                for field in SCRAPED_UPDATE_FIELDS:
+                    if course_data.get(field):
+                        setattr(existing_course, field, course_data[field])
+                updated_count += 1
+            else:
+                fields = {key: value for key, value in course_data.items() if key != 'current_enrollment'}
+                db.session.add(Course(**fields, current_enrollment=0))
+                imported_count += 1
+
+        bump_catalog_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return imported_count, updated_count
 
 if __name__ == '__main__':
-    init_db()
+    # Development server only; see wsgi.py and gunicorn.conf.py for production
+    app = create_app()
+    init_db(app)
     app.run(debug=True, host='0.0.0.0', port=5003) 
\ No newline at end of file
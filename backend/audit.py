@@ -0,0 +1,316 @@
+"""
+Conflict audit of every stored schedule against the current catalog.
+
+Catalog imports can change time slots under existing schedules without
+anyone noticing. The audit walks all schedules in id order, batch by batch,
+and checks each one against the term conflict matrices (conflict_matrix.py):
+for every schedule the bits of all its course pairs are gathered in one
+NumPy indexing operation per schedule size. Batches are checked on a
+process pool and the result for each schedule is written to
+schedule_conflict_report, replacing the previous audit.
+
+The loader scripts run it after a sync that changes time slots, and
+import_courses starts it through POST /api/schedules/audit. Run it by hand
+after any other change to course times:
+
+    python audit.py [--batch-size 2000] [--workers 4]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+from catalog import get_catalog_snapshot
+from conflict_matrix import get_conflict_matrices
+from course_records import find_conflicts
+from models import db, Schedule, ScheduleConflictReport, ScheduleCourses
+
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 2000))
+AUDIT_WORKERS = int(os.environ.get('AUDIT_WORKERS', os.cpu_count() or 1))
+
+# Term conflict rows in pool workers, set once by the pool initializer
+_worker_rows = None
+
+def _init_worker(rows_by_semester):
+    global _worker_rows
+    _worker_rows = rows_by_semester
+
+def conflicting_pairs(rows, offsets, positions):
+    """Clashing course pairs of many schedules of one term
+
+    Schedule k's courses are positions[offsets[k]:offsets[k + 1]] (indexes into
+    the term matrix, in schedule order). Returns arrays (schedule, first,
+    second) with one entry per clashing pair.
+    """
+    sizes = np.diff(offsets)
+    found = []
+    for size in np.unique(sizes[sizes >= 2]):
+        schedules = np.flatnonzero(sizes == size)
+        # One row of course positions per schedule of this size
+        courses = positions[offsets[schedules][:, None] + np.arange(size)]
+        first_index, second_index = np.triu_indices(size, 1)
+        first, second = courses[:, first_index], courses[:, second_index]
+        bits = (rows[first, second >> 3] >> (7 - (second & 7))) & 1
+        hit_rows, hit_pairs = np.nonzero(bits)
+        found.append((schedules[hit_rows], first[hit_rows, hit_pairs], second[hit_rows, hit_pairs]))
+
+    if not found:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    return tuple(np.concatenate(parts) for parts in zip(*found))
+
+def _pool_conflicting_pairs(semester, offsets, positions):
+    return conflicting_pairs(_worker_rows[semester], offsets, positions)
+
+def iter_schedule_batches(batch_size=AUDIT_BATCH_SIZE):
+    """Yield lists of (schedule_id, user_id, semester, course_ids), keyset-paginated by id"""
+    last_id = 0
+    while True:
+        schedules = db.session.execute(
+            select(Schedule.id, Schedule.user_id, Schedule.semester)
+            .where(Schedule.id > last_id).order_by(Schedule.id).limit(batch_size)
+        ).all()
+        if not schedules:
+            return
+
+        course_ids = {schedule.id: [] for schedule in schedules}
+        for schedule_id, course_id in db.session.execute(
+            select(ScheduleCourses.schedule_id, ScheduleCourses.course_id)
+            .where(ScheduleCourses.schedule_id.between(schedules[0].id, schedules[-1].id))
+            .order_by(ScheduleCourses.schedule_id, ScheduleCourses.id)
+        ):
+            if schedule_id in course_ids:
+                course_ids[schedule_id].append(course_id)
+
+        yield [(schedule.id, schedule.user_id, schedule.semester, course_ids[schedule.id]) for schedule in schedules]
+        last_id = schedules[-1].id
+
+class _Batch:
+    """One batch of schedules split by term into matrix positions"""
+
+    def __init__(self, schedules, matrices, snapshot):
+        self.schedules = schedules
+        self.records = []        # schedule index -> CourseRecords still in the catalog
+        self.by_term = {}        # semester -> (schedule indexes, offsets, positions)
+        self.off_term = {}       # schedule index -> records not offered in its term
+
+        grouped = {}
+        for index, (_, _, semester, course_ids) in enumerate(schedules):
+            records = [snapshot.records_by_id[course_id] for course_id in course_ids
+                       if course_id in snapshot.records_by_id]
+            self.records.append(records)
+            term = matrices.term(semester)
+            positions = [term.index_by_id[record.id] for record in records if record.id in term.index_by_id]
+            if len(positions) != len(records):
+                self.off_term[index] = [record for record in records if record.id not in term.index_by_id]
+            grouped.setdefault(semester, ([], []))
+            grouped[semester][0].append(index)
+            grouped[semester][1].append(positions)
+
+        for semester, (indexes, position_lists) in grouped.items():
+            offsets = np.zeros(len(position_lists) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(positions) for positions in position_lists])
+            positions = np.fromiter((p for positions in position_lists for p in positions),
+                                    dtype=np.int64, count=int(offsets[-1]))
+            self.by_term[semester] = (indexes, offsets, positions)
+
+    def reports(self, pairs_by_term, matrices, catalog_version, audited_at):
+        """Report rows for the batch given each term's clashing pairs"""
+        clashes = {}
+        for semester, (schedules, first, second) in pairs_by_term.items():
+            indexes = self.by_term[semester][0]
+            term = matrices.term(semester)
+            for schedule, a, b in zip(schedules.tolist(), first.tolist(), second.tolist()):
+                clashes.setdefault(indexes[schedule], []).append(
+                    (int(term.course_ids[a]), int(term.course_ids[b])))
+
+        rows = []
+        for index, (schedule_id, user_id, _, _) in enumerate(self.schedules):
+            records = self.records[index]
+            by_id = {record.id: record for record in records}
+            conflicts = []
+            # Detailed entries are only built for the pairs the matrix flagged
+            for first_id, second_id in clashes.get(index, ()):
+                conflicts.extend(find_conflicts(by_id[second_id], [by_id[first_id]]))
+            # Courses outside the schedule's term aren't in its matrix; check
+            # them directly, each pair of two such courses only once
+            off_term = self.off_term.get(index, ())
+            for number, record in enumerate(off_term):
+                others = [other for other in records if other not in off_term] + list(off_term[:number])
+                conflicts.extend(find_conflicts(record, others))
+
+            rows.append({
+                'schedule_id': schedule_id,
+                'user_id': user_id,
+                'catalog_version': catalog_version,
+                'conflict_count': len(conflicts),
+                'conflicts': json.dumps(conflicts) if conflicts else None,
+                'audited_at': audited_at
+            })
+        return rows
+
+def _write_reports(rows):
+    schedule_ids = [row['schedule_id'] for row in rows]
+    db.session.execute(delete(ScheduleConflictReport).where(ScheduleConflictReport.schedule_id.in_(schedule_ids)))
+    db.session.execute(insert(ScheduleConflictReport), rows)
+    db.session.commit()
+
+def audit_schedules(batch_size=AUDIT_BATCH_SIZE, workers=AUDIT_WORKERS, progress=None):
+    """Re-check every stored schedule for conflicts and rewrite the conflict reports
+
+    Requires an app context. With workers > 1 the matrix checks run on a
+    process pool while the next batch is read and reports are written.
+    Returns a summary dict.
+    """
+    started = time.perf_counter()
+    snapshot = get_catalog_snapshot()
+    matrices = get_conflict_matrices(snapshot)
+    audited_at = datetime.utcnow()
+
+    executor = None
+    if workers > 1:
+        # 'spawn' keeps children from inheriting the server's threads and
+        # database connections; they only need the term bitset rows
+        rows_by_semester = {semester: term.rows for semester, term in matrices.terms.items()}
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(rows_by_semester,))
+
+    def check(batch):
+        pairs = {}
+        for semester, (_, offsets, positions) in batch.by_term.items():
+            if executor is not None and semester in matrices.terms:
+                pairs[semester] = executor.submit(_pool_conflicting_pairs, semester, offsets, positions)
+            else:
+                pairs[semester] = conflicting_pairs(matrices.term(semester).rows, offsets, positions)
+        return pairs
+
+    def finish(batch, pairs):
+        pairs = {semester: result.result() if isinstance(result, Future) else result
+                 for semester, result in pairs.items()}
+        rows = batch.reports(pairs, matrices, snapshot.version, audited_at)
+        _write_reports(rows)
+        return sum(1 for row in rows if row['conflict_count'])
+
+    audited = conflicting = 0
+    pending = deque()
+    try:
+        for schedules in iter_schedule_batches(batch_size):
+            batch = _Batch(schedules, matrices, snapshot)
+            pending.append((batch, check(batch)))
+            # Keep a couple of batches in flight per worker
+            while len(pending) > max(workers, 1) * 2:
+                batch, pairs = pending.popleft()
+                conflicting += finish(batch, pairs)
+                audited += len(batch.schedules)
+                if progress:
+                    progress(audited, conflicting)
+        while pending:
+            batch, pairs = pending.popleft()
+            conflicting += finish(batch, pairs)
+            audited += len(batch.schedules)
+            if progress:
+                progress(audited, conflicting)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    # Reports of schedules deleted since the last audit
+    db.session.execute(delete(ScheduleConflictReport).where(
+        ScheduleConflictReport.schedule_id.not_in(select(Schedule.id))
+    ))
+    db.session.commit()
+
+    return {
+        'schedules_audited': audited,
+        'schedules_with_conflicts': conflicting,
+        'catalog_version': snapshot.version,
+        'audited_at': audited_at.isoformat(),
+        'duration_seconds': round(time.perf_counter() - started, 2)
+    }
+
+# Background runs started from the API; one at a time per process
+_job = {'status': 'idle'}
+_job_lock = threading.Lock()
+
+def audit_job_status():
+    with _job_lock:
+        return dict(_job)
+
+def start_audit_job(app, **options):
+    """Run audit_schedules on a background thread; returns False if one is already running"""
+    with _job_lock:
+        if _job.get('status') == 'running':
+            return False
+        _job.clear()
+        _job.update(status='running', started_at=datetime.utcnow().isoformat(), schedules_audited=0)
+
+    def progress(audited, conflicting):
+        with _job_lock:
+            _job.update(schedules_audited=audited, schedules_with_conflicts=conflicting)
+
+    def run():
+        with app.app_context():
+            try:
+                summary = audit_schedules(progress=progress, **options)
+                with _job_lock:
+                    _job.update(status='finished', **summary)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Schedule conflict audit failed: {e}")
+                with _job_lock:
+                    _job.update(status='failed', error=str(e))
+
+    threading.Thread(target=run, name='schedule-audit', daemon=True).start()
+    return True
+
+def print_audit_summary(summary):
+    print(f"Audited {summary['schedules_audited']} schedules in {summary['duration_seconds']}s: "
+          f"{summary['schedules_with_conflicts']} with conflicts (catalog v{summary['catalog_version']})")
+
+def audit_after_sync(report, dry_run=False, skip=False):
+    """Audit stored schedules after a loader sync that changed course time slots
+
+    Called by the loader scripts inside their app context; with skip (or on
+    a dry run) it only prints a reminder.
+    """
+    changed = report['time_slots_changed'] if report else []
+    if not changed or dry_run:
+        return None
+    if skip:
+        print(f"{len(changed)} courses changed time slots; run `python audit.py` to re-check stored schedules")
+        return None
+
+    print(f"{len(changed)} courses changed time slots; auditing stored schedules for conflicts...")
+    summary = audit_schedules()
+    print_audit_summary(summary)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit all stored schedules for time conflicts')
+    parser.add_argument('--batch-size', type=int, default=AUDIT_BATCH_SIZE,
+                        help='Schedules read and checked per batch')
+    parser.add_argument('--workers', type=int, default=AUDIT_WORKERS,
+                        help='Worker processes for the matrix checks (1 checks inline)')
+    args = parser.parse_args()
+
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        print_audit_summary(audit_schedules(
+            batch_size=args.batch_size, workers=args.workers,
+            progress=lambda audited, conflicting: print(f"  {audited} schedules audited, {conflicting} with conflicts")
+        ))
+
+if __name__ == '__main__':
+    main()
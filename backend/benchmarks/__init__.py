@@ -0,0 +1,8 @@
+"""
+Reproducible benchmarks on synthetic catalogs.
+
+synthetic.py generates a seeded catalog (1k to 100k course sections) and
+users; cases.py seeds a throwaway SQLite database per catalog size and
+times the hot paths against it. Results are written as JSON so runs can be
+compared (see __main__.py for the command line).
+"""
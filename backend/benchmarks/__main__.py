@@ -0,0 +1,103 @@
+"""
+Run the benchmark suite from the backend directory:
+
+    python -m benchmarks                                   # 1k and 10k courses
+    python -m benchmarks --sizes 1000,10000,100000 --repeat 10
+    python -m benchmarks --only generate_schedule,get_courses --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.cases import CASES, BenchEnvironment
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """Print each benchmark's median against the same benchmark in an earlier results file"""
+    with open(baseline_path) as file:
+        baseline = {(result['benchmark'], result['catalog_size']): result for result in json.load(file)['results']}
+
+    print(f"\nCompared with {baseline_path} (median per operation):")
+    for result in results:
+        before = baseline.get((result['benchmark'], result['catalog_size']))
+        if not before or not before['per_operation_ms']:
+            continue
+        ratio = result['per_operation_ms'] / before['per_operation_ms']
+        print(f"  {result['benchmark']:<34} {str(result['catalog_size']):>7}  "
+              f"{before['per_operation_ms']:>10.4f}ms -> {result['per_operation_ms']:>10.4f}ms  ({ratio:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scheduler on synthetic catalogs')
+    parser.add_argument('--sizes', default='1000,10000',
+                        help='Comma-separated catalog sizes (courses), e.g. 1000,10000,100000')
+    parser.add_argument('--users', type=int, default=200, help='Synthetic users per catalog')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the catalog and user generator')
+    parser.add_argument('--only', help=f"Comma-separated subset of: {', '.join(CASES)}")
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    names = args.only.split(',') if args.only else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    directory = tempfile.mkdtemp(prefix='scheduler_bench_')
+    results = []
+    try:
+        for number, size in enumerate(sizes):
+            print(f"Seeding {size} courses and {args.users} users...")
+            env = BenchEnvironment(directory, size, args.users, seed=args.seed)
+            try:
+                for name in names:
+                    case, per_catalog = CASES[name]
+                    if not per_catalog and number:
+                        continue
+                    for result in case(env, args.repeat):
+                        results.append(result)
+                        print(f"  {result['benchmark']:<34} {str(result['catalog_size']):>7}  "
+                              f"median {result['median_ms']:>10.3f}ms  "
+                              f"({result['per_operation_ms']:.4f}ms/op x {result['operations_per_run']})")
+            finally:
+                env.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat(),
+            'git_commit': git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'sizes': sizes,
+            'users': args.users,
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Benchmark cases and the timing harness.
+
+Each case takes a BenchEnvironment (an app with its own SQLite database
+seeded with a synthetic catalog and users) and returns result dicts. Runs
+are timed with perf_counter after one untimed warm-up run; a run may cover
+several operations (requests or calls), reported per operation as well.
+"""
+
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy import delete
+
+import app as app_module
+import catalog
+import dashboard
+import profiles
+from app import DEGREE_REQUIREMENTS, create_app
+from course_records import check_schedule_conflicts
+from migrations import apply_migrations
+from models import db, Course
+from scraper import extract_courses_from_text, parse_catalog_html, parse_schedule_html
+
+from benchmarks.synthetic import generate_catalog, generate_users, seed_database
+
+class BenchEnvironment:
+    """A scheduler app on a fresh SQLite database holding a synthetic catalog"""
+
+    def __init__(self, directory, course_count, user_count, seed=0):
+        self.directory = directory
+        self.course_count = course_count
+        self.seed = seed
+        self.courses = generate_catalog(course_count, seed)
+        self.users = generate_users(user_count, self.courses, list(DEGREE_REQUIREMENTS), seed)
+        self.app = create_app({'SQLALCHEMY_DATABASE_URI': self.database_url('catalog')})
+        self.client = self.app.test_client()
+        self._context = self.app.app_context()
+        self._context.push()
+        db.create_all()
+        apply_migrations(db.engine)
+        self.user_ids = seed_database(self.courses, self.users, seed=seed)
+        self.reset_caches()
+
+    def database_url(self, name):
+        return f"sqlite:///{os.path.join(self.directory, f'{name}_{self.course_count}.db')}"
+
+    def reset_caches(self):
+        """Drop per-process caches so nothing leaks in from another environment or case"""
+        # The module caches are keyed by catalog version, which restarts at 1
+        # in every benchmark database
+        app_module._generation_results.clear()
+        profiles._profiles.clear()
+        dashboard._dashboards.clear()
+        catalog.load_catalog_snapshot()
+
+    def close(self):
+        db.session.remove()
+        db.engine.dispose()
+        self._context.pop()
+
+def time_runs(run, repeat, setup=None):
+    """Durations in seconds of repeat calls of run(), after one warm-up call"""
+    durations = []
+    for number in range(repeat + 1):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        if number:
+            durations.append(elapsed)
+    return durations
+
+def summarize(name, catalog_size, durations, operations=1):
+    """Result record for one benchmark; times in milliseconds"""
+    ordered = sorted(durations)
+    median = statistics.median(ordered)
+    return {
+        'benchmark': name,
+        'catalog_size': catalog_size,
+        'runs': len(ordered),
+        'operations_per_run': operations,
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(median * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'per_operation_ms': round(median / operations * 1000, 4),
+        'operations_per_second': round(operations / median, 1) if median else None
+    }
+
+def _check(response, name):
+    if response.status_code != 200:
+        raise RuntimeError(f'{name} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+    return response
+
+def bench_import_courses(env, repeat):
+    """POST /api/courses/import of the whole catalog as JSON into an empty course table"""
+    scratch = create_app({'SQLALCHEMY_DATABASE_URI': env.database_url('import')})
+    client = scratch.test_client()
+    payload = json.dumps(env.courses).encode('utf-8')
+    with scratch.app_context():
+        db.create_all()
+
+    def clear():
+        with scratch.app_context():
+            db.session.execute(delete(Course))
+            db.session.commit()
+
+    def run():
+        response = _check(client.post('/api/courses/import', data={'file': (io.BytesIO(payload), 'courses.json')},
+                                      content_type='multipart/form-data'), 'import_courses')
+        if response.json['imported'] != len(env.courses):
+            raise RuntimeError(f"import_courses imported {response.json['imported']} of {len(env.courses)} courses")
+
+    # Large imports take a while per run
+    durations = time_runs(run, max(1, min(repeat, 3)), setup=clear)
+    with scratch.app_context():
+        db.engine.dispose()
+    env.reset_caches()
+    return [summarize('import_courses', env.course_count, durations, len(env.courses))]
+
+def bench_get_courses(env, repeat, requests=20):
+    """GET /api/courses from the cached snapshot, and after a snapshot rebuild"""
+    env.reset_caches()
+    warm = time_runs(lambda: [_check(env.client.get('/api/courses'), 'get_courses') for _ in range(requests)], repeat)
+
+    def cold():
+        catalog.load_catalog_snapshot()
+        _check(env.client.get('/api/courses'), 'get_courses')
+
+    return [summarize('get_courses', env.course_count, warm, requests),
+            summarize('get_courses_cold', env.course_count, time_runs(cold, repeat))]
+
+def bench_generate_schedule(env, repeat, users=20):
+    """POST /api/schedule/generate for several users, with and without cached selections"""
+    user_ids = env.user_ids[:users]
+
+    def run():
+        for user_id in user_ids:
+            _check(env.client.post('/api/schedule/generate',
+                                   json={'user_id': user_id, 'semester': 'Fall', 'year': 2025, 'max_credits': 18}),
+                   'generate_schedule')
+
+    def forget_selections():
+        app_module._generation_results.clear()
+        profiles._profiles.clear()
+
+    env.reset_caches()
+    cold = time_runs(run, repeat, setup=forget_selections)
+    warm = time_runs(run, repeat)
+    return [summarize('generate_schedule', env.course_count, cold, len(user_ids)),
+            summarize('generate_schedule_cached', env.course_count, warm, len(user_ids))]
+
+def bench_check_schedule_conflicts(env, repeat, schedules=1000, size=6):
+    """check_schedule_conflicts over random same-term schedules of snapshot records"""
+    snapshot = catalog.get_catalog_snapshot()
+    rng = random.Random(env.seed)
+    pools = [snapshot.records_for_semester(semester) for semester in ('Fall', 'Spring')]
+    samples = [rng.sample(pool, min(len(pool), size)) for pool in (rng.choice(pools) for _ in range(schedules))]
+
+    durations = time_runs(lambda: [check_schedule_conflicts(records) for records in samples], repeat)
+    return [summarize('check_schedule_conflicts', env.course_count, durations, schedules)]
+
+def bench_get_user_schedules(env, repeat, users=50):
+    """GET /api/users/<id>/schedules for users with four schedules each"""
+    user_ids = env.user_ids[:users]
+    durations = time_runs(
+        lambda: [_check(env.client.get(f'/api/users/{user_id}/schedules'), 'get_user_schedules')
+                 for user_id in user_ids],
+        repeat
+    )
+    return [summarize('get_user_schedules', env.course_count, durations, len(user_ids))]
+
+def catalog_page_html(courses):
+    """A catalog listing page: one table row per course"""
+    # Cells on their own lines, as in real pages; the code patterns need the word break
+    rows = '\n'.join(
+        f"<tr>\n<td>{course['department']} {course['code'][len(course['department']):]}</td>\n"
+        f"<td><strong>{course['name']}</strong></td>\n<td>{course['credits']} hours</td>\n"
+        f"<td>{course['description']}</td>\n</tr>"
+        for course in courses
+    )
+    return f'<html><body><h1>Course Catalog</h1><table><tbody>\n{rows}\n</tbody></table></body></html>'.encode('utf-8')
+
+def schedule_page_html(course, sections=8):
+    """A course schedule page with its sections in a sectionDataObj script, like the university site"""
+    data = []
+    for number in range(sections):
+        hour = 8 + number
+        data.append({
+            'time': f'{(hour - 1) % 12 + 1:02d}:00 {"PM" if hour >= 12 else "AM"} - '
+                    f'{(hour - 1) % 12 + 1:02d}:50 {"PM" if hour >= 12 else "AM"}',
+            'day': ['MW', 'TR', 'M', 'W', 'F'][number % 5],
+            'location': f'<div class="app-meeting">Siebel Center {1100 + number}</div>'
+        })
+    return (f"<html><head><script>var sectionDataObj = {json.dumps(data)};</script></head><body>"
+            f"<h1>CS225 {course['name']}</h1><p>{course['description']}</p>"
+            f"<p>{course['credits']} hours.</p></body></html>").encode('utf-8')
+
+def catalog_text(courses):
+    """Plain-text catalog listing, as the text fallback sees it"""
+    return '\n'.join(f"{course['code']} {course['name']}\n{course['description']}" for course in courses)
+
+def bench_scraper_extractors(env, repeat, courses=200):
+    """The scraper's HTML and text extractors on synthetic pages (independent of catalog size)"""
+    listed = env.courses[:courses]
+    catalog_html = catalog_page_html(listed)
+    schedule_html = schedule_page_html(listed[0])
+    text = catalog_text(listed)
+    url = 'https://courses.illinois.edu/schedule/2025/fall/CS/225'
+
+    # parse_schedule_html prints debug lines; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [
+            summarize('scraper.parse_catalog_html', None, time_runs(lambda: parse_catalog_html(catalog_html), repeat)),
+            summarize('scraper.parse_schedule_html', None,
+                      time_runs(lambda: parse_schedule_html(url, schedule_html), repeat)),
+            summarize('scraper.extract_courses_from_text', None,
+                      time_runs(lambda: extract_courses_from_text(text), repeat)),
+        ]
+
+# Name -> case, in the order they run. Cases marked per_catalog=False run
+# once, against the first catalog size.
+CASES = {
+    'import_courses': (bench_import_courses, True),
+    'get_courses': (bench_get_courses, True),
+    'generate_schedule': (bench_generate_schedule, True),
+    'check_schedule_conflicts': (bench_check_schedule_conflicts, True),
+    'get_user_schedules': (bench_get_user_schedules, True),
+    'scraper_extractors': (bench_scraper_extractors, False),
+}
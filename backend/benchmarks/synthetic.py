@@ -0,0 +1,225 @@
+"""
+Seeded synthetic catalog and user generator.
+
+generate_catalog(count, seed) returns course dicts with the Course fields
+(the format import_courses accepts as JSON), shaped like the scraped
+catalogs: numbered courses per department, often split into several
+sections, meeting MWF, TR or MW in regular blocks, some with an extra lab
+or a single evening meeting and a few without times. Lower-numbered
+courses of the same department serve as prerequisites. The same count and
+seed always produce the same catalog.
+"""
+
+import json
+import random
+
+from sqlalchemy import insert
+
+DEPARTMENTS = [
+    'CS', 'MATH', 'STAT', 'PHYS', 'CHEM', 'BIOL', 'ECE', 'ME', 'CEE', 'AE', 'IE', 'BIOE',
+    'ECON', 'FIN', 'ACCY', 'BADM', 'PSYC', 'SOC', 'ANTH', 'PS', 'HIST', 'PHIL', 'ENGL', 'RHET',
+    'LING', 'SPAN', 'FR', 'GER', 'MUS', 'ART', 'ARCH', 'GEOL', 'ATMS', 'NRES', 'ANSC', 'CPSC',
+    'FSHN', 'KIN', 'CHLH', 'EPSY', 'EDUC', 'JOUR', 'ADV', 'MDIA', 'LAW', 'NPRE', 'MSE', 'TAM'
+]
+
+TOPICS = [
+    'Algorithms', 'Data Structures', 'Systems', 'Analysis', 'Theory', 'Design', 'Methods', 'Modeling',
+    'Computation', 'Networks', 'Optimization', 'Statistics', 'Mechanics', 'Dynamics', 'Thermodynamics',
+    'Genetics', 'Ecology', 'Policy', 'Markets', 'Finance', 'Accounting', 'Cognition', 'Behavior',
+    'Society', 'Culture', 'History', 'Ethics', 'Logic', 'Writing', 'Composition', 'Language', 'Literature',
+    'Performance', 'Studio', 'Materials', 'Signals', 'Circuits', 'Control', 'Robotics', 'Learning',
+    'Security', 'Databases', 'Graphics', 'Visualization', 'Probability', 'Geometry', 'Algebra', 'Calculus'
+]
+QUALIFIERS = ['Introduction to', 'Principles of', 'Foundations of', 'Applied', 'Advanced', 'Topics in',
+              'Computational', 'Experimental', 'Quantitative', 'Modern']
+# Names the generator filters out, so the keyword filter has work to do
+NON_ACADEMIC = ['Seminar', 'Internship', 'Orientation', 'Study Abroad', 'Undergraduate Open Seminar']
+
+BUILDINGS = ['Siebel Center', 'Everitt Lab', 'Altgeld Hall', 'Loomis Lab', 'Noyes Lab', 'Lincoln Hall',
+             'David Kinley Hall', 'Foellinger Auditorium', 'Armory', 'Engineering Hall', 'Natural History']
+
+# (weight, days, minutes per meeting, start times in minutes)
+MEETING_PATTERNS = [
+    (40, ('Monday', 'Wednesday', 'Friday'), 50, [8 * 60 + 60 * hour for hour in range(10)]),
+    (35, ('Tuesday', 'Thursday'), 75, [8 * 60, 9 * 60 + 30, 11 * 60, 12 * 60 + 30, 14 * 60, 15 * 60 + 30, 17 * 60]),
+    (15, ('Monday', 'Wednesday'), 75, [8 * 60, 9 * 60 + 30, 11 * 60, 12 * 60 + 30, 14 * 60, 15 * 60 + 30]),
+    (5, None, 170, [18 * 60, 19 * 60]),  # one evening meeting on a random weekday
+]
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+LAB_SHARE = 0.15
+UNTIMED_SHARE = 0.05
+
+CREDIT_WEIGHTS = [(1, 5), (2, 5), (3, 60), (4, 25), (5, 5)]
+SECTION_WEIGHTS = [(1, 45), (2, 30), (3, 15), (4, 10)]
+SEMESTER_WEIGHTS = [('Fall', 45), ('Spring', 45), ('Both', 10)]
+CAPACITIES = [20, 25, 30, 40, 50, 75, 100, 200, 300]
+
+PREFERRED_HOURS = ['08:00', '09:00', '10:00', '11:00', '12:00', '01:00', '02:00', '03:00']
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+def _clock(minutes, twelve_hour):
+    hour, minute = divmod(minutes, 60)
+    if not twelve_hour:
+        return f'{hour:02d}:{minute:02d}'
+    suffix = 'PM' if hour >= 12 else 'AM'
+    return f'{(hour - 1) % 12 + 1:02d}:{minute:02d} {suffix}'
+
+def _time_slots(rng, twelve_hour):
+    """JSON time slots for one section, one entry per meeting day"""
+    if rng.random() < UNTIMED_SHARE:
+        return ''
+
+    _, days, length, starts = rng.choices(MEETING_PATTERNS, [pattern[0] for pattern in MEETING_PATTERNS])[0]
+    days = days or (rng.choice(WEEKDAYS),)
+    start = rng.choice(starts)
+    room = f'{rng.choice(BUILDINGS)} {rng.randint(100, 499)}'
+    slots = [{'day': day, 'start_time': _clock(start, twelve_hour), 'end_time': _clock(start + length, twelve_hour),
+              'room': room} for day in days]
+
+    if rng.random() < LAB_SHARE:
+        lab_start = rng.choice([8 * 60, 10 * 60, 13 * 60, 15 * 60])
+        slots.append({'day': rng.choice(WEEKDAYS), 'start_time': _clock(lab_start, twelve_hour),
+                      'end_time': _clock(lab_start + 110, twelve_hour),
+                      'room': f'{rng.choice(BUILDINGS)} {rng.randint(100, 499)}'})
+    return json.dumps(slots)
+
+def _offerings(rng):
+    """Every (department, course number) once, in random order"""
+    offerings = [(department, number) for department in DEPARTMENTS for number in range(100, 1000)]
+    rng.shuffle(offerings)
+    return offerings
+
+def _section_code(department, number, section):
+    """CS225 for the first section, then CS225B ... CS225Z, then CS225S26 ..."""
+    if section == 0:
+        return f'{department}{number}'
+    if section < 26:
+        return f'{department}{number}{chr(ord("A") + section)}'
+    return f'{department}{number}S{section}'
+
+def generate_catalog(count, seed=0, year=2025):
+    """count course sections as Course field dicts, reproducible from the seed"""
+    rng = random.Random(seed)
+    offerings = _offerings(rng)
+    sections = {}
+    bases = {}
+    by_department = {}
+    courses = []
+
+    # Hand out sections offering by offering; if the catalog needs more rows
+    # than the first pass gives, keep adding one section per offering
+    while len(courses) < count:
+        for department, number in offerings:
+            if len(courses) >= count:
+                break
+            key = (department, number)
+            if key not in bases:
+                bases[key] = _course_base(rng, department, number, by_department.get(department, ()))
+                by_department.setdefault(department, []).append(f'{department}{number}')
+                wanted = _weighted(rng, SECTION_WEIGHTS)
+            else:
+                wanted = 1
+
+            for _ in range(min(wanted, count - len(courses))):
+                section = sections.get(key, 0)
+                sections[key] = section + 1
+                courses.append(dict(
+                    bases[key],
+                    code=_section_code(department, number, section),
+                    year=year,
+                    time_slots=_time_slots(rng, twelve_hour=rng.random() < 0.7),
+                    max_capacity=rng.choice(CAPACITIES),
+                    current_enrollment=0
+                ))
+    return courses
+
+def _course_base(rng, department, number, department_codes):
+    """Fields shared by all sections of one course"""
+    if rng.random() < 0.04:
+        name = f'{department} {rng.choice(NON_ACADEMIC)}'
+    else:
+        name = f'{rng.choice(QUALIFIERS)} {rng.choice(TOPICS)}'
+        if number >= 400 and rng.random() < 0.3:
+            name += f' {rng.choice(["I", "II", "Lab", "Practicum"])}'
+
+    # Prerequisites are lower-numbered courses of the same department
+    prerequisites = []
+    if number >= 200 and department_codes and rng.random() < 0.6:
+        candidates = rng.sample(department_codes, min(len(department_codes), 6))
+        prerequisites = [code for code in candidates if int(code[len(department):]) < number][:rng.randint(1, 3)]
+
+    topic_words = rng.sample(TOPICS, 3)
+    return {
+        'name': name,
+        'credits': _weighted(rng, CREDIT_WEIGHTS),
+        'department': department,
+        'description': (f'{name} covering {topic_words[0].lower()}, {topic_words[1].lower()} and '
+                        f'{topic_words[2].lower()}, with weekly problem sets and a final project.'),
+        'prerequisites': json.dumps(prerequisites),
+        'semester': _weighted(rng, SEMESTER_WEIGHTS),
+    }
+
+def generate_users(count, courses, majors, seed=0):
+    """count user dicts (username, email, major, graduation_year, preferences as a dict)"""
+    rng = random.Random(seed + 1)
+    intro_codes = [course['code'] for course in courses
+                   if int(''.join(filter(str.isdigit, course['code']))[:3]) < 300]
+    users = []
+    for number in range(count):
+        users.append({
+            'username': f'bench_user_{number}',
+            'email': f'bench_user_{number}@example.com',
+            'major': rng.choice(majors),
+            'graduation_year': rng.randint(2025, 2029),
+            'preferences': {
+                'completed_courses': rng.sample(intro_codes, min(len(intro_codes), rng.randint(0, 15))),
+                'preferred_departments': rng.sample(DEPARTMENTS, rng.randint(1, 3)),
+                'preferred_times': rng.sample(PREFERRED_HOURS, rng.randint(0, 3))
+            }
+        })
+    return users
+
+def seed_database(courses, users, schedules_per_user=4, courses_per_schedule=6, seed=0):
+    """Bulk-insert a catalog, users and random schedules for them (requires an app context)
+
+    Faster than the API at large sizes. Schedules may contain conflicts;
+    enrollment counters are recomputed afterwards.
+    """
+    from catalog import bump_catalog_version
+    from enrollment import reconcile_enrollment
+    from models import db, Course, Schedule, ScheduleCourses, User
+
+    rng = random.Random(seed + 2)
+    chunk = 2000
+    for start in range(0, len(courses), chunk):
+        db.session.execute(insert(Course), courses[start:start + chunk])
+    db.session.execute(insert(User), [dict(user, preferences=json.dumps(user['preferences'])) for user in users])
+    bump_catalog_version()
+    db.session.commit()
+
+    course_ids = db.session.execute(db.select(Course.id, Course.semester)).all()
+    ids_by_term = {term: [course_id for course_id, semester in course_ids if semester in (term, 'Both')]
+                   for term in ('Fall', 'Spring')}
+    user_ids = db.session.execute(db.select(User.id).where(User.username.like('bench_user_%'))).scalars().all()
+
+    terms = [(semester, year) for year in (2025, 2026) for semester in ('Fall', 'Spring')][:schedules_per_user]
+    schedules = [{'user_id': user_id, 'semester': semester, 'year': year, 'total_credits': 0}
+                 for user_id in user_ids for semester, year in terms]
+    for start in range(0, len(schedules), chunk):
+        db.session.execute(insert(Schedule), schedules[start:start + chunk])
+    db.session.commit()
+
+    links = []
+    for schedule_id, semester in db.session.execute(db.select(Schedule.id, Schedule.semester)).all():
+        candidates = ids_by_term[semester]
+        for course_id in rng.sample(candidates, min(len(candidates), courses_per_schedule)):
+            links.append({'schedule_id': schedule_id, 'course_id': course_id})
+    for start in range(0, len(links), chunk):
+        db.session.execute(insert(ScheduleCourses), links[start:start + chunk])
+    db.session.commit()
+
+    reconcile_enrollment()
+    return user_ids
@@ -0,0 +1,70 @@
+"""
+Small in-process caches.
+
+Each gunicorn worker keeps its own caches, so anything cached here must
+either be validated against the database on use or be invalidated by the
+code path that changes it in this process and tolerate short staleness in
+the others.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with an optional time-to-live
+
+    Entries older than ttl seconds are treated as missing. When the cache is
+    full the least recently used entry is evicted.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = max(int(maxsize), 1)
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                self.misses += 1
+                return default
+
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, self._MISSING)
+            return default if entry is self._MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Size and hit/miss counters, for debugging and metrics"""
+        with self._lock:
+            return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,175 @@
+"""
+In-memory snapshot of the course catalog.
+
+The catalog changes rarely (imports, loader runs, scraping) but is read on
+almost every request. Each process keeps the serialized course list for the
+current catalog version and only rebuilds it when catalog_state.version has
+moved on. Under gunicorn the snapshot is loaded before workers are forked,
+so every worker starts with a warm copy.
+
+Enrollment counters change with every schedule write without bumping the
+catalog version, so the serialized list gets its current_enrollment values
+refreshed separately: at most every ENROLLMENT_REFRESH_INTERVAL seconds, or
+right after this process commits an enrollment change. The payload is only
+re-encoded when a value actually moved.
+"""
+
+import os
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from course_records import CourseRecord, safe_json_loads
+from models import db, CatalogState, Course
+
+# How often a process re-reads catalog_state.version to notice imports done
+# by other processes. Writes made by this process are picked up at once.
+CATALOG_VERSION_CHECK_INTERVAL = float(os.environ.get('CATALOG_VERSION_CHECK_INTERVAL', 2))
+
+# How often /api/courses re-reads the enrollment counters
+ENROLLMENT_REFRESH_INTERVAL = float(os.environ.get('ENROLLMENT_REFRESH_INTERVAL', 5))
+
+class CatalogSnapshot:
+    """Serialized courses and scheduling records for one catalog version"""
+
+    def __init__(self, version, courses, payload, records):
+        self.version = version
+        self.courses = courses
+        self.payload = payload
+        self.records = records
+        self.records_by_id = {record.id: record for record in records}
+        # Position of each course in records, the bit index used by profile masks
+        self.index_by_id = {record.id: index for index, record in enumerate(records)}
+        self.loaded_at = time.time()
+
+    def records_for_semester(self, semester):
+        """Records offered in the given semester (or in both), in catalog order"""
+        return [record for record in self.records if record.semester in (semester, 'Both')]
+
+_snapshot = None
+_last_checked = 0.0
+_lock = threading.Lock()
+_enrollment_checked = 0.0
+_enrollment_lock = threading.Lock()
+
+def serialize_course(course):
+    """Course fields as returned by /api/courses"""
+    return {
+        'id': course.id,
+        'code': course.code,
+        'name': course.name,
+        'credits': course.credits,
+        'department': course.department,
+        'description': course.description,
+        'prerequisites': safe_json_loads(course.prerequisites),
+        'semester': course.semester,
+        'year': course.year,
+        'time_slots': safe_json_loads(course.time_slots),
+        'max_capacity': course.max_capacity,
+        'current_enrollment': course.current_enrollment
+    }
+
+def current_catalog_version():
+    """Read the stored catalog version (0 if the catalog was never written)"""
+    return db.session.execute(select(CatalogState.version).where(CatalogState.id == 1)).scalar() or 0
+
+def bump_catalog_version():
+    """Record a catalog change; call in the same transaction as the course writes"""
+    updated = db.session.execute(
+        update(CatalogState).where(CatalogState.id == 1).values(version=CatalogState.version + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(CatalogState(id=1, version=1))
+    db.session.info['catalog_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _expire_snapshot_check(session):
+    # Make the next get_catalog_snapshot() in this process re-read the version
+    global _last_checked, _enrollment_checked
+    if session.info.pop('catalog_changed', False):
+        _last_checked = 0.0
+    if session.info.pop('enrollment_changed', False):
+        _enrollment_checked = 0.0
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalog_change(session):
+    session.info.pop('catalog_changed', None)
+    session.info.pop('enrollment_changed', None)
+
+def load_catalog_snapshot():
+    """Build a fresh snapshot from the database (requires an app context)"""
+    global _snapshot, _last_checked, _enrollment_checked
+
+    # Read the version first: if a write lands while courses are loading, the
+    # snapshot is labelled with the older version and rebuilt on the next check
+    version = current_catalog_version()
+    rows = Course.query.order_by(Course.id).all()
+    courses = [serialize_course(course) for course in rows]
+    payload = current_app.json.response(courses).get_data()
+    records = [CourseRecord.from_course(course) for course in rows]
+
+    _snapshot = CatalogSnapshot(version, courses, payload, records)
+    _last_checked = _enrollment_checked = time.monotonic()
+    return _snapshot
+
+def get_catalog_snapshot():
+    """Return the catalog snapshot, rebuilding it if the catalog version changed"""
+    global _last_checked
+
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _last_checked < CATALOG_VERSION_CHECK_INTERVAL:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is not None and time.monotonic() - _last_checked < CATALOG_VERSION_CHECK_INTERVAL:
+            return snapshot
+
+        if snapshot is None or snapshot.version != current_catalog_version():
+            return load_catalog_snapshot()
+
+        _last_checked = time.monotonic()
+        return snapshot
+
+def get_courses_payload():
+    """Serialized course list for /api/courses with current enrollment counters"""
+    global _enrollment_checked
+
+    snapshot = get_catalog_snapshot()
+    if time.monotonic() - _enrollment_checked < ENROLLMENT_REFRESH_INTERVAL:
+        return snapshot.payload
+
+    with _enrollment_lock:
+        if time.monotonic() - _enrollment_checked < ENROLLMENT_REFRESH_INTERVAL:
+            return snapshot.payload
+        _enrollment_checked = time.monotonic()
+
+        enrollment = dict(db.session.execute(select(Course.id, Course.current_enrollment)).all())
+        courses = snapshot.courses
+        changed = [index for index, course in enumerate(courses)
+                   if enrollment.get(course['id'], course['current_enrollment']) != course['current_enrollment']]
+        if changed:
+            # Replace the changed entries rather than mutating dicts other requests may be reading
+            courses = list(courses)
+            for index in changed:
+                courses[index] = dict(courses[index], current_enrollment=enrollment[courses[index]['id']])
+            snapshot.courses = courses
+            snapshot.payload = current_app.json.response(courses).get_data()
+        return snapshot.payload
+
+def course_records_for_ids(course_ids):
+    """CourseRecords for the given course ids, in the same order
+
+    Served from the snapshot; courses written by another process since the
+    last version check are loaded from the database. Unknown ids are skipped.
+    """
+    records_by_id = get_catalog_snapshot().records_by_id
+    missing = [course_id for course_id in course_ids if course_id not in records_by_id]
+    if missing:
+        records_by_id = dict(records_by_id)
+        for course in Course.query.filter(Course.id.in_(missing)).all():
+            records_by_id[course.id] = CourseRecord.from_course(course)
+    return [records_by_id[course_id] for course_id in course_ids if course_id in records_by_id]
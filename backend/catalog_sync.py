@@ -0,0 +1,206 @@
+"""
+Differential catalog sync for the course loader scripts.
+
+Instead of deleting the whole course table and re-adding every course, each
+incoming course is hashed and compared with a hash of the stored row. Only
+new, changed and removed courses are written, using bulk statements, so
+existing course ids (and the schedules that reference them) are preserved.
+"""
+
+import hashlib
+import json
+
+from sqlalchemy import delete, insert, select, update
+
+from catalog import bump_catalog_version
+from models import db, Course, Schedule, ScheduleCourses
+
+# Catalog fields compared between the incoming data and the stored rows.
+# current_enrollment is not catalog content: it counts the schedules holding
+# a course (see enrollment.py), so incoming values are ignored and new
+# courses start at zero.
+SYNC_FIELDS = ('name', 'credits', 'department', 'description', 'prerequisites',
+               'semester', 'year', 'time_slots', 'max_capacity')
+
+# Keep IN (...) lists under SQLite's bound parameter limit
+SYNC_CHUNK_SIZE = 500
+
+def course_fields_from_loader_record(course_data):
+    """Map a loader script record (course_code/course_name keys) to Course fields"""
+    return {
+        'code': course_data['course_code'],
+        'name': course_data['course_name'],
+        'description': course_data['description'],
+        'credits': course_data['credits'],
+        'department': course_data['department'],
+        'prerequisites': course_data['prerequisites'],
+        'semester': course_data['semester'],
+        'year': course_data['year'],
+        'time_slots': course_data['time_slots'],
+        'max_capacity': course_data['max_capacity']
+    }
+
+def course_content_hash(fields):
+    """Hash the catalog content of a course so stored and incoming rows can be compared"""
+    values = [fields.get(field) for field in SYNC_FIELDS]
+    # Treat NULL and empty text the same way, the loaders use '' for both
+    values = ['' if value is None else value for value in values]
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _chunks(items, size=SYNC_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class CatalogSync:
+    """Apply incoming courses to the catalog in batches, writing only the differences
+
+    Create it inside an app context, call apply() with one or more batches of
+    Course field dicts and finish() once all batches are in. finish() deletes
+    stored courses that never appeared in a batch (unless delete_missing is
+    False), commits and returns the diff report.
+    """
+
+    def __init__(self, delete_missing=True, dry_run=False):
+        self.delete_missing = delete_missing
+        self.dry_run = dry_run
+        self.seen_codes = set()
+        self.report = {
+            'inserted': [],
+            'updated': [],
+            'deleted': [],
+            'time_slots_changed': [],
+            'unchanged': 0,
+            'unlinked_schedule_courses': 0
+        }
+        self._changed_course_ids = []
+
+        # One projected query for the whole stored catalog: code -> (id, hash, time slots)
+        columns = [getattr(Course, field) for field in SYNC_FIELDS]
+        rows = db.session.execute(select(Course.id, Course.code, *columns)).all()
+        self.stored = {
+            row.code: (row.id, course_content_hash(row._mapping), row.time_slots or '')
+            for row in rows
+        }
+        self.codes_by_id = {row.id: row.code for row in rows}
+
+    def apply(self, courses):
+        """Diff a batch of Course field dicts against the stored catalog and write the changes"""
+        inserts = []
+        updates = []
+
+        for fields in courses:
+            code = fields['code']
+            if code in self.seen_codes:
+                continue
+            self.seen_codes.add(code)
+
+            stored = self.stored.get(code)
+            if stored is None:
+                inserts.append(dict(fields, current_enrollment=0))
+            elif stored[1] != course_content_hash(fields):
+                updates.append({'id': stored[0], **{field: fields.get(field) for field in SYNC_FIELDS}})
+                # New meeting times can put existing schedules into conflict
+                if stored[2] != (fields.get('time_slots') or ''):
+                    self.report['time_slots_changed'].append(code)
+            else:
+                self.report['unchanged'] += 1
+
+        self.report['inserted'].extend(fields['code'] for fields in inserts)
+        self.report['updated'].extend(self.codes_by_id[row['id']] for row in updates)
+        self._changed_course_ids.extend(row['id'] for row in updates)
+
+        if self.dry_run:
+            return
+        if inserts:
+            db.session.execute(insert(Course), inserts)
+        if updates:
+            db.session.execute(update(Course), updates)
+
+    def finish(self):
+        """Delete courses missing from the incoming data, commit and return the report"""
+        if self.delete_missing:
+            missing = [(code, course_id) for code, (course_id, _, _) in self.stored.items()
+                       if code not in self.seen_codes]
+            self.report['deleted'] = [code for code, _ in missing]
+            missing_ids = [course_id for _, course_id in missing]
+
+            if missing_ids:
+                self.report['unlinked_schedule_courses'] = self._count_links(missing_ids)
+                self._changed_course_ids.extend(missing_ids)
+        else:
+            missing_ids = []
+
+        if self.dry_run:
+            db.session.rollback()
+            return self.report
+
+        # Schedules holding changed or deleted courses need their credit totals
+        # refreshed; find them before the links to deleted courses go away
+        affected_schedule_ids = self._schedules_with_courses(self._changed_course_ids)
+
+        # Drop schedule links first so no schedule points at a deleted course
+        for chunk in _chunks(missing_ids):
+            db.session.execute(delete(ScheduleCourses).where(ScheduleCourses.course_id.in_(chunk)))
+            db.session.execute(delete(Course).where(Course.id.in_(chunk)))
+
+        self._refresh_schedule_credits(affected_schedule_ids)
+        if self.report['inserted'] or self.report['updated'] or self.report['deleted']:
+            bump_catalog_version()
+        db.session.commit()
+        return self.report
+
+    def _count_links(self, course_ids):
+        total = 0
+        for chunk in _chunks(course_ids):
+            total += db.session.execute(
+                select(db.func.count()).select_from(ScheduleCourses).where(ScheduleCourses.course_id.in_(chunk))
+            ).scalar()
+        return total
+
+    def _schedules_with_courses(self, course_ids):
+        schedule_ids = set()
+        for chunk in _chunks(course_ids):
+            schedule_ids.update(db.session.execute(
+                select(ScheduleCourses.schedule_id).where(ScheduleCourses.course_id.in_(chunk)).distinct()
+            ).scalars())
+        return sorted(schedule_ids)
+
+    def _refresh_schedule_credits(self, schedule_ids):
+        """Recompute total_credits for the given schedules from their remaining courses"""
+        credits_subquery = (
+            select(db.func.coalesce(db.func.sum(Course.credits), 0))
+            .select_from(ScheduleCourses)
+            .join(Course, Course.id == ScheduleCourses.course_id)
+            .where(ScheduleCourses.schedule_id == Schedule.id)
+            .scalar_subquery()
+        )
+
+        for chunk in _chunks(schedule_ids):
+            db.session.execute(
+                update(Schedule).where(Schedule.id.in_(chunk)).values(total_credits=credits_subquery)
+            )
+
+def sync_courses(courses, delete_missing=True, dry_run=False):
+    """Differentially sync a complete list of Course field dicts into the catalog"""
+    sync = CatalogSync(delete_missing=delete_missing, dry_run=dry_run)
+    sync.apply(courses)
+    return sync.finish()
+
+def print_sync_report(report, dry_run=False, limit=20):
+    """Print a short summary of a sync report"""
+    prefix = "Would apply" if dry_run else "Applied"
+    print(f"{prefix} catalog diff: {len(report['inserted'])} inserted, "
+          f"{len(report['updated'])} updated, {len(report['deleted'])} deleted, "
+          f"{report['unchanged']} unchanged")
+
+    for label in ('inserted', 'updated', 'deleted'):
+        codes = report[label]
+        if codes:
+            shown = ', '.join(codes[:limit])
+            more = f" (+{len(codes) - limit} more)" if len(codes) > limit else ''
+            print(f"  {label.capitalize()}: {shown}{more}")
+
+    if report['unlinked_schedule_courses']:
+        print(f"  Removed {report['unlinked_schedule_courses']} schedule entries for deleted courses")
+    if report['time_slots_changed']:
+        print(f"  {len(report['time_slots_changed'])} courses have new time slots")
@@ -0,0 +1,316 @@
+"""
+Precomputed pairwise conflict matrix per term.
+
+For every term (Fall, Spring, ...) the courses offered that term are
+compared pairwise once, with NumPy broadcasting over their meeting days and
+start/end minutes, and the result is kept as one bitset row per course
+(np.packbits, bit j of row i set when course i and course j clash). The
+rule is the same as meetings_conflict() in course_records.py: same listed
+day and overlapping times, or same day with a time missing.
+
+"Which courses still fit next to this schedule" then becomes a bitwise OR
+over a few rows. The matrices are built when the catalog content changes,
+saved as .npz next to the SQLite database (or CONFLICT_MATRIX_DIR) and
+loaded from there at startup, so worker processes and restarts do not
+repeat the O(n^2) build.
+
+    python conflict_matrix.py    # build (or load) and report the matrices
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from flask import current_app
+
+from catalog import get_catalog_snapshot
+from models import db
+from schedule_render import TERM_DATES
+
+# Meetings compared per broadcast block while building, bounding peak memory
+# to roughly BUILD_BLOCK_MEETINGS x (meetings in the term) booleans
+BUILD_BLOCK_MEETINGS = int(os.environ.get('CONFLICT_MATRIX_BLOCK', 1024))
+
+MATRIX_FILE_PREFIX = 'conflict_matrix_'
+
+_matrices = None
+_lock = threading.Lock()
+
+def catalog_fingerprint(records):
+    """Hash of the fields the matrices depend on: ids, semesters, credits and meetings"""
+    digest = hashlib.sha1()
+    for record in records:
+        meetings = ';'.join(f'{meeting.day}@{meeting.start}-{meeting.end}' for meeting in record.meetings)
+        digest.update(f'{record.id}|{record.semester}|{record.credits}|{meetings}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+def term_semesters(records):
+    """Terms to build matrices for: the known terms plus any other listed semester"""
+    semesters = set(TERM_DATES)
+    semesters.update(record.semester for record in records if record.semester)
+    semesters.discard('Both')
+    return sorted(semesters)
+
+class _Meetings:
+    """A list of courses' meetings as parallel arrays, grouped by course"""
+
+    def __init__(self, records, day_ids):
+        owners, days, starts, ends = [], [], [], []
+        for position, record in enumerate(records):
+            for meeting in record.meetings:
+                owners.append(position)
+                # Days the term has never seen get an id no term meeting has
+                days.append(day_ids.get(meeting.day, -1))
+                starts.append(-1 if meeting.start is None else meeting.start)
+                ends.append(-1 if meeting.end is None else meeting.end)
+
+        self.owners = np.array(owners, dtype=np.int32)
+        self.days = np.array(days, dtype=np.int32)
+        self.starts = np.array(starts, dtype=np.int32)
+        self.ends = np.array(ends, dtype=np.int32)
+        self.timed = (self.starts >= 0) & (self.ends >= 0)
+        # Courses with at least one meeting, and where their meetings start
+        self.positions, self.offsets = np.unique(self.owners, return_index=True)
+
+    def __len__(self):
+        return len(self.owners)
+
+    def clash(self, other, rows=slice(None)):
+        """Boolean matrix: meeting i of other[rows] vs meeting j of self"""
+        days = other.days[rows, None]
+        starts = other.starts[rows, None]
+        ends = other.ends[rows, None]
+        timed = other.timed[rows, None]
+        overlap = (starts < self.ends) & (ends > self.starts)
+        # Missing times count as a conflict, as in meetings_conflict()
+        return (days == self.days) & (overlap | ~(timed & self.timed))
+
+    def course_clash(self, other, rows=slice(None)):
+        """Meeting-by-course matrix: meeting i of other[rows] vs each course of self that meets"""
+        return np.logical_or.reduceat(self.clash(other, rows), self.offsets, axis=1)
+
+class TermConflictMatrix:
+    """Conflict bitsets between the courses offered in one term"""
+
+    def __init__(self, semester, records, rows=None):
+        self.semester = semester
+        self.course_ids = np.array([record.id for record in records], dtype=np.int64)
+        self.credits = np.array([record.credits for record in records], dtype=np.int32)
+        self.index_by_id = {record.id: index for index, record in enumerate(records)}
+
+        day_ids = {}
+        for record in records:
+            for meeting in record.meetings:
+                day_ids.setdefault(meeting.day, len(day_ids))
+        self._day_ids = day_ids
+        self._meetings = _Meetings(records, day_ids)
+        self.rows = rows if rows is not None else self._build()
+
+    def __len__(self):
+        return len(self.course_ids)
+
+    @property
+    def row_bytes(self):
+        return (len(self.course_ids) + 7) // 8
+
+    def _build(self):
+        size = len(self.course_ids)
+        rows = np.zeros((size, self.row_bytes), dtype=np.uint8)
+        meetings = self._meetings
+        positions, offsets = meetings.positions, meetings.offsets
+        total = len(meetings)
+
+        first = 0
+        while first < len(positions):
+            # Whole courses per block, about BUILD_BLOCK_MEETINGS meetings each
+            last = max(int(np.searchsorted(offsets, offsets[first] + BUILD_BLOCK_MEETINGS)), first + 1)
+            start = offsets[first]
+            stop = offsets[last] if last < len(positions) else total
+
+            by_meeting = meetings.course_clash(meetings, slice(start, stop))
+            by_course = np.logical_or.reduceat(by_meeting, offsets[first:last] - start, axis=0)
+
+            dense = np.zeros((last - first, size), dtype=bool)
+            dense[:, positions] = by_course
+            dense[np.arange(last - first), positions[first:last]] = False  # a course never conflicts with itself
+            rows[positions[first:last]] = np.packbits(dense, axis=1)
+            first = last
+        return rows
+
+    def row(self, record):
+        """Packed conflict row of a course, computed on the fly if it isn't offered this term"""
+        index = self.index_by_id.get(record.id)
+        if index is not None:
+            return self.rows[index]
+
+        dense = np.zeros(len(self.course_ids), dtype=bool)
+        if record.meetings and len(self._meetings):
+            other = _Meetings([record], self._day_ids)
+            dense[self._meetings.positions] = self._meetings.course_clash(other).any(axis=0)
+        return np.packbits(dense)
+
+    def occupied(self, records):
+        """Packed bitset of the term's courses that clash with any of the given courses"""
+        occupied = np.zeros(self.row_bytes, dtype=np.uint8)
+        for record in records:
+            occupied |= self.row(record)
+        return occupied
+
+    def compatible_positions(self, records):
+        """Positions (into course_ids) of courses that fit next to all the given courses
+
+        The given courses themselves are excluded.
+        """
+        busy = np.unpackbits(self.occupied(records), count=len(self.course_ids)).astype(bool)
+        for record in records:
+            index = self.index_by_id.get(record.id)
+            if index is not None:
+                busy[index] = True
+        return np.flatnonzero(~busy)
+
+    def compatible_course_ids(self, records):
+        """Ids of the term's courses that fit next to all the given courses"""
+        return self.course_ids[self.compatible_positions(records)].tolist()
+
+class ConflictMatrices:
+    """The term matrices for one catalog content fingerprint"""
+
+    def __init__(self, fingerprint, version, terms):
+        self.fingerprint = fingerprint
+        self.version = version
+        self.terms = terms
+        self.snapshot_key = None
+        self._snapshot = None
+
+    def term(self, semester):
+        """Matrix for a term; terms not built up front are built on first use"""
+        matrix = self.terms.get(semester)
+        if matrix is None:
+            matrix = TermConflictMatrix(semester, self._snapshot.records_for_semester(semester))
+            self.terms[semester] = matrix
+        return matrix
+
+    def attach(self, snapshot):
+        self.snapshot_key = (snapshot.version, snapshot.loaded_at)
+        self._snapshot = snapshot
+
+def build_conflict_matrices(snapshot, fingerprint=None):
+    """Compute the matrices of every term from a catalog snapshot"""
+    fingerprint = fingerprint or catalog_fingerprint(snapshot.records)
+    terms = {semester: TermConflictMatrix(semester, snapshot.records_for_semester(semester))
+             for semester in term_semesters(snapshot.records)}
+    return ConflictMatrices(fingerprint, snapshot.version, terms)
+
+def matrix_directory():
+    """Where matrices are saved: CONFLICT_MATRIX_DIR, next to the SQLite file, or the instance folder"""
+    configured = os.environ.get('CONFLICT_MATRIX_DIR')
+    if configured:
+        return configured
+    url = db.engine.url
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        return os.path.dirname(os.path.abspath(url.database))
+    return current_app.instance_path
+
+def matrix_path(fingerprint):
+    return os.path.join(matrix_directory(), f'{MATRIX_FILE_PREFIX}{fingerprint[:16]}.npz')
+
+def save_conflict_matrices(matrices):
+    """Write the matrices atomically and remove files of older catalogs"""
+    path = matrix_path(matrices.fingerprint)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    arrays = {
+        'fingerprint': np.array(matrices.fingerprint),
+        'catalog_version': np.array(matrices.version),
+        'semesters': np.array(sorted(matrices.terms)),
+    }
+    for number, semester in enumerate(sorted(matrices.terms)):
+        arrays[f'course_ids_{number}'] = matrices.terms[semester].course_ids
+        arrays[f'rows_{number}'] = matrices.terms[semester].rows
+
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix=MATRIX_FILE_PREFIX, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+    for name in os.listdir(directory):
+        if name.startswith(MATRIX_FILE_PREFIX) and name.endswith('.npz') and os.path.join(directory, name) != path:
+            try:
+                os.unlink(os.path.join(directory, name))
+            except OSError:
+                pass  # Another process may have removed it already
+    return path
+
+def load_conflict_matrices(snapshot, fingerprint):
+    """Load saved matrices for this catalog content, or None if there are none"""
+    path = matrix_path(fingerprint)
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data['fingerprint']) != fingerprint:
+                return None
+            terms = {}
+            for number, semester in enumerate(data['semesters'].tolist()):
+                records = snapshot.records_for_semester(semester)
+                course_ids = data[f'course_ids_{number}']
+                if course_ids.tolist() != [record.id for record in records]:
+                    return None
+                terms[semester] = TermConflictMatrix(semester, records, rows=data[f'rows_{number}'])
+            return ConflictMatrices(fingerprint, int(data['catalog_version']), terms)
+    except (OSError, KeyError, ValueError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Ignoring unreadable conflict matrix file {path}: {e}")
+        return None
+
+def get_conflict_matrices(snapshot=None):
+    """Conflict matrices for the current catalog, loaded or built when its content changes"""
+    global _matrices
+
+    snapshot = snapshot or get_catalog_snapshot()
+    snapshot_key = (snapshot.version, snapshot.loaded_at)
+    matrices = _matrices
+    if matrices is not None and matrices.snapshot_key == snapshot_key:
+        return matrices
+
+    with _lock:
+        matrices = _matrices
+        if matrices is not None and matrices.snapshot_key == snapshot_key:
+            return matrices
+
+        fingerprint = catalog_fingerprint(snapshot.records)
+        # Version bumps that leave times untouched (e.g. enrollment edits) keep the matrices
+        if matrices is None or matrices.fingerprint != fingerprint:
+            matrices = load_conflict_matrices(snapshot, fingerprint)
+            if matrices is None:
+                started = time.perf_counter()
+                matrices = build_conflict_matrices(snapshot, fingerprint)
+                path = save_conflict_matrices(matrices)
+                print(f"Built conflict matrices for catalog v{snapshot.version} in "
+                      f"{time.perf_counter() - started:.2f}s -> {path}")
+
+        matrices.attach(snapshot)
+        _matrices = matrices
+        return matrices
+
+def main():
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        matrices = get_conflict_matrices()
+        print(f"Conflict matrices ready in {time.perf_counter() - started:.2f}s "
+              f"({matrix_path(matrices.fingerprint)})")
+        for semester, matrix in sorted(matrices.terms.items()):
+            clashes = int(np.unpackbits(matrix.rows).sum()) // 2 if len(matrix) else 0
+            print(f"  {semester}: {len(matrix)} courses, {clashes} conflicting pairs, {matrix.rows.nbytes} bytes")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Compact in-memory course records for scheduling.
+
+Schedule generation, conflict checks and the weekly view only need a handful
+of course fields plus the parsed meeting times. Loading full ORM Course
+instances for that drags in instrumented attributes, identity map entries
+and JSON parsing on every request. CourseRecord is a small immutable
+__slots__ object built once per catalog snapshot (see catalog.py) with its
+time slots already parsed into minutes, so hot loops never touch the ORM or
+re-parse JSON.
+"""
+
+import json
+from collections import namedtuple
+
+# One meeting of a course as listed in its time_slots JSON. day and the time
+# strings are kept as listed (for display and messages); start/end are
+# minutes since midnight, or None when the time is missing.
+Meeting = namedtuple('Meeting', ['day', 'days', 'start_time', 'end_time', 'room', 'start', 'end'])
+
+def safe_json_loads(json_str):
+    """Safely parse JSON string, return empty list if invalid"""
+    if not json_str or not isinstance(json_str, str) or not json_str.strip():
+        return []
+
+    try:
+        return json.loads(json_str.strip())
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+def time_to_minutes(time_str):
+    """Convert "9:00 AM", "09:00" or "9:00" to minutes since midnight (0 if unparseable)"""
+    try:
+        is_pm = 'PM' in time_str.upper()
+        is_am = 'AM' in time_str.upper()
+
+        # Remove AM/PM and clean up
+        time_str = time_str.upper().replace(' AM', '').replace(' PM', '').strip()
+        if ':' not in time_str:
+            return 0
+
+        hour, minute = map(int, time_str.split(':'))
+
+        # Convert to 24-hour format
+        if is_pm and hour != 12:
+            hour += 12
+        elif is_am and hour == 12:
+            hour = 0
+
+        return hour * 60 + minute
+    except Exception:
+        return 0
+
+def parse_meetings(time_slots_json):
+    """Parse a course's time_slots JSON into a tuple of Meetings"""
+    if not time_slots_json:
+        return ()
+    try:
+        slots = json.loads(time_slots_json)
+    except (json.JSONDecodeError, TypeError):
+        return ()
+    if not isinstance(slots, list):
+        return ()
+
+    meetings = []
+    for slot in slots:
+        if not isinstance(slot, dict):
+            continue
+        day = slot.get('day')
+        start_time = slot.get('start_time', '')
+        end_time = slot.get('end_time', '')
+        # Weekly views split "Monday,Wednesday"; conflict checks compare the day as listed
+        days_str = day if day is not None else 'Monday'
+        days = tuple(part.strip() for part in days_str.split(',')) if ',' in days_str else (days_str.strip(),)
+        meetings.append(Meeting(
+            day=day,
+            days=days,
+            start_time=start_time,
+            end_time=end_time,
+            room=slot.get('room', 'TBD'),
+            start=time_to_minutes(start_time) if start_time else None,
+            end=time_to_minutes(end_time) if end_time else None
+        ))
+    return tuple(meetings)
+
+def course_level(code):
+    """Course number from the digits in its code (e.g. CS225 -> 225), or None"""
+    digits = ''.join(filter(str.isdigit, code or ''))
+    return int(digits) if digits else None
+
+class CourseRecord:
+    """Immutable scheduling view of one course"""
+
+    __slots__ = ('id', 'code', 'name', 'credits', 'department', 'semester', 'level',
+                 'has_time_slots', 'meetings')
+
+    def __init__(self, id, code, name, credits, department, semester, time_slots):
+        set_field = object.__setattr__
+        set_field(self, 'id', id)
+        set_field(self, 'code', code)
+        set_field(self, 'name', name or '')
+        set_field(self, 'credits', credits or 0)
+        set_field(self, 'department', department)
+        set_field(self, 'semester', semester)
+        set_field(self, 'level', course_level(code))
+        # Scoring distinguishes "no time_slots at all" from an empty list
+        set_field(self, 'has_time_slots', bool(time_slots))
+        set_field(self, 'meetings', parse_meetings(time_slots))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CourseRecord is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('CourseRecord is immutable')
+
+    def __repr__(self):
+        return f'<CourseRecord {self.code}>'
+
+    @classmethod
+    def from_course(cls, course):
+        """Convert an ORM Course (or any row with the same attributes)"""
+        return cls(course.id, course.code, course.name, course.credits,
+                   course.department, course.semester, course.time_slots)
+
+def meetings_conflict(meeting1, meeting2):
+    """Check if two meetings overlap"""
+    if meeting1.day != meeting2.day:
+        return False
+    # If we don't have proper time data, assume conflict for safety
+    if meeting1.start is None or meeting1.end is None or meeting2.start is None or meeting2.end is None:
+        return True
+    return meeting1.start < meeting2.end and meeting1.end > meeting2.start
+
+def conflict_entry(record1, record2, meeting1, meeting2):
+    return {
+        'course1': record1.code,
+        'course2': record2.code,
+        'conflict': f"Time conflict on {meeting1.day or 'Unknown day'}: {meeting1.start_time}-{meeting1.end_time} vs {meeting2.start_time}-{meeting2.end_time}"
+    }
+
+def find_conflicts(record, others):
+    """Conflicts between one course and a list of courses, in the order check_schedule_conflicts reports them"""
+    conflicts = []
+    if not record.meetings:
+        return conflicts
+    for other in others:
+        for meeting1 in other.meetings:
+            for meeting2 in record.meetings:
+                if meetings_conflict(meeting1, meeting2):
+                    conflicts.append(conflict_entry(other, record, meeting1, meeting2))
+    return conflicts
+
+def check_schedule_conflicts(records):
+    """Check for time conflicts between all pairs of courses"""
+    conflicts = []
+    for i, record1 in enumerate(records):
+        for record2 in records[i + 1:]:
+            for meeting1 in record1.meetings:
+                for meeting2 in record2.meetings:
+                    if meetings_conflict(meeting1, meeting2):
+                        conflicts.append(conflict_entry(record1, record2, meeting1, meeting2))
+    return conflicts
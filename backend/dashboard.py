@@ -0,0 +1,127 @@
+"""
+Aggregated dashboard for one user.
+
+The dashboard used to fetch the user, then their schedules, then every
+schedule separately (2+N requests, each with its own lazy loads). It is now
+built with three queries (user, schedules, schedule courses joined to their
+course columns) and cached per user as a ready-to-send JSON payload.
+
+Cached payloads are validated against the user row and the catalog version on
+every lookup. Schedule and preference writes in this process invalidate the
+entry; other worker processes pick up schedule changes within
+DASHBOARD_CACHE_TTL seconds.
+"""
+
+import json
+import os
+
+from sqlalchemy import select
+
+from caching import LRUCache
+from models import db, Course, Schedule, ScheduleCourses
+
+DASHBOARD_CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE', 1024))
+DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', 30))
+
+DASHBOARD_COURSE_COLUMNS = (Course.id, Course.code, Course.name, Course.credits, Course.department,
+                            Course.description, Course.time_slots, Course.max_capacity, Course.current_enrollment)
+
+_dashboards = LRUCache(maxsize=DASHBOARD_CACHE_SIZE, ttl=DASHBOARD_CACHE_TTL)
+
+def _user_key(user, catalog_version):
+    """Everything on the user row the payload depends on, plus the catalog version"""
+    return (user.username, user.email, user.major, user.graduation_year, user.preferences, catalog_version)
+
+def _time_slots(raw):
+    try:
+        return json.loads(raw) if raw else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+def credit_summary(courses):
+    """Credits and course count of a list of courses, with credits per department"""
+    by_department = {}
+    for course in courses:
+        department = course['department'] or 'Other'
+        by_department[department] = by_department.get(department, 0) + (course['credits'] or 0)
+    return {
+        'total_credits': sum(by_department.values()),
+        'course_count': len(courses),
+        'credits_by_department': by_department
+    }
+
+def build_dashboard(user, preferences):
+    """Dashboard payload for a user: profile, schedules with full course details and credit summaries"""
+    schedules = db.session.execute(
+        select(Schedule.id, Schedule.semester, Schedule.year, Schedule.total_credits, Schedule.created_at)
+        .where(Schedule.user_id == user.id)
+        .order_by(Schedule.created_at.desc(), Schedule.id.desc())
+    ).all()
+
+    courses_by_schedule = {schedule.id: [] for schedule in schedules}
+    if schedules:
+        rows = db.session.execute(
+            select(ScheduleCourses.schedule_id, *DASHBOARD_COURSE_COLUMNS)
+            .join(Course, Course.id == ScheduleCourses.course_id)
+            .where(ScheduleCourses.schedule_id.in_(courses_by_schedule))
+            .order_by(ScheduleCourses.schedule_id, ScheduleCourses.id)
+        ).all()
+        for row in rows:
+            courses_by_schedule[row.schedule_id].append({
+                'id': row.id,
+                'code': row.code,
+                'name': row.name,
+                'credits': row.credits,
+                'department': row.department,
+                'description': row.description,
+                'time_slots': _time_slots(row.time_slots),
+                'max_capacity': row.max_capacity,
+                'current_enrollment': row.current_enrollment
+            })
+
+    schedule_documents = []
+    for schedule in schedules:
+        courses = courses_by_schedule[schedule.id]
+        schedule_documents.append({
+            'id': schedule.id,
+            'semester': schedule.semester,
+            'year': schedule.year,
+            'total_credits': schedule.total_credits,
+            'created_at': schedule.created_at.isoformat() if schedule.created_at else None,
+            'courses': courses,
+            'credit_summary': credit_summary(courses)
+        })
+
+    total_credits = sum(schedule.total_credits or 0 for schedule in schedules)
+    return {
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'major': user.major,
+            'graduation_year': user.graduation_year,
+            'preferences': preferences
+        },
+        'schedules': schedule_documents,
+        'summary': {
+            'schedule_count': len(schedules),
+            'course_count': sum(len(document['courses']) for document in schedule_documents),
+            'total_credits': total_credits,
+            'average_credits': round(total_credits / len(schedules), 1) if schedules else 0
+        }
+    }
+
+def get_dashboard_payload(user, preferences, catalog_version):
+    """Cached dashboard JSON for a user, rebuilt if the user row or catalog changed"""
+    key = _user_key(user, catalog_version)
+    entry = _dashboards.get(user.id)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+
+    payload = json.dumps(build_dashboard(user, preferences))
+    _dashboards.set(user.id, (key, payload))
+    return payload
+
+def invalidate_dashboard(user_id):
+    """Drop a user's cached dashboard after one of their schedules or their profile changes"""
+    _dashboards.pop(user_id)
@@ -0,0 +1,79 @@
+"""
+Database engine configuration.
+
+The database defaults to the local SQLite file but can be pointed at any
+SQLAlchemy URL (e.g. PostgreSQL) through the DATABASE_URL environment
+variable. SQLite connections are tuned for a multi-threaded server: WAL
+journaling lets readers keep going while an import writes, and busy_timeout
+makes writers wait for the lock instead of failing with "database is locked".
+"""
+
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_DATABASE_URL = 'sqlite:///courses.db'
+
+# Applied to every new SQLite connection. Sizes can be overridden from the
+# environment, e.g. SQLITE_CACHE_SIZE=-131072 for a 128 MiB page cache.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),  # negative = KiB, so 64 MiB
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'temp_store': 'MEMORY',
+}
+
+def database_url():
+    """Return the database URL from DATABASE_URL, defaulting to the local SQLite file"""
+    url = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    # Some hosting providers still hand out the old postgres:// scheme
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def engine_options(url):
+    """Connection pool settings for the given database URL"""
+    pool_size = int(os.environ.get('DB_POOL_SIZE', 10))
+    max_overflow = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+
+    if url.startswith('sqlite'):
+        if ':memory:' in url or url.rstrip('/') == 'sqlite:':
+            # In-memory databases live in a single connection
+            return {}
+        # Each request thread checks a connection out of the pool for the
+        # lifetime of its app context and returns it on teardown
+        return {
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'connect_args': {'check_same_thread': False, 'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000},
+        }
+
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+
+@event.listens_for(Engine, 'connect')
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection; other databases are left alone"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
+    finally:
+        cursor.close()
+
+def configure_database(app):
+    """Set the database URL and engine options on a Flask app before SQLAlchemy is bound"""
+    url = database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
@@ -0,0 +1,144 @@
+"""
+Course enrollment counters.
+
+Course.current_enrollment counts the schedules that include the course. It
+is adjusted in the same transaction as every schedule_courses change with
+a relative UPDATE (current_enrollment = current_enrollment + 1), so
+concurrent schedule writes never lose an update and no request has to
+count schedule_courses to know a course's enrollment.
+
+reconcile_enrollment() repairs drift (e.g. links written by older code or
+by hand) by recomputing every counter from schedule_courses with a single
+GROUP BY. It compares before writing and only updates counters that are
+off, guarded by their old value so a concurrent schedule write is never
+overwritten.
+
+    python enrollment.py    # reconcile all counters
+"""
+
+from sqlalchemy import bindparam, case, func, select, update
+
+from models import db, Course, ScheduleCourses
+
+# Keep IN (...) lists under SQLite's bound parameter limit
+ENROLLMENT_CHUNK_SIZE = 500
+
+def _adjust(course_ids, delta):
+    course_ids = list(course_ids)
+    current = func.coalesce(Course.current_enrollment, 0)
+    # Never drop below zero, e.g. when a counter was imported lower than its links
+    value = current + 1 if delta > 0 else case((current > 0, current - 1), else_=0)
+    for start in range(0, len(course_ids), ENROLLMENT_CHUNK_SIZE):
+        db.session.execute(
+            update(Course).where(Course.id.in_(course_ids[start:start + ENROLLMENT_CHUNK_SIZE]))
+            .values(current_enrollment=value)
+            .execution_options(synchronize_session=False)
+        )
+
+def record_enrollment_change(added_ids=(), removed_ids=()):
+    """Adjust counters for courses linked to or unlinked from one schedule
+
+    Call in the same transaction as the schedule_courses change.
+    """
+    if added_ids:
+        _adjust(added_ids, 1)
+    if removed_ids:
+        _adjust(removed_ids, -1)
+    if added_ids or removed_ids:
+        db.session.info['enrollment_changed'] = True
+
+def reconcile_enrollment():
+    """Recompute every counter from schedule_courses, writing only the wrong ones
+
+    Returns a dict with the number of courses checked, corrected and skipped
+    (changed by a concurrent schedule write; run again to pick those up).
+    """
+    counts = (select(ScheduleCourses.course_id, func.count().label('enrolled'))
+              .group_by(ScheduleCourses.course_id).subquery())
+    # Counters and counts come from one statement, so they are read consistently
+    rows = db.session.execute(
+        select(Course.id, Course.current_enrollment, func.coalesce(counts.c.enrolled, 0))
+        .outerjoin(counts, counts.c.course_id == Course.id)
+    ).all()
+
+    wrong = [{'course_id': course_id, 'old': current, 'enrolled': enrolled}
+             for course_id, current, enrolled in rows if current != enrolled]
+    corrected = 0
+    if wrong:
+        statement = (update(Course.__table__)
+                     .where(Course.__table__.c.id == bindparam('course_id'))
+                     .where(func.coalesce(Course.__table__.c.current_enrollment, -1) == func.coalesce(bindparam('old'), -1))
+                     .values(current_enrollment=bindparam('enrolled')))
+        for start in range(0, len(wrong), ENROLLMENT_CHUNK_SIZE):
+            corrected += db.session.execute(statement, wrong[start:start + ENROLLMENT_CHUNK_SIZE]).rowcount
+        db.session.info['enrollment_changed'] = True
+    db.session.commit()
+
+    return {'courses': len(rows), 'corrected': corrected, 'skipped': len(wrong) - corrected}
+
+def enrollment_summary(department=None, semester=None, limit=20):
+    """Totals, per-department figures and the fullest courses, read from the counters"""
+    filters = []
+    if department:
+        filters.append(Course.department == department)
+    if semester:
+        filters.append(Course.semester.in_([semester, 'Both']))
+
+    enrolled = func.coalesce(Course.current_enrollment, 0)
+    capacity = func.coalesce(Course.max_capacity, 0)
+    has_capacity = capacity > 0
+
+    totals = db.session.execute(select(
+        func.count(Course.id),
+        func.coalesce(func.sum(enrolled), 0),
+        func.coalesce(func.sum(capacity), 0),
+        func.count(Course.id).filter(has_capacity, enrolled >= capacity),
+        func.count(Course.id).filter(has_capacity, enrolled > capacity)
+    ).where(*filters)).one()
+
+    departments = db.session.execute(
+        select(Course.department, func.count(Course.id), func.sum(enrolled), func.sum(capacity))
+        .where(*filters).group_by(Course.department).order_by(func.sum(enrolled).desc())
+    ).all()
+
+    fill = enrolled * 1.0 / capacity
+    fullest = db.session.execute(
+        select(Course.id, Course.code, Course.name, enrolled.label('enrolled'), capacity.label('capacity'))
+        .where(has_capacity, *filters)
+        .order_by(fill.desc(), Course.code)
+        .limit(limit)
+    ).all()
+
+    return {
+        'courses': totals[0],
+        'total_enrolled': totals[1],
+        'total_capacity': totals[2],
+        'full_courses': totals[3],
+        'over_capacity_courses': totals[4],
+        'by_department': [{
+            'department': department_name,
+            'courses': course_count,
+            'enrolled': department_enrolled or 0,
+            'capacity': department_capacity or 0
+        } for department_name, course_count, department_enrolled, department_capacity in departments],
+        'fullest_courses': [{
+            'id': row.id,
+            'code': row.code,
+            'name': row.name,
+            'current_enrollment': row.enrolled,
+            'max_capacity': row.capacity,
+            'fill_percentage': round(row.enrolled / row.capacity * 100, 1)
+        } for row in fullest]
+    }
+
+def main():
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        result = reconcile_enrollment()
+        print(f"Checked {result['courses']} courses: {result['corrected']} counters corrected, "
+              f"{result['skipped']} changed concurrently (run again to recheck)")
+
+if __name__ == '__main__':
+    main()
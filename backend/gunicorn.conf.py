@@ -0,0 +1,55 @@
+"""
+Gunicorn settings for serving the scheduler API in production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment, e.g.
+WEB_CONCURRENCY=8 GUNICORN_THREADS=2 gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import multiprocessing
+import os
+
+# Each worker runs its own scrape process pool; keep the per-worker pool small
+# so workers * scrape processes does not oversubscribe the CPUs
+os.environ.setdefault('SCRAPE_POOL_WORKERS', '2')
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '5003')}")
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Threads let a worker keep serving while another request waits on the
+# database or an outbound scrape
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the app (and build the catalog snapshot) once in the master before
+# forking, so workers share the loaded code and start warm
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers periodically to bound memory growth; jitter keeps them from
+# all restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def post_fork(server, worker):
+    # Connections opened by the master while preloading must not be shared
+    # with the children; drop them from the pool without closing them so the
+    # master's own copies stay valid
+    from models import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+def worker_exit(server, worker):
+    # Stop the worker's scrape processes on graceful shutdown and restarts
+    from scrape_pool import scrape_pool
+
+    scrape_pool.shutdown()
@@ -4,44 +4,104 @@ Script to load course data from University of Illinois course catalog
 and import it into the Smart Course Scheduler database.
 """
 
+import numpy as np
 import pandas as pd
 import requests
 import json
 from datetime import datetime
 import sys
 import os
+import time
 import argparse
 
 # Add the current directory to Python path to import app modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, Course
+from app import create_app
+from models import db, Course
+from catalog import bump_catalog_version
+from catalog_sync import CatalogSync, course_fields_from_loader_record, print_sync_report
+from audit import audit_after_sync
+from sqlalchemy import insert
 
-def load_illinois_courses():
-    """Load courses from University of Illinois course catalog CSV"""
+ILLINOIS_CATALOG_URL = "https://waf.cs.illinois.edu/discovery/course-catalog.csv"
+
+# Only the columns the transform reads are parsed, all as strings; the
+# transform does its own numeric conversion
+ILLINOIS_COLUMNS = ['Year', 'Term', 'Subject', 'Number', 'Name', 'Description', 'Credit Hours',
+                    'Start Time', 'End Time', 'Days of Week', 'Room', 'Building']
+ILLINOIS_DTYPES = {column: str for column in ILLINOIS_COLUMNS}
+DEFAULT_CHUNK_SIZE = 5000
+
+app = create_app()
+
+def read_illinois_chunks(source=ILLINOIS_CATALOG_URL, department=None, limit=None, chunksize=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrame chunks of the Illinois catalog CSV
+    
+    source can be the remote URL or a local file path. Rows are filtered by
+    department as each chunk is read, and reading stops once limit rows
+    have been yielded, so memory use stays bounded by the chunk size.
+    """
+    
+    print(f"Loading course data from: {source}")
+    
+    reader = pd.read_csv(
+        source,
+        usecols=lambda column: column in ILLINOIS_COLUMNS,
+        dtype=ILLINOIS_DTYPES,
+        chunksize=chunksize
+    )
+    
+    rows_read = 0
+    rows_kept = 0
+    with reader:
+        for chunk in reader:
+            rows_read += len(chunk)
+            
+            if department:
+                chunk = chunk[chunk['Subject'] == department]
+            if limit is not None:
+                chunk = chunk.head(limit - rows_kept)
+            
+            if not chunk.empty:
+                rows_kept += len(chunk)
+                yield chunk
+            
+            if limit is not None and rows_kept >= limit:
+                break
+    
+    print(f"Read {rows_read} rows, kept {rows_kept}")
+
+def stream_illinois_courses(chunks):
+    """Transform catalog chunks into batches of unique course records
     
-    url = "https://waf.cs.illinois.edu/discovery/course-catalog.csv"
+    Sections of the same course can land in different chunks. Rows whose
+    code already appeared in an earlier chunk are dropped before the
+    transform, so every code is decided by its first row in the file - the
+    same rule the whole-file transform applies - and the records don't
+    depend on the chunk size. (Deduplicating on emitted codes instead would
+    let a later section stand in for a first row that was rejected.)
+    """
+    
+    seen_codes = set()
+    for chunk in chunks:
+        course_code = illinois_course_codes(chunk)
+        first_seen = ~course_code.isin(seen_codes).to_numpy()
+        seen_codes.update(course_code[first_seen])
+        courses = transform_illinois_data(chunk[first_seen])
+        if courses:
+            yield courses
+
+def load_illinois_courses(source=ILLINOIS_CATALOG_URL, department=None, limit=None):
+    """Load the whole (optionally filtered) catalog CSV into one DataFrame"""
     
     try:
-        print(f"Loading course data from: {url}")
-        
-        # Load the CSV data
-        df = pd.read_csv(url)
+        chunks = list(read_illinois_chunks(source, department=department, limit=limit))
+        if not chunks:
+            return pd.DataFrame(columns=ILLINOIS_COLUMNS)
         
+        df = pd.concat(chunks)
         print(f"Loaded {len(df)} courses from CSV")
-        print(f"Columns: {list(df.columns)}")
-        
-        # Display first few rows to understand the structure
-        print("\nFirst 5 courses:")
-        print(df.head())
-        
-        # Display data types and info
-        print("\nData types:")
-        print(df.dtypes)
-        
-        print("\nData info:")
-        print(df.info())
-        
         return df
         
     except Exception as e:
@@ -59,9 +119,124 @@ def filter_courses_by_department(df, department_code):
     
     return filtered_df
 
+# Day letters used in the "Days of Week" column. "TH" is matched before the
+# single letters, the same way the original row-by-row parser scanned them.
+DAY_MAPPING = {
+    'M': 'Monday', 'T': 'Tuesday', 'W': 'Wednesday',
+    'TH': 'Thursday', 'F': 'Friday', 'S': 'Saturday', 'U': 'Sunday'
+}
+DAY_TOKEN_PATTERN = r'TH|[MTWFSU]'
+
+def _column_as_str(df, column, default=''):
+    """Return a column as strings, or a constant Series if the column is missing"""
+    if column in df.columns:
+        return df[column].astype(str)
+    return pd.Series(default, index=df.index, dtype=object)
+
+def _json_encode_values(series):
+    """JSON-encode each value of a string Series, encoding every distinct value once"""
+    uniques = series.unique()
+    return series.map(dict(zip(uniques, map(json.dumps, uniques))))
+
+def illinois_course_codes(df):
+    """Course code (Subject + Number) of each row, positionally aligned with df
+    
+    Rows without a subject or number fall back to CS<row label>.
+    """
+    fallback_codes = 'CS' + pd.Series(df.index.astype(str))
+    subject = _column_as_str(df, 'Subject').reset_index(drop=True)
+    number = _column_as_str(df, 'Number').reset_index(drop=True)
+    return (subject + number).where((subject != '') & (number != ''), fallback_codes)
+
 def transform_illinois_data(df):
     """Transform Illinois course data to match our database schema"""
     
+    if df is None or df.empty:
+        print("No data to transform")
+        return []
+    
+    # Rows are addressed by position from here on; the original labels are
+    # only needed for the fallback course codes
+    fallback_codes = 'CS' + pd.Series(df.index.astype(str))
+    course_code = illinois_course_codes(df)
+    df = df.reset_index(drop=True)
+    
+    # Keep the first row of each code since the catalog lists one row per section
+    subject = _column_as_str(df, 'Subject')
+    first_rows = ~course_code.duplicated()
+    
+    df = df[first_rows]
+    subject = subject[first_rows]
+    course_code = course_code[first_rows]
+    
+    # Rows without a usable year are dropped, as the row-by-row parser did
+    if 'Year' in df.columns:
+        year = pd.to_numeric(df['Year'], errors='coerce')
+    else:
+        year = pd.Series(2025, index=df.index)
+    valid_year = year.notna() & np.isfinite(year)
+    
+    # Parse credit hours; anything that isn't a plain number defaults to 3
+    credit_values = pd.to_numeric(_column_as_str(df, 'Credit Hours', '3').str.strip(), errors='coerce')
+    credits = np.trunc(credit_values.where(np.isfinite(credit_values), 3)).astype(int)
+    
+    # Map semester terms
+    term = _column_as_str(df, 'Term', 'Spring').str.lower()
+    semester = pd.Series(np.select(
+        [term.str.contains('spring', regex=False),
+         term.str.contains('fall', regex=False),
+         term.str.contains('summer', regex=False)],
+        ['Spring', 'Fall', 'Summer'],
+        default='Both'
+    ), index=df.index)
+    
+    # Build time slot JSON. Each meeting day becomes one slot sharing the
+    # section's start/end/room, so the per-row tail is encoded once and the
+    # day prefixes are joined on afterwards.
+    start_time = _column_as_str(df, 'Start Time')
+    end_time = _column_as_str(df, 'End Time')
+    days = _column_as_str(df, 'Days of Week')
+    room = _column_as_str(df, 'Room')
+    building = _column_as_str(df, 'Building')
+    
+    has_schedule = (start_time != '') & (end_time != '') & (days != '') & (room != '')
+    slot_tail = (', "start_time": ' + _json_encode_values(start_time) +
+                 ', "end_time": ' + _json_encode_values(end_time) +
+                 ', "room": ' + _json_encode_values((building + ' ' + room).str.strip()) + '}')
+    
+    day_names = days.where(has_schedule, '').str.findall(DAY_TOKEN_PATTERN).explode().dropna().map(DAY_MAPPING)
+    slot_json = '{"day": "' + day_names + '"' + slot_tail.loc[day_names.index].values
+    time_slots = ('[' + slot_json.groupby(level=0, sort=False).agg(', '.join) + ']').reindex(df.index, fill_value='[]')
+    
+    if 'Name' in df.columns:
+        course_name = df['Name'].astype(str)
+    else:
+        course_name = 'Course ' + fallback_codes[first_rows].str[2:]
+    
+    transformed = pd.DataFrame({
+        'course_code': course_code,
+        'course_name': course_name,
+        'description': _column_as_str(df, 'Description'),
+        'credits': credits,
+        'department': _column_as_str(df, 'Subject', 'Computer Science'),
+        'prerequisites': json.dumps([]),  # Could parse from description later
+        'semester': semester,
+        'year': year.where(valid_year, 0).astype(int),
+        'time_slots': time_slots,
+        'max_capacity': 50,  # Default value
+        'current_enrollment': 0
+    })
+    
+    # Only add courses with valid course codes, names and years
+    keep = valid_year & (transformed['course_code'] != '') & (transformed['course_name'] != '')
+    courses = transformed[keep].to_dict('records')
+    
+    print(f"Transformed {len(courses)} unique courses (removed duplicates)")
+    return courses
+
+def transform_illinois_data_rowwise(df):
+    """Row-by-row version of transform_illinois_data, kept for --compare-transform"""
+    
     if df is None or df.empty:
         print("No data to transform")
         return []
@@ -174,43 +349,76 @@ def transform_illinois_data(df):
     print(f"Transformed {len(courses)} unique courses (removed duplicates)")
     return courses
 
-def import_to_database(courses):
-    """Import transformed courses to the database"""
+def compare_transforms(df, repeat=3):
+    """Time the vectorized transform against the row-by-row one and check they agree"""
+    
+    timings = {}
+    results = {}
+    for name, transform in [('iterrows', transform_illinois_data_rowwise),
+                            ('vectorized', transform_illinois_data)]:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results[name] = transform(df)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+    
+    identical = results['iterrows'] == results['vectorized']
+    print(f"\nTransform comparison on {len(df)} rows (best of {repeat}):")
+    print(f"  iterrows:   {timings['iterrows']:.3f}s")
+    print(f"  vectorized: {timings['vectorized']:.3f}s (speedup {timings['iterrows'] / timings['vectorized']:.1f}x)")
+    print(f"  Outputs identical: {identical}")
+    return identical
+
+def import_to_database(courses, full_reload=False, dry_run=False):
+    """Import a list of transformed courses to the database"""
     
     if not courses:
         print("No courses to import")
         return
     
+    return import_course_batches([courses], full_reload=full_reload, dry_run=dry_run)
+
+def import_course_batches(batches, full_reload=False, dry_run=False, delete_missing=True, skip_audit=False):
+    """Import batches of transformed courses to the database as they arrive
+    
+    By default only the differences against the stored catalog are written
+    (see catalog_sync), and stored schedules are audited for conflicts if
+    any course got new time slots. full_reload restores the old behaviour of
+    clearing the course table and re-adding every course, in bulk per batch.
+    """
+    
     try:
         with app.app_context():
-            # Clear existing courses first
-            Course.query.delete()
-            db.session.commit()
-            print("Cleared existing courses")
-            
-            # Add new courses
-            for course_data in courses:
-                course = Course(
-                    code=course_data['course_code'],
-                    name=course_data['course_name'],
-                    description=course_data['description'],
-                    credits=course_data['credits'],
-                    department=course_data['department'],
-                    prerequisites=course_data['prerequisites'],
-                    semester=course_data['semester'],
-                    year=course_data['year'],
-                    time_slots=course_data['time_slots'],
-                    max_capacity=course_data['max_capacity'],
-                    current_enrollment=course_data['current_enrollment']
-                )
-                db.session.add(course)
+            if full_reload:
+                # Clear existing courses first
+                Course.query.delete()
+                print("Cleared existing courses")
+                
+                imported_count = 0
+                for courses in batches:
+                    db.session.execute(insert(Course), [dict(course_fields_from_loader_record(course_data),
+                                                             current_enrollment=0)
+                                                        for course_data in courses])
+                    imported_count += len(courses)
+                
+                bump_catalog_version()
+                db.session.commit()
+                print(f"Successfully imported {imported_count} courses to database")
+                print(f"Total courses in database: {Course.query.count()}")
+                print("Run `python audit.py` to re-check stored schedules against the reloaded catalog")
+                return
             
-            db.session.commit()
-            print(f"Successfully imported {len(courses)} courses to database")
+            sync = CatalogSync(delete_missing=delete_missing, dry_run=dry_run)
+            for courses in batches:
+                sync.apply([course_fields_from_loader_record(course_data) for course_data in courses])
+            report = sync.finish()
             
-            # Verify import
-            total_courses = Course.query.count()
-            print(f"Total courses in database: {total_courses}")
+            print_sync_report(report, dry_run=dry_run)
+            print(f"Total courses in database: {Course.query.count()}")
+            audit_after_sync(report, dry_run=dry_run, skip=skip_audit)
+            return report
             
     except Exception as e:
         print(f"Error importing to database: {e}")
@@ -227,24 +435,25 @@ def export_to_csv(courses, filename=None):
         print("No courses to export")
         return
     
+    for _ in export_batches_to_csv([courses], filename):
+        pass
+
+def export_batches_to_csv(batches, filename=None):
+    """Append each batch of courses to a CSV file and pass the batches on unchanged"""
+    
     if filename is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"illinois_courses_{timestamp}.csv"
     
+    exported_count = 0
     try:
-        # Convert to DataFrame for easier CSV export
-        df_export = pd.DataFrame(courses)
-        
-        # Export to CSV
-        df_export.to_csv(filename, index=False)
-        print(f"Exported {len(courses)} courses to {filename}")
-        
-        # Show sample of exported data
-        print(f"\nSample of exported data:")
-        print(df_export.head())
-        
-    except Exception as e:
-        print(f"Error exporting to CSV: {e}")
+        for courses in batches:
+            pd.DataFrame(courses).to_csv(filename, mode='w' if exported_count == 0 else 'a',
+                                         header=exported_count == 0, index=False)
+            exported_count += len(courses)
+            yield courses
+    finally:
+        print(f"Exported {exported_count} courses to {filename}")
 
 def main():
     """Main function to load and import Illinois courses"""
@@ -260,42 +469,58 @@ def main():
                        help='Export courses to CSV file (optional filename)')
     parser.add_argument('--no-import', action='store_true',
                        help='Skip importing to database (useful for just exporting)')
+    parser.add_argument('--full-reload', action='store_true',
+                       help='Delete all courses and re-import instead of syncing only the differences')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Report what a sync would change without writing to the database')
+    parser.add_argument('--keep-missing', action='store_true',
+                       help='Keep stored courses that are not in the loaded data instead of deleting them')
+    parser.add_argument('--source', type=str, default=ILLINOIS_CATALOG_URL,
+                       help='Catalog CSV URL or local file path (defaults to the Illinois course catalog)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                       help='Number of CSV rows to read and import at a time')
+    parser.add_argument('--skip-audit', action='store_true',
+                       help="Don't re-check stored schedules for conflicts after courses change time slots")
+    parser.add_argument('--compare-transform', action='store_true',
+                       help='Time the vectorized transform against the row-by-row one and exit')
     
     args = parser.parse_args()
     
     print("=== University of Illinois Course Loader ===")
     print(f"Started at: {datetime.now()}")
     
-    # Load the CSV data
-    df = load_illinois_courses()
+    department = args.department.upper() if args.department else None
+    limit = 100 if args.sample and not department else None
+    if limit:
+        print(f"Limited to first {limit} courses as sample")
     
-    if df is not None:
-        # Apply filters if specified
-        if args.department:
-            df = filter_courses_by_department(df, args.department.upper())
-        elif args.sample:
-            df = df.head(100)
-            print(f"Limited to first 100 courses as sample")
+    if args.compare_transform:
+        df = load_illinois_courses(args.source, department=department, limit=limit)
+        if df is not None:
+            compare_transforms(df)
+        return
+    
+    try:
+        chunks = read_illinois_chunks(args.source, department=department, limit=limit,
+                                      chunksize=args.chunk_size)
+        batches = stream_illinois_courses(chunks)
         
-        # Transform the data
-        courses = transform_illinois_data(df)
+        # Export to CSV if requested
+        if args.export is not None:
+            batches = export_batches_to_csv(batches, args.export)
         
-        if courses:
-            # Export to CSV if requested
-            if args.export is not None:
-                export_to_csv(courses, args.export)
-            
-            # Import to database unless --no-import is specified
-            if not args.no_import:
-                import_to_database(courses)
-            else:
-                print("Skipping database import (--no-import specified)")
+        # Import to database unless --no-import is specified
+        if not args.no_import:
+            import_course_batches(batches, full_reload=args.full_reload, dry_run=args.dry_run,
+                                  delete_missing=not args.keep_missing, skip_audit=args.skip_audit)
         else:
-            print("No valid courses found after transformation")
-    else:
-        print("Failed to load course data")
+            total = sum(len(courses) for courses in batches)
+            print(f"Transformed {total} courses")
+            print("Skipping database import (--no-import specified)")
+    except Exception as e:
+        print(f"Failed to load course data: {e}")
     
     print(f"Completed at: {datetime.now()}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
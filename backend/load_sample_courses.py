@@ -9,11 +9,18 @@ import json
 from datetime import datetime
 import sys
 import os
+import argparse
 
 # Add the current directory to Python path to import app modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, Course
+from app import create_app
+from models import db, Course
+from catalog import bump_catalog_version
+from catalog_sync import course_fields_from_loader_record, print_sync_report, sync_courses
+from audit import audit_after_sync
+
+app = create_app()
 
 def create_sample_courses():
     """Create a sample set of courses from multiple departments"""
@@ -33,8 +40,7 @@ def create_sample_courses():
                 {"day": "Monday", "start_time": "09:00", "end_time": "10:30", "room": "CS Building 101"},
                 {"day": "Wednesday", "start_time": "09:00", "end_time": "10:30", "room": "CS Building 101"}
             ]),
-            'max_capacity': 30,
-            'current_enrollment': 25
+            'max_capacity': 30
         },
         {
             'course_code': 'CS201',
@@ -49,8 +55,7 @@ def create_sample_courses():
                 {"day": "Tuesday", "start_time": "14:00", "end_time": "15:30", "room": "CS Building 201"},
                 {"day": "Thursday", "start_time": "14:00", "end_time": "15:30", "room": "CS Building 201"}
             ]),
-            'max_capacity': 25,
-            'current_enrollment': 20
+            'max_capacity': 25
         },
         # Mathematics
         {
@@ -67,8 +72,7 @@ def create_sample_courses():
                 {"day": "Wednesday", "start_time": "11:00", "end_time": "12:30", "room": "Math Building 101"},
                 {"day": "Friday", "start_time": "11:00", "end_time": "12:30", "room": "Math Building 101"}
             ]),
-            'max_capacity': 35,
-            'current_enrollment': 30
+            'max_capacity': 35
         },
         # Physics
         {
@@ -84,8 +88,7 @@ def create_sample_courses():
                 {"day": "Tuesday", "start_time": "10:00", "end_time": "11:30", "room": "Physics Building 101"},
                 {"day": "Thursday", "start_time": "10:00", "end_time": "11:30", "room": "Physics Building 101"}
             ]),
-            'max_capacity': 40,
-            'current_enrollment': 35
+            'max_capacity': 40
         },
         # English
         {
@@ -101,8 +104,7 @@ def create_sample_courses():
                 {"day": "Monday", "start_time": "13:00", "end_time": "14:30", "room": "English Building 101"},
                 {"day": "Wednesday", "start_time": "13:00", "end_time": "14:30", "room": "English Building 101"}
             ]),
-            'max_capacity': 25,
-            'current_enrollment': 20
+            'max_capacity': 25
         },
         # Chemistry
         {
@@ -118,20 +120,32 @@ def create_sample_courses():
                 {"day": "Tuesday", "start_time": "13:00", "end_time": "14:30", "room": "Chemistry Building 101"},
                 {"day": "Thursday", "start_time": "13:00", "end_time": "14:30", "room": "Chemistry Building 101"}
             ]),
-            'max_capacity': 45,
-            'current_enrollment': 40
+            'max_capacity': 45
         }
     ]
     
     return sample_courses
 
-def import_sample_courses():
-    """Import sample courses to the database"""
+def import_sample_courses(full_reload=False, skip_audit=False):
+    """Import sample courses to the database
+    
+    By default only the differences against the stored catalog are written
+    (see catalog_sync), and stored schedules are audited for conflicts if
+    any course got new time slots; full_reload clears the course table
+    first instead.
+    """
     
     courses = create_sample_courses()
     
     try:
         with app.app_context():
+            if not full_reload:
+                report = sync_courses([course_fields_from_loader_record(course_data) for course_data in courses])
+                print_sync_report(report)
+                print(f"Total courses in database: {Course.query.count()}")
+                audit_after_sync(report, skip=skip_audit)
+                return report
+            
             # Clear existing courses first
             Course.query.delete()
             db.session.commit()
@@ -150,12 +164,14 @@ def import_sample_courses():
                     year=course_data['year'],
                     time_slots=course_data['time_slots'],
                     max_capacity=course_data['max_capacity'],
-                    current_enrollment=course_data['current_enrollment']
+                    current_enrollment=0
                 )
                 db.session.add(course)
             
+            bump_catalog_version()
             db.session.commit()
             print(f"Successfully imported {len(courses)} sample courses to database")
+            print("Run `python audit.py` to re-check stored schedules against the reloaded catalog")
             
             # Verify import
             total_courses = Course.query.count()
@@ -177,11 +193,18 @@ def import_sample_courses():
 def main():
     """Main function to load sample courses"""
     
+    parser = argparse.ArgumentParser(description='Load sample courses into the database')
+    parser.add_argument('--full-reload', action='store_true',
+                       help='Delete all courses and re-import instead of syncing only the differences')
+    parser.add_argument('--skip-audit', action='store_true',
+                       help="Don't re-check stored schedules for conflicts after courses change time slots")
+    args = parser.parse_args()
+    
     print("=== Sample Course Loader ===")
     print(f"Started at: {datetime.now()}")
     
     # Import sample courses
-    import_sample_courses()
+    import_sample_courses(full_reload=args.full_reload, skip_audit=args.skip_audit)
     
     print(f"Completed at: {datetime.now()}")
 
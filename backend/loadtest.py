@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Load test for the scheduler API.
+
+Hammers GET /api/courses and POST /api/schedule/generate from a pool of
+client threads and reports requests per second and latency percentiles.
+
+Test an already running server:
+
+    python loadtest.py --url http://localhost:5003
+
+Or let the script start gunicorn itself at several worker counts to see how
+throughput scales:
+
+    python loadtest.py --workers 1,2,4,8 --duration 20
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def endpoint_requests(user_ids):
+    """(method, path, body factory) for each endpoint under test
+
+    Body factories take the client thread index. Each client generates
+    schedules for its own user: concurrent regenerations of the same schedule
+    would conflict on its unique course links.
+    """
+    def generate_body(client_index):
+        return {'user_id': user_ids[client_index % len(user_ids)], 'semester': 'Fall', 'year': 2025, 'max_credits': 15}
+
+    return {
+        'courses': ('GET', '/api/courses', None),
+        'generate': ('POST', '/api/schedule/generate', generate_body),
+    }
+
+def create_users(base_url, count):
+    """Create one test user per client thread"""
+    run_id = int(time.time())
+    user_ids = []
+    for i in range(count):
+        response = requests.post(f'{base_url}/api/users', json={
+            'username': f'loadtest_{run_id}_{i}',
+            'email': f'loadtest_{run_id}_{i}@example.com',
+            'major': 'Computer Science',
+            'graduation_year': 2026,
+            'preferences': {
+                'completed_courses': ['CS101', 'MATH101'],
+                'preferred_departments': ['CS', 'MATH'],
+                'preferred_times': ['morning', 'afternoon']
+            }
+        }, timeout=10)
+        response.raise_for_status()
+        user_ids.append(response.json()['id'])
+    return user_ids
+
+def run_endpoint(base_url, method, path, body_factory, duration, concurrency):
+    """Issue requests from `concurrency` threads for `duration` seconds"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(client_index):
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        while time.monotonic() < deadline:
+            body = body_factory(client_index) if body_factory else None
+            start = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, json=body, timeout=30)
+                ok = response.status_code < 400
+                response.content
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            if ok:
+                local_latencies.append(elapsed)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for client_index in range(concurrency):
+            executor.submit(client, client_index)
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+    }
+
+def wait_for_server(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{base_url}/api/health', timeout=1).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+def start_gunicorn(workers, threads, port):
+    """Start gunicorn with the production config and the given worker count"""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+               GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_ACCESS_LOG='/dev/null',
+               GUNICORN_LOG_LEVEL='warning')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=BACKEND_DIR, env=env
+    )
+
+def stop_gunicorn(process):
+    # SIGTERM asks gunicorn for a graceful shutdown
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def run_suite(base_url, endpoints, duration, concurrency):
+    user_ids = create_users(base_url, concurrency)
+    results = {}
+    for name in endpoints:
+        method, path, body_factory = endpoint_requests(user_ids)[name]
+        results[name] = run_endpoint(base_url, method, path, body_factory, duration, concurrency)
+        stats = results[name]
+        print(f"  {name:<10} {stats['rps']:8.1f} req/s  p50 {stats['p50_ms']:7.1f} ms  "
+              f"p95 {stats['p95_ms']:7.1f} ms  p99 {stats['p99_ms']:7.1f} ms  "
+              f"({stats['requests']} ok, {stats['errors']} errors)")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the course scheduler API')
+    parser.add_argument('--url', help='Base URL of a running server (default: start gunicorn)')
+    parser.add_argument('--workers', default='1,2,4',
+                       help='Comma-separated gunicorn worker counts to test when --url is not given')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker')
+    parser.add_argument('--port', type=int, default=5103, help='Port for the gunicorn servers started by this script')
+    parser.add_argument('--endpoints', default='courses,generate',
+                       help='Comma-separated endpoints to test (courses, generate)')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to run each endpoint')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = set(endpoints) - set(endpoint_requests([0]))
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    results = {}
+    if args.url:
+        print(f"Load testing {args.url} ({args.concurrency} clients, {args.duration:g}s per endpoint)")
+        results['external'] = run_suite(args.url.rstrip('/'), endpoints, args.duration,
+                                        args.concurrency)
+    else:
+        base_url = f'http://127.0.0.1:{args.port}'
+        for workers in [int(count) for count in args.workers.split(',')]:
+            print(f"gunicorn with {workers} worker(s) x {args.threads} threads "
+                  f"({args.concurrency} clients, {args.duration:g}s per endpoint)")
+            process = start_gunicorn(workers, args.threads, args.port)
+            try:
+                if not wait_for_server(base_url):
+                    print("  Server did not start")
+                    continue
+                results[workers] = run_suite(base_url, endpoints, args.duration,
+                                             args.concurrency)
+            finally:
+                stop_gunicorn(process)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == '__main__':
+    main()
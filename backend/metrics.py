@@ -0,0 +1,202 @@
+"""
+Request, database and scrape metrics in Prometheus text format.
+
+Recording never takes a lock: every thread writes only to its own shard (a
+plain dict of counter values and histogram bucket lists, created on the
+thread's first measurement), so the hot path is a dict lookup and a couple
+of additions under the GIL. GET /metrics merges the shards when scraped.
+Shards of threads that have exited are folded into a retired total so
+short-lived threads (async views, crawls) don't accumulate.
+
+Like the caches, metrics are per process: under gunicorn each scrape of
+/metrics is answered by one worker, so scrape each worker (or run a single
+worker behind the scraper) to see every request.
+
+    python metrics.py    # measure the per-request recording overhead
+"""
+
+import os
+import random
+import time
+
+from flask import Flask, request
+
+# The registry and the scrape metrics live in a module without Flask or
+# database imports, so scraper.py (loaded by the scrape pool workers) can
+# record fetches cheaply; they are re-exported here
+from metrics_registry import (
+    METRICS_ENABLED, REQUEST_BUCKETS, SCRAPE_FETCH_DURATION, SCRAPE_FETCHES, Counter, Gauge, Histogram, Registry,
+    record_fetch, registry
+)
+from query_timing import observe_statements, statement_finished, statement_started
+
+# Fraction of requests to endpoints with phase timings (see phase_timer) that
+# are timed phase by phase; requests asking for their timings always are
+TIMING_SAMPLE_RATE = float(os.environ.get('TIMING_SAMPLE_RATE', 0.1))
+
+# Upper bounds in seconds, like REQUEST_BUCKETS
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+
+REQUESTS = Counter(registry, 'http_requests_total', 'HTTP requests handled', ('method', 'route', 'status'))
+REQUEST_DURATION = Histogram(registry, 'http_request_duration_seconds', 'Time spent in the view and its hooks',
+                             ('method', 'route'), REQUEST_BUCKETS)
+REQUESTS_IN_FLIGHT = Gauge(registry, 'http_requests_in_flight', 'Requests currently being handled')
+DB_QUERIES = Counter(registry, 'db_queries_total', 'SQL statements executed', ('statement',))
+DB_QUERY_DURATION = Histogram(registry, 'db_query_duration_seconds', 'SQL statement execution time',
+                              ('statement',), QUERY_BUCKETS)
+DB_QUERY_ERRORS = Counter(registry, 'db_query_errors_total', 'SQL statements that raised', ('statement',))
+PHASE_DURATION = Histogram(registry, 'request_phase_duration_seconds',
+                           'Time spent in each phase of sampled requests', ('endpoint', 'phase'), REQUEST_BUCKETS)
+
+def statement_kind(statement):
+    """SELECT, INSERT, UPDATE, DELETE or OTHER, used as the query metric label"""
+    verb = statement.lstrip()[:6].upper()
+    return verb if verb in ('SELECT', 'INSERT', 'UPDATE', 'DELETE') else 'OTHER'
+
+def _query_finished(conn, statement, parameters, executemany, seconds):
+    kind = statement_kind(statement)
+    DB_QUERIES.inc(kind)
+    DB_QUERY_DURATION.observe(seconds, kind)
+
+def _query_failed(statement):
+    DB_QUERY_ERRORS.inc(statement_kind(statement))
+
+# Statements are timed once, by query_timing, for every module that needs them
+if METRICS_ENABLED:
+    observe_statements(_query_finished, _query_failed)
+
+class PhaseTimer:
+    """Lap timer splitting one request into named phases
+
+    Call lap(name) at the end of each phase; a phase lapped several times
+    accumulates.
+    """
+
+    enabled = True
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.phases = {}
+        self.started = self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def total(self):
+        return self._last - self.started
+
+    def as_dict(self):
+        """Phase durations in milliseconds, plus the total"""
+        timings = {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+        timings['total'] = round(self.total() * 1000, 3)
+        return timings
+
+    def server_timing(self):
+        """Server-Timing header value"""
+        return ', '.join(f'{name};dur={milliseconds}' for name, milliseconds in self.as_dict().items())
+
+    def record(self):
+        """Add the phase durations to the request_phase_duration_seconds histogram"""
+        for name, seconds in self.phases.items():
+            PHASE_DURATION.observe(seconds, self.endpoint, name)
+        PHASE_DURATION.observe(self.total(), self.endpoint, 'total')
+
+class _NullTimer:
+    """Stand-in for requests that are not sampled"""
+
+    enabled = False
+
+    def lap(self, name):
+        pass
+
+NULL_TIMER = _NullTimer()
+
+def phase_timer(endpoint, force=False):
+    """A PhaseTimer for a sampled (or forced) request, otherwise NULL_TIMER"""
+    if force or (METRICS_ENABLED and random.random() < TIMING_SAMPLE_RATE):
+        return PhaseTimer(endpoint)
+    return NULL_TIMER
+
+def _record_request(req, status):
+    started = req.metrics_started
+    req.metrics_started = None
+    REQUESTS_IN_FLIGHT.dec()
+    # The URL rule, not the path, keeps the label set bounded
+    route = req.url_rule.rule if req.url_rule is not None else '<unmatched>'
+    REQUESTS.inc(req.method, route, str(status))
+    REQUEST_DURATION.observe(time.perf_counter() - started, req.method, route)
+
+def _request_started():
+    # Resolve the request proxy once; every proxied attribute access costs ~1us
+    request._get_current_object().metrics_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+def _request_finished(response):
+    req = request._get_current_object()
+    if getattr(req, 'metrics_started', None) is not None:
+        _record_request(req, response.status_code)
+    return response
+
+def _request_torn_down(error):
+    # Only does anything when the response hooks never ran
+    req = request._get_current_object()
+    if getattr(req, 'metrics_started', None) is not None:
+        _record_request(req, 500)
+
+def init_metrics(app):
+    """Record request counts, latencies and in-flight requests for the app
+
+    Streaming responses are timed until the view returns, not until the
+    last chunk is sent.
+    """
+    if not METRICS_ENABLED:
+        return
+    app.before_request(_request_started)
+    app.after_request(_request_finished)
+    app.teardown_request(_request_torn_down)
+
+def render_metrics():
+    return registry.render()
+
+def measure_overhead(requests=100000):
+    """Per-request cost of the instrumentation in microseconds
+
+    Runs the three request hooks (with the recording they do) inside one
+    request context, and a single query's listener pair, many times over.
+    End-to-end A/B timing through the test client is too noisy to resolve
+    a few microseconds.
+    """
+    app = Flask('metrics_overhead')
+    app.add_url_rule('/ping', 'ping', lambda: 'ok')
+    response = app.response_class('ok')
+
+    with app.test_request_context('/ping') as context:
+        context.match_request()
+        started = time.perf_counter()
+        for _ in range(requests):
+            _request_started()
+            _request_finished(response)
+            _request_torn_down(None)
+        hooks = (time.perf_counter() - started) / requests * 1e6
+
+    class _Connection:
+        info = {}
+
+    connection = _Connection()
+    started = time.perf_counter()
+    for _ in range(requests):
+        statement_started(connection, None, 'SELECT 1', None, None, False)
+        statement_finished(connection, None, 'SELECT 1', None, None, False)
+    query = (time.perf_counter() - started) / requests * 1e6
+
+    registry.reset()
+    return {'request_us': round(hooks, 2), 'query_us': round(query, 2)}
+
+def main():
+    result = measure_overhead()
+    print(f"Instrumentation overhead: {result['request_us']}us per request, {result['query_us']}us per SQL statement")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Lock-free metric registry and the metric types, without Flask or database
+imports.
+
+metrics.py defines the request and database metrics on top of this and
+serves them; scraper.py records page fetches here directly, since the
+scrape pool workers import it and should stay free of the web stack.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+# Upper bounds in seconds; the last bucket (+Inf) is implicit
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class _Shard:
+    """Metric values recorded by one thread"""
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.values = {}
+
+class Registry:
+    """Metric definitions plus the per-thread shards holding their values"""
+
+    def __init__(self):
+        self.metrics = []
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def values(self):
+        """The calling thread's value dict"""
+        try:
+            return self._local.values
+        except AttributeError:
+            shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+            self._local.values = shard.values
+            return shard.values
+
+    def snapshot(self):
+        """Merged values of all threads"""
+        with self._lock:
+            # Threads that exited write nothing more; fold them into the retired totals
+            for shard in [shard for shard in self._shards if not shard.thread.is_alive()]:
+                _merge(self._retired, dict(shard.values))
+                self._shards.remove(shard)
+            merged = _copy(self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            _merge(merged, dict(shard.values))
+        return merged
+
+    def reset(self):
+        with self._lock:
+            self._retired = {}
+            for shard in self._shards:
+                shard.values.clear()
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        merged = self.snapshot()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            entries = sorted((labels, value) for (owner, labels), value in merged.items() if owner is metric)
+            for labels, value in entries:
+                lines.extend(metric.render(labels, value))
+        return '\n'.join(lines) + '\n'
+
+def _copy(values):
+    return {key: list(value) if isinstance(value, list) else value for key, value in values.items()}
+
+def _merge(target, values):
+    for key, value in values.items():
+        if isinstance(value, list):
+            current = target.get(key)
+            if current is None:
+                target[key] = list(value)
+            else:
+                for index, count in enumerate(value):
+                    current[index] += count
+        else:
+            target[key] = target.get(key, 0) + value
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = registry.values
+        registry.metrics.append(self)
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        values = self._values()
+        key = (self, labels)
+        values[key] = values.get(key, 0) + amount
+
+    def render(self, labels, value):
+        return [f'{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}']
+
+class Gauge(Counter):
+    """A value that goes up and down, summed over threads (e.g. requests in flight)"""
+    kind = 'gauge'
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help, labels=(), buckets=REQUEST_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        values = self._values()
+        key = (self, labels)
+        entry = values.get(key)
+        if entry is None:
+            # One count per bucket, then +Inf, sum and count
+            entry = values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def render(self, labels, value):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), value):
+            cumulative += count
+            bucket_labels = _format_labels(self.label_names, labels, [('le', _format_value(float(bound)))])
+            lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+        plain = _format_labels(self.label_names, labels)
+        lines.append(f'{self.name}_sum{plain} {_format_value(float(value[-2]))}')
+        lines.append(f'{self.name}_count{plain} {value[-1]}')
+        return lines
+
+registry = Registry()
+
+SCRAPE_FETCHES = Counter(registry, 'scrape_fetches_total', 'Pages downloaded by the scraper', ('outcome',))
+SCRAPE_FETCH_DURATION = Histogram(registry, 'scrape_fetch_duration_seconds', 'Scraper page download time',
+                                  ('outcome',), FETCH_BUCKETS)
+
+def record_fetch(seconds, outcome):
+    """Record one scraper page download ('ok' or 'error')"""
+    if METRICS_ENABLED:
+        SCRAPE_FETCHES.inc(outcome)
+        SCRAPE_FETCH_DURATION.observe(seconds, outcome)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for databases created before a model change.
+
+db.create_all() only creates missing tables, so indexes, constraints and
+columns added to existing models never reach a database that already has
+those tables. Each migration here is idempotent and recorded in the
+schema_migrations table, and apply_migrations() is run by init_db() after
+create_all().
+
+Run directly to apply pending migrations, or with --explain to check that
+the hot lookup queries are served by an index:
+
+    python migrations.py --explain
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import inspect, text
+
+def _create_index(conn, name, table, columns, unique=False):
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    conn.execute(text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+def _add_column(conn, table, column, column_type):
+    existing = {col['name'] for col in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+
+def migration_hot_path_indexes(conn):
+    """Indexes and unique constraints for schedule and catalog lookups"""
+    # Remove duplicates the new unique indexes would reject. For a term with
+    # several schedules, keep the oldest one, which is what generate_schedule
+    # picked up anyway.
+    conn.execute(text(
+        "DELETE FROM schedule_courses WHERE schedule_id IN ("
+        " SELECT id FROM schedule WHERE id NOT IN ("
+        "  SELECT MIN(id) FROM schedule GROUP BY user_id, semester, year))"
+    ))
+    conn.execute(text(
+        "DELETE FROM schedule WHERE id NOT IN ("
+        " SELECT MIN(id) FROM schedule GROUP BY user_id, semester, year)"
+    ))
+    conn.execute(text(
+        "DELETE FROM schedule_courses WHERE id NOT IN ("
+        " SELECT MIN(id) FROM schedule_courses GROUP BY schedule_id, course_id)"
+    ))
+
+    _create_index(conn, 'uq_schedule_user_term', 'schedule', ['user_id', 'semester', 'year'], unique=True)
+    _create_index(conn, 'ix_schedule_user_created', 'schedule', ['user_id', 'created_at'])
+    _create_index(conn, 'uq_schedule_course', 'schedule_courses', ['schedule_id', 'course_id'], unique=True)
+    _create_index(conn, 'ix_schedule_courses_course', 'schedule_courses', ['course_id', 'schedule_id'])
+    _create_index(conn, 'ix_course_semester_department', 'course', ['semester', 'department'])
+    _create_index(conn, 'ix_course_department', 'course', ['department'])
+
+def migration_rendered_schedules(conn):
+    """Columns holding each schedule's rendered weekly grid and iCal export"""
+    _add_column(conn, 'schedule', 'rendered_weekly', 'TEXT')
+    _add_column(conn, 'schedule', 'rendered_ical', 'TEXT')
+    _add_column(conn, 'schedule', 'rendered_catalog_version', 'INTEGER')
+
+def migration_enrollment_counters(conn):
+    """Recompute course.current_enrollment as the number of schedules including the course"""
+    conn.execute(text(
+        "UPDATE course SET current_enrollment = ("
+        " SELECT COUNT(*) FROM schedule_courses WHERE schedule_courses.course_id = course.id)"
+    ))
+
+# Ordered list of (version, description, function). Append new migrations at
+# the end and never renumber existing ones.
+MIGRATIONS = [
+    (1, 'Indexes and unique constraints for hot lookup paths', migration_hot_path_indexes),
+    (2, 'Rendered weekly grid and iCal columns on schedule', migration_rendered_schedules),
+    (3, 'Enrollment counters recomputed from schedule_courses', migration_enrollment_counters),
+]
+
+def apply_migrations(engine):
+    """Apply any migrations not yet recorded in schema_migrations, returning their versions"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version INTEGER PRIMARY KEY,"
+            " description VARCHAR(200) NOT NULL)"
+        ))
+        applied_versions = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in applied_versions:
+            continue
+
+        # Each migration runs in its own transaction together with its
+        # bookkeeping row, so a failure leaves it pending for the next run
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                         {'version': version, 'description': description})
+
+        print(f"Applied migration {version}: {description}")
+        applied.append(version)
+
+    return applied
+
+def hot_path_queries():
+    """Representative statements for the lookups the indexes are meant to serve"""
+    from sqlalchemy import select
+    from models import Course, Schedule, ScheduleCourses
+
+    return [
+        ('schedule by user and term', 'uq_schedule_user_term',
+         select(Schedule).filter_by(user_id=1, semester='Fall', year=2025)),
+        ('schedules of a user, newest first', 'ix_schedule_user_created',
+         select(Schedule).filter_by(user_id=1).order_by(Schedule.created_at.desc())),
+        ('courses offered in a semester', 'ix_course_semester_department',
+         select(Course).where((Course.semester == 'Fall') | (Course.semester == 'Both'))),
+        ('courses in a department', 'ix_course_department',
+         select(Course).where(Course.department == 'CS')),
+        ('courses of a schedule', 'uq_schedule_course',
+         select(ScheduleCourses.course_id).where(ScheduleCourses.schedule_id == 1)),
+        ('schedules containing a course', 'ix_schedule_courses_course',
+         select(ScheduleCourses.schedule_id).where(ScheduleCourses.course_id == 1)),
+    ]
+
+def explain_hot_paths(engine):
+    """Run EXPLAIN QUERY PLAN for each hot lookup and report whether its index is used
+
+    Returns a list of (label, expected_index, plan, uses_index) tuples. Only
+    SQLite plans are checked; other databases get their EXPLAIN output with
+    uses_index set to None.
+    """
+    results = []
+    with engine.connect() as conn:
+        for label, index_name, statement in hot_path_queries():
+            sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+            if engine.dialect.name == 'sqlite':
+                plan = '\n'.join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+                uses_index = index_name in plan
+            else:
+                plan = '\n'.join(row[0] for row in conn.execute(text(f"EXPLAIN {sql}")))
+                uses_index = None
+            results.append((label, index_name, plan, uses_index))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply schema migrations to the course scheduler database')
+    parser.add_argument('--explain', action='store_true',
+                       help='Check that hot lookup queries use their indexes (exits non-zero if not)')
+    args = parser.parse_args()
+
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        applied = apply_migrations(db.engine)
+        if not applied:
+            print("Database schema is up to date")
+
+        if args.explain:
+            all_indexed = True
+            for label, index_name, plan, uses_index in explain_hot_paths(db.engine):
+                status = {True: 'OK', False: 'NO INDEX', None: 'UNCHECKED'}[uses_index]
+                print(f"[{status}] {label} (expects {index_name})")
+                for line in plan.splitlines():
+                    print(f"    {line}")
+                if uses_index is False:
+                    all_indexed = False
+            if not all_indexed:
+                sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Database models shared by the API, the loader scripts and background jobs.
+
+db is created unbound; create_app() in app.py binds it to an application.
+"""
+
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
+
+# Database Models
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    major = db.Column(db.String(100))
+    graduation_year = db.Column(db.Integer)
+    preferences = db.Column(db.Text)  # JSON string
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Course(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(20), unique=True, nullable=False)
+    name = db.Column(db.String(200), nullable=False)
+    credits = db.Column(db.Integer, nullable=False)
+    department = db.Column(db.String(100))
+    description = db.Column(db.Text)
+    prerequisites = db.Column(db.Text)  # JSON string
+    semester = db.Column(db.String(20))  # Fall, Spring, Both
+    year = db.Column(db.Integer)
+    time_slots = db.Column(db.Text)  # JSON string
+    max_capacity = db.Column(db.Integer)
+    current_enrollment = db.Column(db.Integer, default=0)
+    
+    __table_args__ = (
+        db.Index('ix_course_semester_department', 'semester', 'department'),
+        db.Index('ix_course_department', 'department'),
+    )
+
+class Schedule(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    semester = db.Column(db.String(20), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    total_credits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Weekly grid JSON and iCalendar export, rendered when the courses change
+    # (see schedule_render.py); deferred so schedule listings don't load them
+    rendered_weekly = db.deferred(db.Column(db.Text))
+    rendered_ical = db.deferred(db.Column(db.Text))
+    rendered_catalog_version = db.Column(db.Integer)
+    
+    # Relationship
+    courses = db.relationship('Course', secondary='schedule_courses')
+    
+    __table_args__ = (
+        # One schedule per user and term; also serves plain user_id lookups
+        db.Index('uq_schedule_user_term', 'user_id', 'semester', 'year', unique=True),
+        db.Index('ix_schedule_user_created', 'user_id', 'created_at'),
+    )
+
+class ScheduleCourses(db.Model):
+    __tablename__ = 'schedule_courses'
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    
+    __table_args__ = (
+        db.Index('uq_schedule_course', 'schedule_id', 'course_id', unique=True),
+        db.Index('ix_schedule_courses_course', 'course_id', 'schedule_id'),
+    )
+
+class CatalogState(db.Model):
+    """Single-row table holding a version number bumped on every catalog write"""
+    __tablename__ = 'catalog_state'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ScheduleConflictReport(db.Model):
+    """Latest conflict audit result for one schedule (see audit.py)"""
+    __tablename__ = 'schedule_conflict_report'
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    catalog_version = db.Column(db.Integer, nullable=False)
+    conflict_count = db.Column(db.Integer, nullable=False, default=0)
+    conflicts = db.Column(db.Text)  # JSON list of conflict entries
+    audited_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_conflict_report_count', 'conflict_count'),
+    )
@@ -0,0 +1,115 @@
+"""
+Per-user cache of parsed preferences.
+
+Every scheduling request used to json.loads the user's preferences and
+re-derive completed courses, preferred departments and preferred times.
+A UserProfile holds that parsed state, plus its projection onto the catalog
+snapshot (the ids of completed and preferred-department courses, and the
+preferred-time matches per course) so the generator tests "already
+completed" or "in a preferred department" with one set lookup. Sets rather
+than catalog-wide integer bitsets: every shift or AND on an n-bit integer
+allocates, which made a scoring pass quadratic in the catalog size.
+
+Profiles are keyed by user id and validated against the raw preferences
+string and major on every lookup, so a write from another worker process is
+never served stale. Writes in this process also invalidate the entry.
+"""
+
+import json
+import os
+
+from caching import LRUCache
+
+PROFILE_CACHE_SIZE = int(os.environ.get('PROFILE_CACHE_SIZE', 2048))
+PROFILE_CACHE_TTL = float(os.environ.get('PROFILE_CACHE_TTL', 3600))
+
+# Completed courses assumed when a user has not listed any
+DEFAULT_COMPLETED_COURSES = ('CS101', 'MATH101', 'ENG101')
+
+_profiles = LRUCache(maxsize=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL)
+
+def _string_set(values):
+    """Preference lists as a set of strings (a bare string counts as one entry)"""
+    if isinstance(values, str):
+        return frozenset([values])
+    try:
+        return frozenset(value for value in values if isinstance(value, str))
+    except TypeError:
+        return frozenset()
+
+class CatalogMasks:
+    """A profile's preferences projected onto one catalog snapshot"""
+
+    __slots__ = ('snapshot_key', 'completed', 'preferred_departments', 'time_matches')
+
+    def __init__(self, profile, snapshot):
+        self.snapshot_key = (snapshot.version, snapshot.loaded_at)
+        completed = set()
+        departments = set()
+        time_matches = {}
+
+        for record in snapshot.records:
+            if record.code in profile.completed_courses:
+                completed.add(record.id)
+            if record.department in profile.preferred_departments:
+                departments.add(record.id)
+            if profile.preferred_times:
+                # Scoring adds a bonus per meeting that starts at a preferred time
+                matches = sum(1 for meeting in record.meetings
+                              if any(pref_time in meeting.start_time for pref_time in profile.preferred_times))
+                if matches:
+                    time_matches[record.id] = matches
+
+        # Course ids; time_matches maps a course id to its meetings at preferred times
+        self.completed = frozenset(completed)
+        self.preferred_departments = frozenset(departments)
+        self.time_matches = time_matches
+
+class UserProfile:
+    """Parsed preferences of one user"""
+
+    __slots__ = ('user_id', 'raw_preferences', 'major', 'preferences', 'completed_courses',
+                 'preferred_departments', 'preferred_times', '_masks')
+
+    def __init__(self, user):
+        self.user_id = user.id
+        self.raw_preferences = user.preferences
+        self.major = user.major
+
+        preferences = {}
+        if user.preferences:
+            try:
+                preferences = json.loads(user.preferences)
+            except (json.JSONDecodeError, TypeError):
+                pass  # Use defaults if preferences are invalid
+        self.preferences = preferences
+
+        settings = preferences if isinstance(preferences, dict) else {}
+        self.completed_courses = _string_set(settings.get('completed_courses', DEFAULT_COMPLETED_COURSES))
+        self.preferred_departments = _string_set(settings.get('preferred_departments', ()))
+        self.preferred_times = tuple(sorted(_string_set(settings.get('preferred_times', ()))))
+        self._masks = None
+
+    def matches(self, user):
+        """Whether this profile was built from the user's current row"""
+        return self.raw_preferences == user.preferences and self.major == user.major
+
+    def masks(self, snapshot):
+        """Preference sets for the given catalog snapshot, built once per catalog version"""
+        masks = self._masks
+        if masks is None or masks.snapshot_key != (snapshot.version, snapshot.loaded_at):
+            masks = CatalogMasks(self, snapshot)
+            self._masks = masks
+        return masks
+
+def get_user_profile(user):
+    """Return the cached profile for a User row, rebuilding it if the row changed"""
+    profile = _profiles.get(user.id)
+    if profile is None or not profile.matches(user):
+        profile = UserProfile(user)
+        _profiles.set(user.id, profile)
+    return profile
+
+def invalidate_user_profile(user_id):
+    """Drop a user's cached profile after their preferences or major change"""
+    _profiles.pop(user_id)
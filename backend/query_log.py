@@ -0,0 +1,254 @@
+"""
+Slow-query log and N+1 detection for SQLAlchemy.
+
+Every statement is timed through engine events and counted per request
+(per thread outside requests), keyed by its text with IN (...) lists
+collapsed. Statements slower than SLOW_QUERY_MS are logged with the line
+of application code that issued them and their query plan (EXPLAIN QUERY
+PLAN on SQLite, EXPLAIN elsewhere; captured once per statement). A
+request that runs the same statement N_PLUS_ONE_THRESHOLD times or more
+is reported as a likely N+1 pattern, with the call site of the repeats.
+
+Call sites and plans are only looked up for flagged statements, so the
+per-statement cost is a dict update on top of the shared statement timer
+(query_timing.py). Findings are printed (the server log) and kept in memory
+for GET /api/debug/queries; like the metrics, they are per process.
+Parameters are never recorded.
+
+The report exposes SQL text, code locations and plans, so the log is off
+unless enabled: QUERY_LOG_ENABLED=1 in the environment, the app's
+QUERY_LOG_ENABLED config key, or debug mode (FLASK_DEBUG=1). Don't enable
+it on a publicly reachable server.
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+
+from flask import current_app, request
+
+from query_timing import observe_statements
+
+QUERY_LOG_ENABLED = os.environ.get('QUERY_LOG_ENABLED', '0').lower() in ('1', 'true', 'yes')
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))
+
+# Bounds on what is kept in memory
+SLOW_QUERY_HISTORY = 200
+N_PLUS_ONE_HISTORY = 200
+STATEMENT_STATS_SIZE = 500
+PLAN_CACHE_SIZE = 500
+NORMALIZED_CACHE_SIZE = 2000
+
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)|\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# Call sites are frames of code under the backend directory, other than the
+# statement timing modules
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_TIMING_FILES = {os.path.abspath(__file__), os.path.join(_BACKEND_DIR, 'query_timing.py')}
+
+# SQLAlchemy reuses compiled statement strings, so most lookups hit
+_normalized = {}
+
+def normalize_statement(statement):
+    """Statement text with whitespace squeezed and IN lists of any length written as (?, ...)"""
+    normalized = _normalized.get(statement)
+    if normalized is None:
+        normalized = _IN_LIST.sub('(?, ...)', _WHITESPACE.sub(' ', statement).strip())
+        if len(_normalized) < NORMALIZED_CACHE_SIZE:
+            _normalized[statement] = normalized
+    return normalized
+
+def call_site():
+    """file:line (function) of the innermost application frame on the stack"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (filename.startswith(_BACKEND_DIR) and filename not in _TIMING_FILES
+                and f'{os.sep}site-packages{os.sep}' not in filename):
+            return f'{os.path.relpath(filename, _BACKEND_DIR)}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return None
+
+class QueryLog:
+    """Slow statements, N+1 findings and per-statement totals of this process"""
+
+    def __init__(self):
+        self.slow_queries = deque(maxlen=SLOW_QUERY_HISTORY)
+        self.n_plus_one = deque(maxlen=N_PLUS_ONE_HISTORY)
+        self.statements = {}     # normalized statement -> [count, total seconds, max seconds]
+        self.plans = {}          # normalized statement -> plan text
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # Per-request tracking; outside requests statements go straight to the totals
+    def begin(self):
+        self._local.request = {}
+
+    def end(self, endpoint):
+        counts = getattr(self._local, 'request', None)
+        self._local.request = None
+        if not counts:
+            return
+        with self._lock:
+            for statement, (count, total, longest, _) in counts.items():
+                self._add(statement, count, total, longest)
+
+        for statement, (count, total, _, site) in counts.items():
+            if count >= N_PLUS_ONE_THRESHOLD:
+                finding = {
+                    'endpoint': endpoint,
+                    'statement': statement,
+                    'count': count,
+                    'total_ms': round(total * 1000, 2),
+                    'call_site': site,
+                    'at': datetime.utcnow().isoformat()
+                }
+                self.n_plus_one.append(finding)
+                print(f"Possible N+1 in {endpoint}: {count} x {statement[:160]} "
+                      f"({finding['total_ms']}ms) from {site}")
+
+    def _add(self, statement, count, total, longest):
+        stats = self.statements.get(statement)
+        if stats is None:
+            if len(self.statements) >= STATEMENT_STATS_SIZE:
+                return
+            stats = self.statements[statement] = [0, 0.0, 0.0]
+        stats[0] += count
+        stats[1] += total
+        stats[2] = max(stats[2], longest)
+
+    def record(self, connection, statement, parameters, executemany, seconds):
+        normalized = normalize_statement(statement)
+        counts = getattr(self._local, 'request', None)
+        if counts is None:
+            with self._lock:
+                self._add(normalized, 1, seconds, seconds)
+        else:
+            entry = counts.get(normalized)
+            if entry is None:
+                entry = counts[normalized] = [0, 0.0, 0.0, None]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            # Look up where the repeats come from once, when the pattern shows
+            if entry[0] == N_PLUS_ONE_THRESHOLD:
+                entry[3] = call_site()
+
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            self._record_slow(connection, statement, normalized, parameters, executemany, seconds)
+
+    def _record_slow(self, connection, statement, normalized, parameters, executemany, seconds):
+        site = call_site()
+        plan = None if executemany else self.plan(connection, statement, normalized, parameters)
+        try:
+            endpoint = request.url_rule.rule if request and request.url_rule is not None else None
+        except RuntimeError:
+            endpoint = None  # Not in a request
+        self.slow_queries.append({
+            'statement': normalized,
+            'duration_ms': round(seconds * 1000, 2),
+            'call_site': site,
+            'endpoint': endpoint,
+            'plan': plan,
+            'at': datetime.utcnow().isoformat()
+        })
+        print(f"Slow query ({seconds * 1000:.1f}ms) at {site}: {normalized[:200]}")
+        if plan:
+            print('\n'.join(f'    {line}' for line in plan.splitlines()))
+
+    def plan(self, connection, statement, normalized, parameters):
+        """Query plan of a statement, captured once per normalized statement"""
+        if normalized in self.plans:
+            return self.plans[normalized]
+        if not normalized.upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')):
+            return None
+
+        sqlite = connection.dialect.name == 'sqlite'
+        # A separate DBAPI cursor on the same connection: same transaction and
+        # parameters, and no engine events fired for the EXPLAIN itself
+        cursor = connection.connection.cursor()
+        try:
+            if sqlite:
+                # A failed EXPLAIN QUERY PLAN leaves SQLite's transaction as it was
+                cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ())
+                rows = cursor.fetchall()
+            else:
+                rows = self._explain_in_savepoint(cursor, statement, parameters)
+            plan = '\n'.join(str(row[-1] if sqlite else row[0]) for row in rows)
+        except Exception as e:
+            plan = f'(plan unavailable: {e})'
+        finally:
+            cursor.close()
+
+        if len(self.plans) < PLAN_CACHE_SIZE:
+            self.plans[normalized] = plan
+        return plan
+
+    @staticmethod
+    def _explain_in_savepoint(cursor, statement, parameters):
+        """EXPLAIN rows, inside a savepoint so a failure can't abort the caller's transaction (PostgreSQL)"""
+        cursor.execute('SAVEPOINT query_log_plan')
+        try:
+            cursor.execute('EXPLAIN ' + statement, parameters or ())
+            return cursor.fetchall()
+        except Exception:
+            cursor.execute('ROLLBACK TO SAVEPOINT query_log_plan')
+            raise
+        finally:
+            cursor.execute('RELEASE SAVEPOINT query_log_plan')
+
+    def top_statements(self, limit=20):
+        with self._lock:
+            items = [(statement, list(stats)) for statement, stats in self.statements.items()]
+        items.sort(key=lambda item: item[1][1], reverse=True)
+        return [{
+            'statement': statement,
+            'count': count,
+            'total_ms': round(total * 1000, 2),
+            'mean_ms': round(total / count * 1000, 3),
+            'max_ms': round(longest * 1000, 2)
+        } for statement, (count, total, longest) in items[:limit]]
+
+    def reset(self):
+        with self._lock:
+            self.slow_queries.clear()
+            self.n_plus_one.clear()
+            self.statements.clear()
+            self.plans.clear()
+
+    def report(self, limit=20):
+        """What GET /api/debug/queries returns"""
+        return {
+            'slow_query_ms': SLOW_QUERY_MS,
+            'n_plus_one_threshold': N_PLUS_ONE_THRESHOLD,
+            'slow_queries': list(self.slow_queries)[-limit:][::-1],
+            'n_plus_one': list(self.n_plus_one)[-limit:][::-1],
+            'top_statements': self.top_statements(limit)
+        }
+
+query_log = QueryLog()
+
+def _request_started():
+    query_log.begin()
+
+def _request_finished(error):
+    rule = request.url_rule
+    query_log.end(f"{request.method} {rule.rule if rule is not None else '<unmatched>'}")
+
+def query_log_enabled(app=None):
+    """Whether the query log is on for the app (the current app by default)"""
+    return bool((app or current_app).config.get('QUERY_LOG_ENABLED'))
+
+def init_query_log(app):
+    """Turn the query log on for the app if enabled, tracking statements per request for N+1 detection"""
+    app.config.setdefault('QUERY_LOG_ENABLED', QUERY_LOG_ENABLED or app.debug)
+    if not query_log_enabled(app):
+        return
+    observe_statements(query_log.record)
+    app.before_request(_request_started)
+    app.teardown_request(_request_finished)
@@ -0,0 +1,47 @@
+"""
+Shared SQL statement timing.
+
+metrics.py and query_log.py both need the duration of every statement.
+Rather than each registering its own global engine listeners (and timing
+every statement twice), they subscribe here: one listener pair times the
+statement and hands the duration to every observer. Nothing is timed while
+no observer is subscribed.
+"""
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Called as observer(conn, statement, parameters, executemany, seconds)
+_observers = []
+# Called as observer(statement) for statements that raised
+_error_observers = []
+
+def observe_statements(on_finished, on_failed=None):
+    """Subscribe to the duration of every statement (and, optionally, to failures)"""
+    if on_finished not in _observers:
+        _observers.append(on_finished)
+    if on_failed is not None and on_failed not in _error_observers:
+        _error_observers.append(on_failed)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def statement_started(conn, cursor, statement, parameters, context, executemany):
+    if _observers:
+        conn.info.setdefault('statement_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def statement_finished(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('statement_start')
+    if starts:
+        seconds = time.perf_counter() - starts.pop()
+        for observer in _observers:
+            observer(conn, statement, parameters, executemany, seconds)
+
+@event.listens_for(Engine, 'handle_error')
+def _statement_failed(context):
+    starts = context.connection.info.get('statement_start') if context.connection is not None else None
+    if starts:
+        starts.pop()
+        for observer in _error_observers:
+            observer(context.statement or '')
@@ -0,0 +1,187 @@
+"""
+Streaming bulk export of many schedules.
+
+Schedules are read with a server-side cursor (yield_per) and their courses
+loaded with one query per batch, so memory stays flat however many
+schedules match. Output is produced incrementally as NDJSON, CSV or a zip
+archive (one .ics per schedule plus a schedules.csv), optionally gzipped
+on the fly. All generators need an active app context; wrap them in
+stream_with_context when returning them from a view.
+"""
+
+import csv
+import io
+import json
+import zipfile
+import zlib
+
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from catalog import get_catalog_snapshot
+from course_records import CourseRecord
+from models import db, Course, Schedule, ScheduleCourses
+from schedule_render import render_ical
+
+EXPORT_BATCH_SIZE = 500
+
+CSV_COLUMNS = ['schedule_id', 'user_id', 'semester', 'year', 'total_credits',
+               'course_code', 'course_name', 'credits', 'department', 'time_slots']
+
+EXPORT_COURSE_COLUMNS = (Course.id, Course.code, Course.name, Course.credits, Course.department,
+                         Course.description, Course.semester, Course.time_slots)
+
+def schedule_query(semester=None, year=None, user_ids=None, with_ical=False):
+    """Filtered schedules in id order"""
+    query = select(Schedule).order_by(Schedule.id)
+    if semester:
+        query = query.where(Schedule.semester == semester)
+    if year is not None:
+        query = query.where(Schedule.year == year)
+    if user_ids:
+        query = query.where(Schedule.user_id.in_(user_ids))
+    if with_ical:
+        query = query.options(undefer(Schedule.rendered_ical))
+    return query
+
+def iter_schedule_batches(query, batch_size=EXPORT_BATCH_SIZE):
+    """Yield (schedules, courses_by_schedule_id) per batch of the query"""
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for partition in result.scalars().partitions():
+        schedule_ids = [schedule.id for schedule in partition]
+        rows = db.session.execute(
+            select(ScheduleCourses.schedule_id, *EXPORT_COURSE_COLUMNS)
+            .join(Course, Course.id == ScheduleCourses.course_id)
+            .where(ScheduleCourses.schedule_id.in_(schedule_ids))
+            .order_by(ScheduleCourses.schedule_id, ScheduleCourses.id)
+        ).all()
+
+        courses_by_schedule = {schedule_id: [] for schedule_id in schedule_ids}
+        for row in rows:
+            courses_by_schedule[row.schedule_id].append(row)
+
+        yield partition, courses_by_schedule
+        # Drop the exported batch from the identity map to keep memory flat
+        for schedule in partition:
+            db.session.expunge(schedule)
+
+def _time_slots(raw):
+    try:
+        return json.loads(raw) if raw else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+def schedule_document(schedule, courses):
+    """JSON-ready export of one schedule"""
+    return {
+        'id': schedule.id,
+        'user_id': schedule.user_id,
+        'semester': schedule.semester,
+        'year': schedule.year,
+        'total_credits': schedule.total_credits,
+        'created_at': schedule.created_at.isoformat() if schedule.created_at else None,
+        'courses': [{
+            'id': course.id,
+            'code': course.code,
+            'name': course.name,
+            'credits': course.credits,
+            'department': course.department,
+            'time_slots': _time_slots(course.time_slots)
+        } for course in courses]
+    }
+
+def _csv_rows(schedule, courses):
+    base = [schedule.id, schedule.user_id, schedule.semester, schedule.year, schedule.total_credits]
+    if not courses:
+        return [base + [''] * 5]
+    return [base + [course.code, course.name, course.credits, course.department, course.time_slots or '']
+            for course in courses]
+
+def iter_ndjson(query):
+    for schedules, courses_by_schedule in iter_schedule_batches(query):
+        yield ''.join(json.dumps(schedule_document(schedule, courses_by_schedule[schedule.id])) + '\n'
+                      for schedule in schedules).encode('utf-8')
+
+def iter_csv(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for schedules, courses_by_schedule in iter_schedule_batches(query):
+        for schedule in schedules:
+            writer.writerows(_csv_rows(schedule, courses_by_schedule[schedule.id]))
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def gzip_stream(chunks):
+    """Gzip a stream of byte chunks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+class _ZipStream:
+    """Write-only file object that collects what zipfile writes until drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def _schedule_ical(schedule, courses, catalog_version):
+    # Use the stored export when it is current; otherwise render from the batch
+    if schedule.rendered_ical and schedule.rendered_catalog_version == catalog_version:
+        return schedule.rendered_ical
+    records = [CourseRecord.from_course(course) for course in courses]
+    descriptions = {course.id: course.description for course in courses}
+    return render_ical(schedule.id, schedule.semester, schedule.year, records, descriptions)
+
+def iter_zip(filters):
+    """Zip archive with schedules.csv and one ical/schedule_<id>.ics per schedule
+
+    zipfile writes to an unseekable stream using data descriptors, so each
+    entry is compressed and emitted as it is written.
+    """
+    stream = _ZipStream()
+    catalog_version = get_catalog_snapshot().version
+
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('schedules.csv', 'w') as entry:
+            text = io.TextIOWrapper(entry, encoding='utf-8', newline='')
+            writer = csv.writer(text)
+            writer.writerow(CSV_COLUMNS)
+            for schedules, courses_by_schedule in iter_schedule_batches(schedule_query(**filters)):
+                for schedule in schedules:
+                    writer.writerows(_csv_rows(schedule, courses_by_schedule[schedule.id]))
+                text.flush()
+                yield stream.drain()
+            text.flush()
+            text.detach()
+        yield stream.drain()
+
+        for schedules, courses_by_schedule in iter_schedule_batches(schedule_query(with_ical=True, **filters)):
+            for schedule in schedules:
+                ical = _schedule_ical(schedule, courses_by_schedule[schedule.id], catalog_version)
+                archive.writestr(f'ical/schedule_{schedule.id}.ics', ical)
+            yield stream.drain()
+
+    yield stream.drain()
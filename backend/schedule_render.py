@@ -0,0 +1,142 @@
+"""
+Rendered views of a schedule: the weekly grid and the iCalendar export.
+
+Both are built once when a schedule's courses change and stored on the
+schedule row (rendered_weekly / rendered_ical), tagged with the catalog
+version they were built from. The GET endpoints serve the stored text and
+only re-render when the catalog has changed since.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+
+from course_records import time_to_minutes
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday')
+
+# iCalendar BYDAY codes, indexed like date.weekday()
+ICAL_DAY_CODES = {
+    'Monday': 'MO', 'Tuesday': 'TU', 'Wednesday': 'WE', 'Thursday': 'TH',
+    'Friday': 'FR', 'Saturday': 'SA', 'Sunday': 'SU'
+}
+DAY_INDEX = {day: index for index, day in enumerate(ICAL_DAY_CODES)}
+
+# First and last day of instruction as (month, day); the term's year is the schedule's year
+TERM_DATES = {
+    'Fall': ((8, 25), (12, 10)),
+    'Spring': ((1, 16), (5, 1)),
+    'Summer': ((6, 10), (8, 2)),
+}
+
+# Times shown for meetings listed without one
+DEFAULT_START_TIME = '09:00'
+DEFAULT_END_TIME = '10:30'
+
+def render_weekly(records):
+    """Monday-Friday grid of meetings, each day sorted by start time"""
+    weekly = {day: [] for day in WEEKDAYS}
+    default_start = time_to_minutes(DEFAULT_START_TIME)
+
+    entries = []
+    for record in records:
+        for meeting in record.meetings:
+            # Meetings listed as "Monday,Wednesday,Friday" appear on each day
+            for day in meeting.days:
+                if day in weekly:
+                    start = meeting.start if meeting.start is not None else default_start
+                    entries.append((day, start, record.code, {
+                        'course_code': record.code,
+                        'course_name': record.name,
+                        'time': f"{meeting.start_time or DEFAULT_START_TIME} - {meeting.end_time or DEFAULT_END_TIME}",
+                        'room': meeting.room,
+                        'credits': record.credits
+                    }))
+
+    # Sort on minutes, not the display string ("1:00 PM" is after "9:00 AM")
+    entries.sort(key=lambda entry: (entry[1], entry[2]))
+    for day, _, _, entry in entries:
+        weekly[day].append(entry)
+    return weekly
+
+def render_weekly_json(records):
+    """The weekly grid serialized the way jsonify would"""
+    return json.dumps(render_weekly(records), sort_keys=True, separators=(',', ':'))
+
+def _escape_text(value):
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)"""
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+def _fold(line):
+    """Fold a content line to 75 octets (RFC 5545 section 3.1)"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+
+    parts = []
+    current = ''
+    limit = 75
+    for char in line:
+        if len((current + char).encode('utf-8')) > limit:
+            parts.append(current)
+            current = char
+            limit = 74  # continuation lines start with a space
+        else:
+            current += char
+    parts.append(current)
+    return '\r\n '.join(parts)
+
+def term_bounds(semester, year):
+    """First and last day of instruction for a term"""
+    (start_month, start_day), (end_month, end_day) = TERM_DATES.get(semester, TERM_DATES['Fall'])
+    return date(year, start_month, start_day), date(year, end_month, end_day)
+
+def _first_meeting_date(term_start, weekday_indexes):
+    """Earliest date on or after term_start that falls on one of the weekdays"""
+    return min(term_start + timedelta(days=(index - term_start.weekday()) % 7) for index in weekday_indexes)
+
+def _ical_time(day, minutes):
+    return f"{day.strftime('%Y%m%d')}T{minutes // 60:02d}{minutes % 60:02d}00"
+
+def render_ical(schedule_id, semester, year, records, descriptions):
+    """iCalendar file with one weekly recurring event per course meeting
+
+    Times are floating local times, which calendar clients show in the
+    viewer's timezone, matching how the catalog lists them.
+    """
+    term_start, term_end = term_bounds(semester, year)
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    until = f"{term_end.strftime('%Y%m%d')}T235959"
+
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Smart Course Scheduler//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+    ]
+
+    for record in records:
+        for number, meeting in enumerate(record.meetings):
+            weekday_indexes = sorted({DAY_INDEX[day] for day in meeting.days if day in DAY_INDEX})
+            # Meetings without a day or a usable time can't be placed on a calendar
+            if not weekday_indexes or meeting.start is None or meeting.end is None or meeting.end <= meeting.start:
+                continue
+
+            first_day = _first_meeting_date(term_start, weekday_indexes)
+            by_day = ','.join(ICAL_DAY_CODES[day] for day in ICAL_DAY_CODES if DAY_INDEX[day] in weekday_indexes)
+            lines.extend([
+                'BEGIN:VEVENT',
+                f"UID:schedule-{schedule_id}-course-{record.id}-{number}@smart-course-scheduler",
+                f"DTSTAMP:{stamp}",
+                f"SUMMARY:{_escape_text(f'{record.code} - {record.name}')}",
+                f"DESCRIPTION:{_escape_text(descriptions.get(record.id) or 'No description available')}",
+                f"LOCATION:{_escape_text(meeting.room or 'TBD')}",
+                f"DTSTART:{_ical_time(first_day, meeting.start)}",
+                f"DTEND:{_ical_time(first_day, meeting.end)}",
+                f"RRULE:FREQ=WEEKLY;BYDAY={by_day};UNTIL={until}",
+                'END:VEVENT',
+            ])
+
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
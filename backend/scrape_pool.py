@@ -0,0 +1,90 @@
+"""
+Bounded process pool for CPU-bound scraping work.
+
+HTML parsing holds the GIL, so running it on the request thread stalls every
+other request on the same worker. Parse jobs are submitted here instead and
+run in separate processes. The number of jobs running or waiting is capped;
+once the cap is reached submitters wait up to SCRAPE_QUEUE_TIMEOUT seconds
+for a slot before ScrapeQueueFull is raised, so a burst of scrapes gets
+pushed back to the client instead of piling up in memory.
+"""
+
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+SCRAPE_POOL_WORKERS = int(os.environ.get('SCRAPE_POOL_WORKERS', os.cpu_count() or 2))
+SCRAPE_QUEUE_SIZE = int(os.environ.get('SCRAPE_QUEUE_SIZE', SCRAPE_POOL_WORKERS * 2))
+SCRAPE_QUEUE_TIMEOUT = float(os.environ.get('SCRAPE_QUEUE_TIMEOUT', 5))
+SCRAPE_TASK_TIMEOUT = float(os.environ.get('SCRAPE_TASK_TIMEOUT', 60))
+
+class ScrapeQueueFull(Exception):
+    """Raised when the scrape pool has no free slot within the queue timeout"""
+
+class ScrapePool:
+    """Process pool with a fixed number of in-flight slots"""
+
+    def __init__(self, max_workers=SCRAPE_POOL_WORKERS, queue_size=SCRAPE_QUEUE_SIZE):
+        self.max_workers = max(max_workers, 1)
+        self.queue_size = max(queue_size, 0)
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Start worker processes on first use rather than at import time.
+        # 'spawn' keeps children from inheriting the server's threads and
+        # open database connections.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def submit(self, fn, *args, timeout=SCRAPE_QUEUE_TIMEOUT):
+        """Queue fn(*args) on the pool, waiting up to timeout seconds for a free slot"""
+        if not self._slots.acquire(timeout=timeout):
+            raise ScrapeQueueFull('Too many scraping jobs in progress, please retry shortly')
+
+        try:
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool
+                self.shutdown()
+                future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args, timeout=SCRAPE_TASK_TIMEOUT):
+        """Run fn(*args) on the pool and wait for its result"""
+        return self.submit(fn, *args).result(timeout=timeout)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+scrape_pool = ScrapePool()
+atexit.register(scrape_pool.shutdown)
+
+def run_in_pool(fn, *args):
+    """Run a module-level parse function on the shared scrape pool"""
+    return scrape_pool.run(fn, *args)
+
+async def run_in_pool_async(fn, *args):
+    """Await a module-level parse function on the shared scrape pool"""
+    # Waiting for a free slot blocks, so do it off the event loop
+    future = await asyncio.to_thread(scrape_pool.submit, fn, *args)
+    return await asyncio.wait_for(asyncio.wrap_future(future), SCRAPE_TASK_TIMEOUT)
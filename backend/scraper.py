@@ -0,0 +1,700 @@
+"""
+Web scraping helpers for course catalog and schedule pages.
+
+Pages are fetched with an asyncio HTTP client, so one request thread can
+keep many downloads in flight at once. The CPU-heavy BeautifulSoup parsing
+and regex extraction is handed to the bounded process pool in scrape_pool so
+a large catalog page doesn't hold the GIL for every other request.
+"""
+
+import asyncio
+import json
+import re
+import time
+
+import httpx
+
+from metrics_registry import record_fetch
+from scrape_pool import run_in_pool_async
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Connection limits for one client; crawls bound their concurrency separately
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE = 20
+
+def http_client(timeout=10):
+    """Create an async HTTP client for one scrape or crawl (use with async with)"""
+    return httpx.AsyncClient(
+        headers=REQUEST_HEADERS,
+        timeout=timeout,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE)
+    )
+
+async def fetch_page(client, url):
+    """Download a page and return its raw content"""
+    started = time.perf_counter()
+    try:
+        response = await client.get(url)
+        response.raise_for_status()
+    except Exception:
+        record_fetch(time.perf_counter() - started, 'error')
+        raise
+    record_fetch(time.perf_counter() - started, 'ok')
+    return response.content
+
+def is_schedule_page_url(url):
+    """Check if a URL points at a single course schedule page rather than a catalog"""
+    # Look for URL patterns that indicate a specific course schedule
+    return bool('schedule' in url.lower() and
+                any(term in url.lower() for term in ['/cs/', '/cse/', '/math/', '/engr/', '/ansc/', '/phys/', '/chem/', '/biol/']) and
+                re.search(r'/\d{3,4}$', url))  # Ends with course number
+
+async def scrape_url(client, url):
+    """Scrape a single catalog or schedule page"""
+    if is_schedule_page_url(url):
+        return await scrape_schedule_page(client, url)
+    return await scrape_catalog_page(client, url)
+
+async def fetch_sitemap_urls(client, sitemap_url, max_depth=1):
+    """Collect page URLs from a sitemap, following one level of sitemap indexes"""
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(await fetch_page(client, sitemap_url))
+
+    # Sitemaps are namespaced, so match on the local tag name only
+    locations = [elem.text.strip() for elem in root.iter()
+                 if elem.tag.rsplit('}', 1)[-1] == 'loc' and elem.text]
+
+    if root.tag.rsplit('}', 1)[-1] == 'sitemapindex':
+        urls = []
+        if max_depth > 0:
+            results = await asyncio.gather(
+                *(fetch_sitemap_urls(client, child_sitemap, max_depth - 1) for child_sitemap in locations),
+                return_exceptions=True
+            )
+            for child_sitemap, result in zip(locations, results):
+                if isinstance(result, Exception):
+                    print(f"Error reading sitemap {child_sitemap}: {result}")
+                else:
+                    urls.extend(result)
+        return urls
+
+    return locations
+
+async def construct_schedule_url(client, catalog_url, course_code):
+    """Try to construct a schedule URL for a course based on the catalog URL"""
+    # Extract department from course code
+    dept = course_code[:3].upper()
+    
+    # Try different URL patterns for Illinois courses
+    base_urls = [
+        f"https://courses.illinois.edu/schedule/2025/fall/{dept}/{course_code[3:]}",
+        f"https://courses.illinois.edu/schedule/2025/spring/{dept}/{course_code[3:]}",
+        f"https://courses.illinois.edu/schedule/2024/fall/{dept}/{course_code[3:]}",
+        f"https://courses.illinois.edu/schedule/2024/spring/{dept}/{course_code[3:]}"
+    ]
+    
+    async def exists(url):
+        try:
+            response = await client.head(url, timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    # Probe all candidates at once and keep the first one that works, in order
+    found = await asyncio.gather(*(exists(url) for url in base_urls))
+    for url, ok in zip(base_urls, found):
+        if ok:
+            return url
+    return None
+
+async def scrape_catalog_page(client, url):
+    """Scrape course catalog pages"""
+    return await run_in_pool_async(parse_catalog_html, await fetch_page(client, url))
+
+async def scrape_schedule_page(client, url):
+    """Scrape individual course schedule pages"""
+    return await run_in_pool_async(parse_schedule_html, url, await fetch_page(client, url))
+
+async def crawl_pages(urls, concurrency):
+    """Scrape pages with at most `concurrency` in flight, yielding (url, courses, error) as each finishes"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with http_client() as client:
+        async def crawl(url):
+            async with semaphore:
+                try:
+                    return url, await scrape_url(client, url), None
+                except Exception as e:
+                    return url, None, e
+
+        tasks = [asyncio.ensure_future(crawl(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The consumer may stop early (client disconnected); don't leave fetches running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+def iterate_async(async_iterator):
+    """Drive an async iterator from synchronous code, e.g. a streaming response body
+
+    Runs on a private event loop, so it works from a plain WSGI thread.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(async_iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(async_iterator.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+def parse_catalog_html(content):
+    """Extract course listings from catalog page HTML"""
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    courses = []
+    seen_codes = set()
+    
+    # Look for course listings in various formats
+    course_selectors = [
+        'table tr',  # Table rows
+        '.course', '.course-item', '.course-listing',  # Common CSS classes
+        '[class*="course"]',  # Classes containing "course"
+        'li',  # List items
+        '.program-course', '.degree-course',  # Program-specific classes
+        'table tbody tr',  # More specific table rows
+        '[class*="schedule"]',  # Schedule-related classes
+        '[class*="section"]'  # Section-related classes
+    ]
+    
+    for selector in course_selectors:
+        elements = soup.select(selector)
+        if elements:
+            for element in elements[:100]:
+                course_info = extract_course_info(element)
+                if course_info and course_info.get('code') and course_info['code'] not in seen_codes:
+                    courses.append(course_info)
+                    seen_codes.add(course_info['code'])
+    
+    # If no courses found with specific selectors, try general text parsing
+    if not courses:
+        courses = extract_courses_from_text(soup.get_text())
+        unique_courses = []
+        seen_codes = set()
+        for course in courses:
+            if course['code'] not in seen_codes:
+                unique_courses.append(course)
+                seen_codes.add(course['code'])
+        courses = unique_courses
+    
+    return courses
+
+def parse_schedule_html(url, content):
+    """Extract detailed course information from a schedule page's HTML"""
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # Extract course code from URL
+    url_parts = url.split('/')
+    course_code = None
+    for part in url_parts:
+        if any(dept in part.upper() for dept in ['CS', 'CSE', 'MATH', 'ENG', 'PHYS', 'ANSC', 'CHEM', 'BIOL']):
+            # Find the next part which should be the course number
+            try:
+                idx = url_parts.index(part)
+                if idx + 1 < len(url_parts):
+                    course_code = f"{part.upper()}{url_parts[idx + 1]}"
+                    print(f"Debug: Found course code: {course_code}")
+                    break
+            except:
+                pass
+    
+    if not course_code:
+        return []
+    
+    # Extract course information from the page
+    text = soup.get_text()
+    
+    # Look for course name - try multiple approaches
+    name = None
+    
+    # First, try to find the main course title
+    title_elem = soup.find('h1')
+    if title_elem:
+        title_text = title_elem.get_text().strip()
+        if course_code in title_text:
+            # Extract the part after the course code
+            name_match = re.search(rf'{course_code}\s*([A-Z][a-z\s&]+)', title_text)
+            if name_match:
+                name = name_match.group(1).strip()
+    
+    # If no name found, try other patterns
+    if not name:
+        name_patterns = [
+            rf'{course_code}\s*([A-Z][a-z\s&]+)',
+            r'#\s*([A-Z][a-z\s&]+)',
+            r'([A-Z][a-z\s&]+)\s*Course',
+        ]
+        
+        for pattern in name_patterns:
+            match = re.search(pattern, text)
+            if match:
+                name = match.group(1).strip()
+                break
+    
+    # If still no name, try to find it in the page content
+    if not name:
+        # Look for text that might be a course name
+        lines = text.split('\n')
+        for line in lines:
+            line = line.strip()
+            if (len(line) > 10 and len(line) < 100 and
+                course_code in line and
+                any(word in line.lower() for word in ['intro', 'survey', 'course', 'programming', 'analysis', 'sciences'])):
+                # Extract the part after the course code
+                name_match = re.search(rf'{course_code}\s*([A-Z][a-z\s&]+)', line)
+                if name_match:
+                    name = name_match.group(1).strip()
+                    break
+    
+    if not name:
+        name = f"{course_code} Course"
+    
+    # Extract credits
+    credits = 3
+    credit_patterns = [
+        r'(\d+)\s*OR\s*(\d+)\s*hours?',
+        r'(\d+)\s*to\s*(\d+)\s*hours?',
+        r'(\d+)\s*hours?',
+    ]
+    
+    for pattern in credit_patterns:
+        match = re.search(pattern, text.lower())
+        if match:
+            if 'OR' in pattern or 'to' in pattern:
+                credits = max(int(match.group(1)), int(match.group(2)))
+            else:
+                credits = int(match.group(1))
+            break
+    
+    # Extract time slots from the page
+    time_slots = []
+    
+    # First try to extract from JavaScript data (more reliable)
+    script_tags = soup.find_all('script')
+    for script in script_tags:
+        if script.string and 'sectionDataObj' in script.string:
+            # Extract the JavaScript object
+            script_text = script.string
+            match = re.search(r'var sectionDataObj = (\[.*?\]);', script_text, re.DOTALL)
+            if match:
+                try:
+                    import json
+                    # Clean up the JavaScript to make it valid JSON
+                    json_str = match.group(1)
+                    # Remove HTML tags and clean up
+                    json_str = re.sub(r'<[^>]+>', '', json_str)
+                    json_str = json_str.replace('\\/', '/')
+                    
+                    sections = json.loads(json_str)
+                    
+                    for section in sections:
+                        if section.get('time') and section.get('day') and section.get('location'):
+                            time_text = section['time']
+                            day_text = section['day']
+                            location_text = section['location']
+                            
+                            # Extract time
+                            time_match = re.search(r'(\d{1,2}:\d{2}\s*(?:AM|PM))\s*-\s*(\d{1,2}:\d{2}\s*(?:AM|PM))', time_text)
+                            if time_match:
+                                start_time = time_match.group(1)
+                                end_time = time_match.group(2)
+                                
+                                # Convert day abbreviations
+                                day_mapping = {
+                                    'M': 'Monday', 'T': 'Tuesday', 'W': 'Wednesday', 
+                                    'Th': 'Thursday', 'F': 'Friday', 'S': 'Saturday', 'Su': 'Sunday',
+                                    'TR': 'Tuesday,Thursday', 'MW': 'Monday,Wednesday'
+                                }
+                                
+                                day = day_mapping.get(day_text.strip(), day_text.strip())
+                                
+                                # Clean location
+                                room = re.sub(r'<[^>]+>', '', location_text).strip()
+                                
+                                time_slots.append({
+                                    'day': day,
+                                    'start_time': start_time,
+                                    'end_time': end_time,
+                                    'room': room
+                                })
+                except Exception as e:
+                    print(f"Error parsing JavaScript data: {e}")
+                    pass
+    
+    # Fallback: Look for time patterns in tables
+    if not time_slots:
+        tables = soup.find_all('table')
+        for table in tables:
+            rows = table.find_all('tr')
+            for row in rows:
+                cells = row.find_all(['td', 'th'])
+                if len(cells) >= 4:  # Need at least Time, Day, Location columns
+                    row_text = ' '.join([cell.get_text().strip() for cell in cells])
+                    
+                    # Look for time patterns
+                    time_match = re.search(r'(\d{1,2}:\d{2}\s*(?:AM|PM))\s*-\s*(\d{1,2}:\d{2}\s*(?:AM|PM))', row_text)
+                    if time_match:
+                        start_time = time_match.group(1)
+                        end_time = time_match.group(2)
+                        
+                        # Look for day and room in the same row
+                        day = 'Monday'
+                        room = 'TBD'
+                        
+                        for cell in cells:
+                            cell_text = cell.get_text().strip()
+                            # Check for days
+                            if any(day_name in cell_text for day_name in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']):
+                                day = cell_text
+                            # Check for room patterns
+                            elif re.search(r'[A-Z]{2,4}\s*\d{3,4}|[A-Z][a-z]+\s+(?:Hall|Building|Laboratory|Center)', cell_text):
+                                room = cell_text
+                        
+                        time_slots.append({
+                            'day': day,
+                            'start_time': start_time,
+                            'end_time': end_time,
+                            'room': room
+                        })
+    
+    # Try to extract course description
+    description = ''
+    
+    # Look for description in various places
+    desc_selectors = ['p', '.description', '.course-desc', '.summary']
+    for selector in desc_selectors:
+        desc_elem = soup.select_one(selector)
+        if desc_elem:
+            desc_text = desc_elem.get_text().strip()
+            if (len(desc_text) > 20 and 
+                course_code not in desc_text and
+                'university' not in desc_text.lower() and
+                'illinois' not in desc_text.lower() and
+                'login' not in desc_text.lower()):  # Avoid page headers
+                description = desc_text
+                break
+    
+    # If no description found, try to extract from text around course info
+    if not description:
+        # Look for text that might be a course description
+        lines = text.split('\n')
+        for line in lines:
+            line = line.strip()
+            if (len(line) > 30 and 
+                course_code not in line and 
+                'credit' not in line.lower() and
+                'hour' not in line.lower()):
+                description = line
+                break
+    
+    # Convert time slots to JSON string
+    time_slots_json = json.dumps(time_slots) if time_slots else ''
+    
+    return [{
+        'code': course_code,
+        'name': name,
+        'description': description,
+        'credits': credits,
+        'department': course_code[:3],
+        'prerequisites': '',
+        'semester': 'Both',
+        'year': 2025,
+        'time_slots': time_slots_json,
+        'max_capacity': 0,
+        'current_enrollment': 0
+    }]
+
+def extract_course_info(element):
+    """Extract course information from a DOM element"""
+    try:
+        # Try to find course code (usually starts with letters like CS, MATH, etc.)
+        code = None
+        text = element.get_text()
+        
+        # Look for course code patterns
+        import re
+        code_patterns = [
+            r'\b([A-Z]{2,4}\s*\d{3,4}[A-Z]?)\b',  # CS 101, MATH 201A
+            r'\b([A-Z]{2,4}-\d{3,4})\b',  # CS-101, MATH-201
+            r'\b([A-Z]{2,4}\d{3,4})\b',   # CS101, MATH201
+        ]
+        
+        for pattern in code_patterns:
+            match = re.search(pattern, text)
+            if match:
+                # Clean up the code: remove spaces, dashes, and non-breaking spaces
+                code = match.group(1).replace(' ', '').replace('-', '').replace('\u00a0', '').strip()
+                break
+        
+        if not code:
+            return None
+        
+        # Try to find course name
+        name = None
+        name_selectors = ['h3', 'h4', '.course-name', '.course-title', 'strong', 'b', '.title', 'h5']
+        for selector in name_selectors:
+            name_elem = element.select_one(selector)
+            if name_elem:
+                name = name_elem.get_text().strip()
+                if name and len(name) > 3:  # Ensure name is meaningful
+                    break
+        
+        if not name:
+            # Try to extract name from text around the code
+            code_index = text.find(code)
+            if code_index != -1:
+                # Look for text after the code
+                after_code = text[code_index + len(code):].strip()
+                if after_code:
+                    # Take first line or first 100 characters, but skip if it's just punctuation
+                    potential_name = after_code.split('\n')[0][:100].strip()
+                    if potential_name and not potential_name.startswith((':', '-', '(', '[')):
+                        # Clean up the name: remove extra whitespace and common artifacts
+                        name = potential_name.replace('\u00a0', ' ').replace('\u2002', ' ').strip()
+                        # If name is too short or just punctuation, try to find better text
+                        if len(name) < 5 or name.startswith(('credit', 'Hour', 'Hours')):
+                            # Look for text before the code
+                            before_code = text[max(0, code_index - 200):code_index].strip()
+                            if before_code:
+                                lines = before_code.split('\n')
+                                for line in reversed(lines):
+                                    line = line.strip()
+                                    if line and len(line) > 5 and not line.startswith(('credit', 'Hour', 'Hours')):
+                                        name = line.replace('\u00a0', ' ').replace('\u2002', ' ').strip()
+                                        break
+                
+                        # If still no good name, try to extract from the full text more intelligently
+        if not name or len(name) < 5:
+            # Look for text that contains the course code and looks like a course name
+            lines = text.split('\n')
+            for line in lines:
+                line = line.strip()
+                if code in line and len(line) > len(code) + 10:
+                    # This line contains the code and has substantial additional text
+                    # Extract the part after the code
+                    code_pos = line.find(code)
+                    after_code_text = line[code_pos + len(code):].strip()
+                    if after_code_text and len(after_code_text) > 5:
+                        # Clean up the potential name
+                        name = after_code_text.replace('\u00a0', ' ').replace('\u2002', ' ').strip()
+                        # Remove common artifacts
+                        if name.startswith((':', '-', '(', '[')):
+                            name = name[1:].strip()
+                        if name.endswith((':', '-', ')', ']')):
+                            name = name[:-1].strip()
+                        if len(name) > 5:
+                            break
+            
+            # If still no name, try to find any meaningful text in the element
+            if not name or len(name) < 5:
+                # Look for any text that might be a course name
+                all_text = element.get_text()
+                lines = all_text.split('\n')
+                for line in lines:
+                    line = line.strip()
+                    # Skip if line is too short, contains the code, or is just punctuation
+                    if (len(line) > 10 and 
+                        code not in line and 
+                        not line.startswith(('credit', 'Hour', 'Hours', '(', '[', '{')) and
+                        not line.endswith((')', ']', '}', ':', '-'))):
+                        # This might be a course name
+                        name = line.replace('\u00a0', ' ').replace('\u2002', ' ').strip()
+                        if len(name) > 5:
+                            break
+        
+        # Try to find credits
+        credits = 3  # Default
+        credit_patterns = [
+            r'(\d+)\s*credit',
+            r'(\d+)\s*cr',
+            r'(\d+)\s*unit',
+            r'credit:\s*(\d+)\s*Hour',  # Illinois format: "credit: 1 Hour"
+            r'credit:\s*(\d+)\s*Hours',  # Illinois format: "credit: 3 Hours"
+            r'(\d+)\s*OR\s*(\d+)\s*hours?',  # Illinois format: "3 OR 4 hours"
+            r'(\d+)\s*to\s*(\d+)\s*hours?'   # Range format: "3 to 4 hours"
+        ]
+        
+        for pattern in credit_patterns:
+            match = re.search(pattern, text.lower())
+            if match:
+                if 'OR' in pattern or 'to' in pattern:
+                    # For ranges, take the higher number
+                    credits = max(int(match.group(1)), int(match.group(2)))
+                else:
+                    credits = int(match.group(1))
+                break
+        
+        # Try to find department
+        department = code[:2] if len(code) >= 2 else 'Unknown'
+        
+        # Try to find description
+        description = ''
+        desc_selectors = ['.description', '.course-desc', 'p', '.summary']
+        for selector in desc_selectors:
+            desc_elem = element.select_one(selector)
+            if desc_elem:
+                description = desc_elem.get_text().strip()
+                break
+        
+        # Try to extract time slots, days, and room information
+        time_slots = []
+        
+        # Look for time patterns in the text
+        time_patterns = [
+            r'(\d{1,2}:\d{2}\s*(?:AM|PM))\s*-\s*(\d{1,2}:\d{2}\s*(?:AM|PM))',  # 9:00 AM - 10:30 AM
+            r'(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})',  # 9:00 - 10:30
+        ]
+        
+        # Look for day patterns
+        day_patterns = [
+            r'\b(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Mon|Tue|Wed|Thu|Fri|Sat|Sun)\b',
+            r'\b(M|T|W|Th|F|S|Su)\b'
+        ]
+        
+        # Look for room/location patterns
+        room_patterns = [
+            r'([A-Z]{2,4}\s*\d{3,4})',  # Building codes like "DCL 1302"
+            r'([A-Z][a-z]+\s+(?:Hall|Building|Laboratory|Center|Room))',  # "Digital Computer Laboratory"
+            r'([A-Z][a-z]+\s+[A-Z][a-z]+)',  # "Siebel Center"
+        ]
+        
+        # Extract time information
+        for pattern in time_patterns:
+            matches = re.finditer(pattern, text)
+            for match in matches:
+                start_time = match.group(1)
+                end_time = match.group(2)
+                
+                # Find associated day and room
+                day = 'Monday'  # Default
+                room = 'TBD'
+                
+                # Look for day in nearby text
+                for day_pattern in day_patterns:
+                    day_match = re.search(day_pattern, text[max(0, match.start()-100):match.end()+100])
+                    if day_match:
+                        day = day_match.group(1)
+                        break
+                
+                # Look for room in nearby text
+                for room_pattern in room_patterns:
+                    room_match = re.search(room_pattern, text[max(0, match.start()-100):match.end()+100])
+                    if room_match:
+                        room = room_match.group(1)
+                        break
+                
+                time_slots.append({
+                    'day': day,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'room': room
+                })
+        
+        # Convert time slots to JSON string for storage
+        time_slots_json = json.dumps(time_slots) if time_slots else ''
+        
+        # Ensure we have a meaningful name
+        if not name or len(name) < 5 or name.lower() in ['courses', 'course']:
+            # Try to create a better fallback name
+            if description and len(description) > 10:
+                # Use first part of description as name
+                desc_lines = description.split('\n')
+                for line in desc_lines:
+                    line = line.strip()
+                    if line and len(line) > 10 and not line.startswith(('credit', 'Hour', 'Hours')):
+                        name = line[:100].replace('\u00a0', ' ').replace('\u2002', ' ').strip()
+                        break
+            
+            # If still no good name, use a generic but informative one
+            if not name or len(name) < 5:
+                name = f'{code} Course'
+        
+        return {
+            'code': code,
+            'name': name,
+            'description': description,
+            'credits': credits,
+            'department': department,
+            'prerequisites': '',
+            'semester': 'Both',
+            'year': 2025,
+            'time_slots': time_slots_json,
+            'max_capacity': 0,
+            'current_enrollment': 0
+        }
+        
+    except Exception as e:
+        print(f"Error extracting course info: {e}")
+        return None
+
+def extract_courses_from_text(text):
+    """Extract course information from plain text"""
+    courses = []
+    
+    # Look for course patterns in text
+    import re
+    code_patterns = [
+        r'\b([A-Z]{2,4}\s*\d{3,4}[A-Z]?)\b',  # CS 101, MATH 201A
+        r'\b([A-Z]{2,4}-\d{3,4})\b',  # CS-101, MATH-201
+        r'\b([A-Z]{2,4}\d{3,4})\b',   # CS101, MATH201
+    ]
+    
+    for pattern in code_patterns:
+        matches = re.finditer(pattern, text)
+        for match in matches:
+            # Clean up the code: remove spaces, dashes, and non-breaking spaces
+            code = match.group(1).replace(' ', '').replace('-', '').replace('\u00a0', '').strip()
+            
+            # Look for text around the code
+            start = max(0, match.start() - 200)
+            end = min(len(text), match.end() + 200)
+            context = text[start:end]
+            
+            # Try to extract name from context
+            name = f'{code} Course'
+            lines = context.split('\n')
+            for line in lines:
+                if code in line and len(line.strip()) > len(code) + 5:
+                    name = line.strip()
+                    break
+            
+            courses.append({
+                'code': code,
+                'name': name,
+                'description': '',
+                'credits': 3,
+                'department': code[:2] if len(code) >= 2 else 'Unknown',
+                'prerequisites': '',
+                'semester': 'Both',
+                'year': 2025,
+                'time_slots': '',
+                'max_capacity': 0,
+                'current_enrollment': 0
+            })
+    
+    return courses
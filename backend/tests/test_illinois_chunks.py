@@ -0,0 +1,35 @@
+import io
+
+import pandas as pd
+import pytest
+
+from load_illinois_courses import read_illinois_chunks, stream_illinois_courses, transform_illinois_data
+
+HEADER = 'Year,Term,Subject,Number,Name,Description,Credit Hours,Start Time,End Time,Days of Week,Room,Building'
+
+def catalog_csv():
+    """Several sections per course, spread over the file, including rejected first rows"""
+    rows = []
+    for section in range(4):
+        for number in range(100, 120):
+            # The first section of every fifth course has no usable year, so
+            # the whole course is dropped even though later sections are fine
+            year = '' if section == 0 and number % 5 == 0 else '2025'
+            rows.append(f'{year},Fall,CS,{number},Course {number},Section {section},3,'
+                        f'{9 + section}:00,{9 + section}:50,MWF,{100 + section},Siebel')
+        rows.append(f'2025,Spring,MATH,{200 + section},Calculus {section},,4,,,,,')
+    rows.append('2025,Fall,,,No Subject,,3,,,,,')
+    return '\n'.join([HEADER] + rows) + '\n'
+
+def stream(chunksize):
+    chunks = read_illinois_chunks(io.StringIO(catalog_csv()), chunksize=chunksize)
+    return [course for batch in stream_illinois_courses(chunks) for course in batch]
+
+def test_stream_matches_whole_file_transform():
+    whole = transform_illinois_data(pd.read_csv(io.StringIO(catalog_csv()), dtype=str))
+    assert stream(10000) == whole
+    assert not any(course['course_code'] == 'CS105' for course in whole)
+
+@pytest.mark.parametrize('chunksize', [1, 3, 7, 20, 21, 50])
+def test_chunk_size_does_not_change_records(chunksize):
+    assert stream(chunksize) == stream(10000)
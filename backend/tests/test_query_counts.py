@@ -0,0 +1,81 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+import catalog
+from app import create_app
+from migrations import apply_migrations
+from models import db, Course, Schedule, User
+
+TERMS = [(semester, year) for year in (2025, 2026, 2027) for semester in ('Fall', 'Spring')]
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Keep the periodic catalog version check out of the counts
+    monkeypatch.setattr(catalog, 'CATALOG_VERSION_CHECK_INTERVAL', 3600)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'courses.db'}"})
+    with app.app_context():
+        db.create_all()
+        apply_migrations(db.engine)
+        for number in range(6):
+            db.session.add(Course(
+                code=f'CS{100 + number}', name=f'Course {number}', credits=3, department='CS',
+                semester='Both', year=2025, max_capacity=30,
+                time_slots=json.dumps([{'day': 'Monday', 'start_time': f'{8 + number}:00',
+                                        'end_time': f'{8 + number}:50', 'room': 'Siebel 1404'}])
+            ))
+        db.session.commit()
+        catalog.load_catalog_snapshot()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+def add_user(schedule_count, courses_per_schedule):
+    """A user with schedule_count schedules of courses_per_schedule courses each; returns (user id, schedule ids)"""
+    user = User(username=f'user{schedule_count}x{courses_per_schedule}',
+                email=f'user{schedule_count}x{courses_per_schedule}@example.com', preferences='{}')
+    db.session.add(user)
+    db.session.flush()
+    courses = Course.query.order_by(Course.id).limit(courses_per_schedule).all()
+    schedules = [Schedule(user_id=user.id, semester=semester, year=year, courses=courses,
+                          total_credits=sum(course.credits for course in courses))
+                 for semester, year in TERMS[:schedule_count]]
+    db.session.add_all(schedules)
+    db.session.commit()
+    return user.id, [schedule.id for schedule in schedules]
+
+def count_queries(app, client, url):
+    """Statements executed by one GET of url, after a warm-up request (renders, snapshot)"""
+    assert client.get(url).status_code == 200
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        assert client.get(url).status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return len(statements)
+
+@pytest.mark.parametrize('schedule_count', [1, 5])
+def test_user_schedules_query_count(app, schedule_count):
+    with app.app_context():
+        user_id, _ = add_user(schedule_count, 4)
+    # User, schedules, then one batched SELECT ... IN for all their courses
+    assert count_queries(app, app.test_client(), f'/api/users/{user_id}/schedules') == 3
+
+@pytest.mark.parametrize('course_count', [1, 5])
+@pytest.mark.parametrize('path, expected', [
+    ('', 2),          # schedule, then its courses in one SELECT ... IN
+    ('/weekly', 2),   # schedule, then the deferred stored grid
+    ('/export', 3),   # schedule, the grid (checked for staleness) and the stored iCal
+])
+def test_schedule_query_count(app, course_count, path, expected):
+    with app.app_context():
+        _, schedule_ids = add_user(3, course_count)
+    assert count_queries(app, app.test_client(), f'/api/schedule/{schedule_ids[1]}{path}') == expected
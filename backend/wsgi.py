@@ -0,0 +1,24 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The schema is created/migrated and the catalog snapshot and term conflict
+matrices (conflict_matrix.py) are loaded here, at import time. With
+preload_app enabled gunicorn imports this module once in the master, so
+every forked worker starts with both already in memory instead of each one
+querying the catalog on its first request.
+"""
+
+from app import create_app, init_db
+from catalog import load_catalog_snapshot
+from conflict_matrix import get_conflict_matrices
+
+app = create_app()
+init_db(app)
+
+with app.app_context():
+    snapshot = load_catalog_snapshot()
+    print(f"Preloaded catalog snapshot v{snapshot.version} ({len(snapshot.courses)} courses)")
+    matrices = get_conflict_matrices(snapshot)
+    print(f"Preloaded conflict matrices for {', '.join(sorted(matrices.terms))}")
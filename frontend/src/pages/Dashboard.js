@@ -52,52 +52,26 @@ const Dashboard = () => {
     try {
       setLoading(true);
       
-      // Load user data
-      try {
-        // First try to load from localStorage
-        const savedUserData = localStorage.getItem(`user_data_${userId}`);
-        if (savedUserData) {
-          setUserData(JSON.parse(savedUserData));
-        }
-        
-        // Then try to load from backend (this will override localStorage if backend has newer data)
-        const userResponse = await userAPI.getUser(userId);
-        if (userResponse.data) {
-          setUserData(userResponse.data);
-          // Save to localStorage
-          localStorage.setItem(`user_data_${userId}`, JSON.stringify(userResponse.data));
-        }
-      } catch (err) {
-        console.error('Failed to load user data:', err);
-        // Try to load from localStorage as fallback
-        const savedUserData = localStorage.getItem(`user_data_${userId}`);
-        if (savedUserData) {
-          setUserData(JSON.parse(savedUserData));
-        }
+      // Load from localStorage first so the header renders while the request is in flight
+      const savedUserData = localStorage.getItem(`user_data_${userId}`);
+      if (savedUserData) {
+        setUserData(JSON.parse(savedUserData));
       }
       
       try {
-          const schedulesResponse = await userAPI.getUserSchedules(userId);
-          
-          if (schedulesResponse.data && schedulesResponse.data.length > 0) {
-            const schedulesWithDetails = await Promise.all(
-              schedulesResponse.data.map(async (schedule) => {
-                try {
-                  const scheduleDetails = await scheduleAPI.getSchedule(schedule.id);
-                  return scheduleDetails.data;
-                } catch (err) {
-                  console.error(`Error fetching schedule ${schedule.id}:`, err);
-                  return schedule;
-                }
-              })
-            );
-            setRecentSchedules(schedulesWithDetails);
-          }
-        } catch (err) {
-          console.error('Dashboard error:', err);
-          // Don't set error, just show empty state
-          setRecentSchedules([]);
+        // Profile, schedules and their courses in a single request
+        const dashboardResponse = await userAPI.getDashboard(userId);
+        const { user, schedules } = dashboardResponse.data;
+        if (user) {
+          setUserData(user);
+          localStorage.setItem(`user_data_${userId}`, JSON.stringify(user));
         }
+        setRecentSchedules(schedules || []);
+      } catch (err) {
+        console.error('Dashboard error:', err);
+        // Keep the saved user data and just show an empty schedule list
+        setRecentSchedules([]);
+      }
       } catch (err) {
         console.error('Dashboard error:', err);
         setError(err);
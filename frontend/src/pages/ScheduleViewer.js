@@ -26,6 +26,8 @@ import {
   ListItemText,
   Checkbox,
   ListItemButton,
+  TextField,
+  Pagination,
 } from '@mui/material';
 import {
   Edit as EditIcon,
@@ -34,7 +36,7 @@ import {
   Download as DownloadIcon,
   ArrowBack as ArrowBackIcon,
 } from '@mui/icons-material';
-import { scheduleAPI, courseAPI } from '../services/api';
+import { scheduleAPI } from '../services/api';
 
 const ScheduleViewer = () => {
   const { id } = useParams();
@@ -43,7 +45,9 @@ const ScheduleViewer = () => {
   const [weeklySchedule, setWeeklySchedule] = useState({});
   const [editDialogOpen, setEditDialogOpen] = useState(false);
   const [deleteDialogOpen, setDeleteDialogOpen] = useState(false);
-  const [availableCourses, setAvailableCourses] = useState([]);
+  const [compatibleCourses, setCompatibleCourses] = useState({ courses: [], page: 1, pages: 0, total: 0 });
+  const [courseSearch, setCourseSearch] = useState('');
+  const [addedCourses, setAddedCourses] = useState([]);
   const [selectedCourses, setSelectedCourses] = useState([]);
   const [updating, setUpdating] = useState(false);
   const [deleting, setDeleting] = useState(false);
@@ -77,77 +81,67 @@ const ScheduleViewer = () => {
     }
   };
 
-  const fetchAvailableCourses = async () => {
+  // Only courses that fit the schedule (no conflicts, within remaining credits) are offered;
+  // courses picked in the dialog but not saved yet are sent as pending
+  const fetchCompatibleCourses = async (page = 1, added = addedCourses, search = courseSearch) => {
     try {
-      const response = await courseAPI.getCourses();
-      setAvailableCourses(response.data);
+      const response = await scheduleAPI.getCompatibleCourses(id, {
+        page,
+        q: search,
+        pending: added.map(c => c.id),
+      });
+      setCompatibleCourses(response.data);
     } catch (err) {
-      console.error('Available courses fetch error:', err);
+      console.error('Compatible courses fetch error:', err);
     }
   };
 
   const handleEditSchedule = () => {
-    fetchAvailableCourses();
+    setAddedCourses([]);
+    setCourseSearch('');
+    setSelectedCourses(schedule.courses.map(c => c.id));
+    fetchCompatibleCourses(1, [], '');
     setEditDialogOpen(true);
   };
 
-  const handleAddCourse = (courseId) => {
-    const course = availableCourses.find(c => c.id === courseId);
-    if (!course) return;
-
-    // Check for conflicts
-    const conflicts = checkForConflicts([...selectedCourses, courseId]);
-    if (conflicts.length > 0) {
-      alert(`Conflict detected: ${conflicts.map(c => c.conflict).join(', ')}`);
-      return;
-    }
+  const handleCourseSearch = (search) => {
+    setCourseSearch(search);
+    fetchCompatibleCourses(1, addedCourses, search);
+  };
 
-    setSelectedCourses(prev => [...prev, courseId]);
+  const handleAddCourse = (course) => {
+    const added = [...addedCourses, course];
+    setAddedCourses(added);
+    setSelectedCourses(prev => [...prev, course.id]);
+    fetchCompatibleCourses(compatibleCourses.page, added);
   };
 
   const handleRemoveCourse = (courseId) => {
     setSelectedCourses(prev => prev.filter(id => id !== courseId));
-  };
-
-  const checkForConflicts = (courseIds) => {
-    const courses = availableCourses.filter(c => courseIds.includes(c.id));
-    const conflicts = [];
-    
-    for (let i = 0; i < courses.length; i++) {
-      for (let j = i + 1; j < courses.length; j++) {
-        const course1 = courses[i];
-        const course2 = courses[j];
-        
-        if (course1.time_slots && course2.time_slots) {
-          for (const slot1 of course1.time_slots) {
-            for (const slot2 of course2.time_slots) {
-              if (slot1.day === slot2.day) {
-                conflicts.push({
-                  course1: course1.code,
-                  course2: course2.code,
-                  conflict: `Time conflict on ${slot1.day}`
-                });
-              }
-            }
-          }
-        }
-      }
+    if (addedCourses.some(c => c.id === courseId)) {
+      const added = addedCourses.filter(c => c.id !== courseId);
+      setAddedCourses(added);
+      fetchCompatibleCourses(compatibleCourses.page, added);
     }
-    
-    return conflicts;
   };
 
-  const hasTimeConflict = (slot1, slot2) => {
-    return slot1.day === slot2.day;
+  // PATCH responses carry the updated schedule and weekly grid, so no refetch is needed
+  const applyScheduleEdit = (data) => {
+    setSchedule(data.schedule);
+    setSelectedCourses(data.schedule.courses.map(c => c.id));
+    setWeeklySchedule(data.weekly);
   };
 
   const handleUpdateSchedule = async () => {
+    const currentIds = schedule.courses.map(c => c.id);
+    const add = selectedCourses.filter(courseId => !currentIds.includes(courseId));
+    const remove = currentIds.filter(courseId => !selectedCourses.includes(courseId));
+
     try {
       setUpdating(true);
-      await scheduleAPI.updateSchedule(id, selectedCourses);
+      const response = await scheduleAPI.editSchedule(id, { add, remove });
+      applyScheduleEdit(response.data);
       setEditDialogOpen(false);
-      fetchSchedule();
-      fetchWeeklySchedule();
     } catch (err) {
       if (err.response?.status === 400 && err.response?.data?.conflicts) {
         const conflicts = err.response.data.conflicts;
@@ -164,33 +158,13 @@ const ScheduleViewer = () => {
   };
 
   const handleRemoveCourseFromSchedule = async (courseId) => {
-    const updatedCourseIds = selectedCourses.filter(id => id !== courseId);
-    
     try {
-      await scheduleAPI.updateSchedule(id, updatedCourseIds);
-      fetchSchedule();
-      fetchWeeklySchedule();
+      // Removing a course can't introduce a conflict, so no force prompt is needed
+      const response = await scheduleAPI.editSchedule(id, { remove: [courseId] });
+      applyScheduleEdit(response.data);
     } catch (err) {
-      if (err.response?.status === 400 && err.response?.data?.conflicts) {
-        const conflicts = err.response.data.conflicts;
-        const conflictCount = conflicts.length;
-        const conflictCourses = conflicts.map(c => `${c.course1} vs ${c.course2}`).join('\n');
-        const shouldForce = window.confirm(
-          `Removing this course would create ${conflictCount} time conflict${conflictCount > 1 ? 's' : ''} in your schedule:\n\n${conflictCourses}\n\nThis means these courses overlap and you couldn't attend them all.\n\nDo you want to proceed anyway?`
-        );
-        
-        if (shouldForce) {
-          try {
-            await scheduleAPI.updateSchedule(id, updatedCourseIds, true);
-            fetchSchedule();
-            fetchWeeklySchedule();
-          } catch (forceErr) {
-            alert('Failed to update schedule even with force update');
-          }
-        }
-      } else {
-        alert('Failed to remove course');
-      }
+      alert('Failed to remove course');
+      console.error('Remove course error:', err);
     }
   };
 
@@ -417,11 +391,14 @@ const ScheduleViewer = () => {
         <DialogTitle>Edit Schedule</DialogTitle>
         <DialogContent>
           <Typography variant="body2" color="text.secondary" sx={{ mb: 2 }}>
-            Select courses to include in your schedule. Conflicts will be highlighted.
+            Only courses that fit your schedule without time conflicts are listed.
           </Typography>
           
-          <List>
-            {availableCourses.map((course) => (
+          <Typography variant="subtitle2" sx={{ mt: 1 }}>
+            In this schedule
+          </Typography>
+          <List dense>
+            {[...(schedule?.courses || []), ...addedCourses].map((course) => (
               <ListItem key={course.id} disablePadding>
                 <ListItemButton>
                   <Checkbox
@@ -429,12 +406,39 @@ const ScheduleViewer = () => {
                     checked={selectedCourses.includes(course.id)}
                     onChange={(e) => {
                       if (e.target.checked) {
-                        handleAddCourse(course.id);
+                        setSelectedCourses(prev => [...prev, course.id]);
                       } else {
                         handleRemoveCourse(course.id);
                       }
                     }}
                   />
+                  <ListItemText
+                    primary={`${course.code} - ${course.name}`}
+                    secondary={`${course.credits} credits`}
+                  />
+                </ListItemButton>
+              </ListItem>
+            ))}
+          </List>
+
+          <Box sx={{ display: 'flex', alignItems: 'center', justifyContent: 'space-between', mt: 2, gap: 2 }}>
+            <Typography variant="subtitle2">
+              Courses that fit ({compatibleCourses.total}
+              {compatibleCourses.remaining_credits !== undefined && `, ${compatibleCourses.remaining_credits} credits left`})
+            </Typography>
+            <TextField
+              size="small"
+              placeholder="Search code or name"
+              value={courseSearch}
+              onChange={(e) => handleCourseSearch(e.target.value)}
+            />
+          </Box>
+          
+          <List>
+            {compatibleCourses.courses.map((course) => (
+              <ListItem key={course.id} disablePadding>
+                <ListItemButton onClick={() => handleAddCourse(course)}>
+                  <Checkbox edge="start" checked={false} />
                   <ListItemText
                     primary={
                       <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
@@ -457,6 +461,16 @@ const ScheduleViewer = () => {
               </ListItem>
             ))}
           </List>
+
+          {compatibleCourses.pages > 1 && (
+            <Box sx={{ display: 'flex', justifyContent: 'center' }}>
+              <Pagination
+                count={compatibleCourses.pages}
+                page={compatibleCourses.page}
+                onChange={(e, page) => fetchCompatibleCourses(page)}
+              />
+            </Box>
+          )}
           
           <Box sx={{ display: 'flex', gap: 2, mt: 2 }}>
             <Button
@@ -66,6 +66,20 @@ export const scheduleAPI = {
     });
   },
 
+  editSchedule: (scheduleId, { add = [], remove = [] }, forceUpdate = false) => {
+    return api.patch(`/schedule/${scheduleId}`, {
+      add,
+      remove,
+      force_update: forceUpdate
+    });
+  },
+
+  getCompatibleCourses: (scheduleId, { page = 1, perPage = 25, q = '', department = '', pending = [] } = {}) => {
+    return api.get(`/schedule/${scheduleId}/compatible-courses`, {
+      params: { page, per_page: perPage, q, department, pending: pending.join(',') }
+    });
+  },
+
   getWeeklySchedule: (scheduleId) => {
     return api.get(`/schedule/${scheduleId}/weekly`);
   },
@@ -97,6 +111,10 @@ export const userAPI = {
   getUserSchedules: (userId) => {
     return api.get(`/users/${userId}/schedules`);
   },
+
+  getDashboard: (userId) => {
+    return api.get(`/users/${userId}/dashboard`);
+  },
   
   getUserPreferences: (userId) => {
     return api.get(`/users/${userId}/preferences`);